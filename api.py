@@ -0,0 +1,141 @@
+"""
+API JSON du catalogue, montée sous /api par asgi.py.
+
+GET /api/documents?after=&limit=&type=&fields=   page du catalogue triée par cote
+GET /api/documents/lot?cote=A&cote=B&fields=     plusieurs documents par cote
+GET /api/documents/{cote}?fields=                un document
+
+Chaque réponse porte un ETag dérivé de la version du catalogue (voir
+cache.VersionCatalogue) : une requête If-None-Match dont l'ETag est toujours
+valable reçoit 304 sans que la base soit interrogée.
+"""
+import hashlib
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from bibiotheques import Bibliotheques
+from cache import version_catalogue
+from document import LIMITE_MAX
+from index_cotes import DOCUMENTS, index_cotes
+from schemas import CHAMPS, SCHEMAS
+
+# Champs toujours renvoyés, même avec ?fields=
+CHAMPS_OBLIGATOIRES: set[str] = {"type", "code"}
+
+
+def _champs(fields: str | None) -> set[str] | None:
+    if not fields:
+        return None
+    champs = {champ.strip() for champ in fields.split(",") if champ.strip()}
+    inconnus = champs - CHAMPS
+    if inconnus:
+        raise HTTPException(status_code=400, detail=f"Champ(s) inconnu(s) : {', '.join(sorted(inconnus))}.")
+    return champs | CHAMPS_OBLIGATOIRES
+
+
+def _serialiser(type_document: str, row: tuple, champs: set[str] | None) -> dict:
+    return SCHEMAS[type_document].depuis_ligne(row).model_dump(include=champs)
+
+
+def _etag(request: Request) -> str:
+    cle = f"{version_catalogue.valeur}|{request.url.path}|{request.url.query}"
+    return f'W/"{hashlib.blake2b(cle.encode(), digest_size=12).hexdigest()}"'
+
+
+def _non_modifie(request: Request, etag: str) -> Response | None:
+    attendus = {valeur.strip() for valeur in request.headers.get("if-none-match", "").split(",")}
+    if etag in attendus or "*" in attendus:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def _reponse(contenu: dict, etag: str) -> Response:
+    # orjson sérialise directement les dates et les listes de dicts, sans passer par jsonable_encoder
+    return Response(orjson.dumps(contenu), media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def routeur_api(config_db: dict, bibio: Bibliotheques) -> APIRouter:
+    """
+    Crée le routeur de l'API JSON pour une base et une bibliothèque données.
+
+    :param config_db: La configuration de connexion à la base de données.
+    :param bibio: La bibliothèque qui sert les pages du catalogue.
+    :return: Le routeur, à inclure dans l'application avec app.include_router.
+    :rtype: APIRouter
+    """
+    routeur = APIRouter(prefix="/api")
+
+    @routeur.get("/documents")
+    async def liste(request: Request, after: str | None = None, limit: int = Query(50, ge=1, le=LIMITE_MAX),
+                    type: str | None = None, fields: str | None = None):
+        if type is not None and type not in DOCUMENTS:
+            raise HTTPException(status_code=400, detail=f"Type de document inconnu : {type}.")
+        champs = _champs(fields)
+        etag = _etag(request)
+        if (reponse := _non_modifie(request, etag)) is not None:
+            return reponse
+
+        if type is None:
+            page = await bibio.get_page_document_async(after, limit)
+            lignes = sorted(((famille, row) for famille in DOCUMENTS for row in page[famille]),
+                            key=lambda ligne: ligne[1].code)
+            suivant = page["suivant"]
+        else:
+            rows = await DOCUMENTS[type].get_page_async(config_db, after, limit) or []
+            lignes = [(type, row) for row in rows]
+            suivant = rows[-1].code if len(rows) == limit else None
+
+        return _reponse({
+            "documents": [_serialiser(famille, row, champs) for famille, row in lignes],
+            "suivant": suivant,
+        }, etag)
+
+    @routeur.get("/documents/lot")
+    async def lot(request: Request, cote: list[str] = Query(..., max_length=LIMITE_MAX), fields: str | None = None):
+        champs = _champs(fields)
+        etag = _etag(request)
+        if (reponse := _non_modifie(request, etag)) is not None:
+            return reponse
+
+        codes = list(dict.fromkeys(cote))
+        # cotes inconnues et entrées périmées de l'index : localisées en une requête, voir IndexCotes
+        trouves: dict[str, dict] = {}
+        par_type, a_localiser = index_cotes.repartir(codes)
+        for passe in ("connues", "localisees"):
+            for type_document, cotes in par_type.items():
+                if cotes:
+                    for row in await DOCUMENTS[type_document].get_many_async(config_db, cotes) or []:
+                        trouves[row.code] = _serialiser(type_document, row, champs)
+            if passe == "connues":
+                a_localiser += [code for cotes in par_type.values() for code in cotes if code not in trouves]
+                if not a_localiser:
+                    break
+                par_type = index_cotes.par_type(await index_cotes.localiser_async(config_db, a_localiser))
+
+        return _reponse({
+            "documents": [trouves[code] for code in codes if code in trouves],
+            "manquants": [code for code in codes if code not in trouves],
+        }, etag)
+
+    @routeur.get("/documents/{cote}")
+    async def detail(request: Request, cote: str, fields: str | None = None):
+        champs = _champs(fields)
+        etag = _etag(request)
+        if (reponse := _non_modifie(request, etag)) is not None:
+            return reponse
+
+        rows: list[tuple] | None = None
+        type_document = index_cotes.type_de(cote)
+        if type_document is not None:
+            rows = await DOCUMENTS[type_document].get_async(config_db, cote)
+        if not rows and (type_document is not None or not index_cotes.absent(cote)):
+            # cote inconnue, ou absente de son type connu : localisée en une requête, voir IndexCotes
+            type_document = (await index_cotes.localiser_async(config_db, [cote])).get(cote)
+            rows = await DOCUMENTS[type_document].get_async(config_db, cote) if type_document else None
+        if rows:
+            return _reponse(_serialiser(type_document, rows[0], champs), etag)
+
+        raise HTTPException(status_code=404, detail=f"Le document {cote} n'existe pas.")
+
+    return routeur
@@ -0,0 +1,219 @@
+"""
+Version ASGI (FastAPI) des pages de main.py.
+
+Les accès à la base passent par le pool asynchrone (mysql.connector.aio) : une
+requête qui attend MySQL rend la main à la boucle d'événements au lieu de bloquer
+un thread, ce qui permet à un seul processus de servir des centaines de pages en
+parallèle.
+
+Lancement :
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Form, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+from starlette.middleware.sessions import SessionMiddleware
+
+from api import routeur_api
+from cache import cache_documents, version_catalogue
+from fragments import MARQUE_CATALOGUE, Corps, cache_pages, choisir_encodage, page_en_flux, par_blocs
+from bibiotheques import Bibliotheques
+from databaseconnection import get_async_pool
+from document import Document, LIMITE_MAX
+from livre import Livre
+from journal import Journal
+from dvd import Dvd
+from personne import PERM_PERSONNEL, Personne
+from recherche import index_recherche
+from autocompletion import autocompletion
+
+config = {
+    "host": "127.0.0.1",
+    "user": "root",
+    "password": "wm7ze*2b",
+    "database": "bu",
+}
+
+
+@asynccontextmanager
+async def cycle_de_vie(_: FastAPI):
+    index_recherche.construire_en_arriere_plan(config)
+    autocompletion.construire_en_arriere_plan(config)
+    yield
+    await get_async_pool(config).close()
+
+
+app = FastAPI(lifespan=cycle_de_vie)
+app.add_middleware(SessionMiddleware, secret_key='wm7ze*2b')
+templates = Jinja2Templates(directory="templates")
+# Les pages ne lisent que le catalogue : pas besoin de charger l'état des emprunts
+bibio = Bibliotheques(config, charger=False)
+app.include_router(routeur_api(config, bibio))
+
+
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request, after: str | None = None, limit: int = 50):
+    # borné comme par get_page_document, avant de servir de clé : ?limit=1000 et ?limit=1001 sont la même page
+    limit = max(1, min(limit, LIMITE_MAX))
+    login = request.session.get('login')
+    encodage = choisir_encodage(request.headers.get("accept-encoding"))
+
+    # page déjà rendue pour cette version du catalogue et ce login : servie telle quelle (voir fragments.py)
+    corps = cache_pages.corps(("index", after, limit, login))
+    if corps is None:
+        catalogue = cache_pages.fragment(("catalogue", after, limit))
+        if catalogue is None:
+            # rien en cache : le bandeau part tout de suite, les tableaux au fil du rendu
+            version = version_catalogue.valeur
+            datas = await bibio.get_page_document_async(after, limit)
+            tableaux = templates.get_template("catalogue.html").generate({
+                "livres": datas["livre"],
+                "journals": datas["journal"],
+                "dvds": datas["dvd"],
+                "suivant": datas["suivant"],
+                "limit": limit,
+            })
+            page = templates.get_template("index.html").render({
+                "catalogue": Markup(MARQUE_CATALOGUE),
+                "login": login,
+                "nom": request.session.get('nom'),
+            })
+            return StreamingResponse(
+                page_en_flux(page, tableaux, ("index", after, limit, login), ("catalogue", after, limit), version),
+                headers=Corps.entetes(None))
+        corps = cache_pages.garder_corps(("index", after, limit, login), templates.get_template("index.html").render({
+            "catalogue": catalogue,
+            "login": login,
+            "nom": request.session.get('nom'),
+        }))
+
+    return Response(corps.encoder(encodage), headers=Corps.entetes(encodage))
+
+
+@app.get("/catalogue", response_class=HTMLResponse)
+async def catalogue_complet(request: Request):
+    # tout le catalogue, lu et rendu au fil de l'envoi : mémoire et délai du premier octet
+    # ne dépendent pas de la taille du catalogue. Les lectures sont synchrones (Depot.parcourir) :
+    # StreamingResponse consomme le générateur dans le pool de threads.
+    return StreamingResponse(par_blocs(templates.get_template("index.html").generate({
+        "livres": Livre.iter_all(config),
+        "journals": Journal.iter_all(config),
+        "dvds": Dvd.iter_all(config),
+        "suivant": None,
+        "limit": None,
+        "login": request.session.get('login'),
+        "nom": request.session.get('nom'),
+    })), headers=Corps.entetes(None))
+
+
+async def page_document(request: Request, classe: type[Document], cote: str) -> HTMLResponse:
+    data = await classe.get_async(config, cote)
+    if not data:
+        raise HTTPException(status_code=404, detail=f"Le document {cote} n'existe pas.")
+
+    return templates.TemplateResponse(request, f"{classe.type_document}.html", {
+        "document": data[0],
+        "login": request.session.get('login'),
+        "nom": request.session.get('nom'),
+    })
+
+
+@app.get("/livre/{cote}", response_class=HTMLResponse)
+async def livre(request: Request, cote: str):
+    return await page_document(request, Livre, cote)
+
+
+@app.get("/dvd/{cote}", response_class=HTMLResponse)
+async def dvd(request: Request, cote: str):
+    return await page_document(request, Dvd, cote)
+
+
+@app.get("/journal/{cote}", response_class=HTMLResponse)
+async def journal(request: Request, cote: str):
+    return await page_document(request, Journal, cote)
+
+
+@app.get("/recherche", response_class=HTMLResponse)
+async def recherche(request: Request, q: str = "", k: int = 20):
+    datas = await bibio.rechercher_async(q, k) if q.strip() else {"resultats": [], "message": ""}
+    return templates.TemplateResponse(request, "recherche.html", {
+        "q": q,
+        "resultats": datas["resultats"],
+        "message": datas["message"],
+        "login": request.session.get('login'),
+        "nom": request.session.get('nom'),
+    })
+
+
+@app.get("/autocomplete")
+async def autocomplete(q: str = "", n: int = Query(10, ge=1, le=50)):
+    return JSONResponse({"q": q, "completions": autocompletion.completer(q, n)})
+
+
+async def refus_personnel(request: Request) -> JSONResponse | None:
+    """
+    Renvoie la réponse d'erreur si la session n'est pas celle d'un membre du personnel, sinon None.
+    """
+    if 'num' not in request.session:
+        return JSONResponse({"message": "Connexion requise.", "status": 401}, status_code=401)
+    # profil relu (en cache) plutôt que gardé en session : un retrait de droits s'applique aussitôt
+    profil = await Personne.get_profil_async(config, request.session['num'])
+    if profil is None or profil.perm != PERM_PERSONNEL:
+        return JSONResponse({"message": "Réservé au personnel de la bibliothèque.", "status": 403},
+                            status_code=403)
+    return None
+
+
+@app.get("/stats/cache")
+async def stats_cache(request: Request):
+    if (refus := await refus_personnel(request)) is not None:
+        return refus
+    return JSONResponse({**cache_documents.stats(), "pages": cache_pages.stats(),
+                         "pool": get_async_pool(config).stats()})
+
+
+@app.get("/auth", response_class=HTMLResponse)
+async def auth_get(request: Request):
+    if 'num' in request.session:
+        return RedirectResponse("/", status_code=302)
+
+    return templates.TemplateResponse(request, "login.html", {})
+
+
+@app.post("/auth")
+async def auth_post(request: Request, login: str = Form(""), password: str = Form("")):
+    data = await Personne.connection_async(config, login, password)
+    if data:
+        request.session['num'] = str(data.num)
+        request.session['login'] = login
+        request.session['nom'] = data.nom
+        return RedirectResponse("/", status_code=302)
+    else:
+        return RedirectResponse("/auth", status_code=302)
+
+
+@app.get("/user", response_class=HTMLResponse)
+async def user(request: Request):
+    if 'num' not in request.session:
+        return RedirectResponse("/auth", status_code=302)
+
+    user_data = await Personne.get_profil_async(config, request.session['num'])
+    if user_data is None:
+        request.session.clear()
+        return RedirectResponse("/auth", status_code=302)
+    return templates.TemplateResponse(request, "user.html", {
+        "profil": user_data,
+        "login": user_data.login,
+    })
+
+
+@app.get("/logout")
+async def logout(request: Request):
+    # Supprime les données de session pour déconnecter l'utilisateur
+    request.session.pop('num', None)
+    request.session.pop('login', None)
+    request.session.pop('nom', None)
+    return RedirectResponse("/auth", status_code=302)
@@ -0,0 +1,322 @@
+"""
+Autocomplétion des cotes, titres et auteurs du catalogue.
+
+Les valeurs sont repliées (voir recherche.plier), dédoublonnées et rangées dans un
+tableau trié : les valeurs qui commencent par un préfixe forment une plage contiguë,
+trouvée par dichotomie. Un arbre de segments sur les poids (nombre d'emprunts)
+renvoie le meilleur élément d'une plage en O(log n) ; les N meilleures complétions
+s'obtiennent en découpant la plage autour de chaque élément trouvé, quelle que soit
+la longueur du préfixe ou la taille de la plage.
+
+Les écritures du catalogue s'appliquent tout de suite : les valeurs d'un document
+inséré ou modifié qui manquent au tableau vont dans une petite table d'ajouts,
+parcourue avec la plage, et la cote d'un document supprimé est écartée des
+réponses. Le tableau est reconstruit en arrière-plan peu après (delai_contenu),
+pour oublier les anciens titres et auteurs, et quand les emprunts ont changé les
+poids (delai_reconstruction).
+"""
+import bisect
+import heapq
+import logging
+import sys
+import threading
+import time
+from array import array
+from document import Document
+from emprunt import Emprunt
+from index_cotes import DOCUMENTS
+from recherche import plier
+
+logger = logging.getLogger(__name__)
+
+# Genres de valeurs proposées, et colonne correspondante de chaque type de document
+GENRES: tuple[str, ...] = ("cote", "titre", "auteur")
+COLONNES_GENRE: dict[str, dict[str, str]] = {
+    "livre": {"cote": "code", "titre": "titre", "auteur": "auteur"},
+    "dvd": {"cote": "code", "titre": "titre", "auteur": "auteur"},
+    "journal": {"cote": "code", "titre": "titre"},
+}
+
+
+class Autocompletion:
+    """
+    Complétions pondérées par le nombre d'emprunts.
+
+    Le poids d'une valeur est 1 plus le nombre d'emprunts des documents qui la portent
+    (un auteur cumule les emprunts de tous ses documents) ; à poids égal, l'ordre
+    alphabétique départage.
+
+    Attributs :
+    -----------
+    construit : bool
+        True une fois la structure construite.
+
+    Méthodes :
+    ----------
+    construire(config_db: dict) -> bool:
+        (Re)construit la structure à partir des tables de documents et de la table Emprunt.
+
+    charger(valeurs, depuis: float | None = None) -> None:
+        Construit la structure à partir de (valeur, genre, type de document, cote, poids) ;
+        les ajouts et retraits faits avant l'instant `depuis` (tous par défaut) sont oubliés.
+
+    ajouter(type_document: str, row: tuple) -> None:
+    retirer(code: str) -> None:
+        Appliquent l'insertion (ou la modification) et la suppression d'un document sans
+        reconstruction.
+
+    invalider(delai: float) -> None:
+        Demande une reconstruction dans au plus `delai` secondes.
+
+    completer(prefixe: str, n: int = 10) -> list[dict]:
+        Renvoie les n meilleures complétions du préfixe.
+
+    memoire() -> dict:
+        Estime la mémoire occupée par la structure, en octets.
+    """
+
+    def __init__(self, delai_reconstruction: float = 600.0, delai_contenu: float = 30.0,
+                 taille_max_ajouts: int = 10_000):
+        self.construit: bool = False
+        self.delai_reconstruction: float = delai_reconstruction
+        self.delai_contenu: float = delai_contenu
+        self.taille_max_ajouts: int = taille_max_ajouts
+        # instant (time.monotonic) où lancer la prochaine reconstruction
+        self._echeance: float = float("inf")
+        self._config_db: dict | None = None
+        # valeurs absentes du tableau : (clé repliée, genre) -> (valeur affichée, type, instant de l'ajout)
+        self._ajouts: dict[tuple[str, int], tuple[str, str | None, float]] = {}
+        # cotes supprimées encore dans le tableau : (clé repliée, genre) -> instant du retrait
+        self._retires: dict[tuple[str, int], float] = {}
+        self._verrou = threading.Lock()
+        self._cles: list[str] = []
+        self._valeurs: list[str] = []
+        self._genres: array = array("B")
+        # pour une cote : le type du document ; pour un titre ou un auteur : None
+        self._types: list[str | None] = []
+        self._poids: array = array("I")
+        self._arbre: array = array("i")
+
+    def __len__(self) -> int:
+        return len(self._cles)
+
+    def construire(self, config_db: dict) -> bool:
+        self._config_db = config_db
+        self._echeance = float("inf")
+        depuis = time.monotonic()
+
+        emprunts = Emprunt.compteurs(config_db)
+        valeurs = []
+        for type_document, classe in DOCUMENTS.items():
+            for row in classe.iter_all(config_db):
+                poids = emprunts.get(row.code, 0)
+                for genre, colonne in COLONNES_GENRE[type_document].items():
+                    valeur = getattr(row, colonne)
+                    if valeur:
+                        valeurs.append((str(valeur), genre, type_document, row.code, poids))
+
+        self.charger(valeurs, depuis)
+        logger.info("Autocomplétion construite : %d valeurs.", len(self))
+        return True
+
+    def construire_en_arriere_plan(self, config_db: dict) -> threading.Thread:
+        thread = threading.Thread(target=self.construire, args=(config_db,), name="autocompletion", daemon=True)
+        thread.start()
+        return thread
+
+    def charger(self, valeurs, depuis: float | None = None) -> None:
+        # (clé repliée, genre) -> [valeur affichée, type, poids cumulé]
+        agregats: dict[tuple[str, int], list] = {}
+        for valeur, genre, type_document, code, poids in valeurs:
+            numero = GENRES.index(genre)
+            cle = plier(valeur).strip()
+            if not cle:
+                continue
+            entree = agregats.get((cle, numero))
+            if entree is None:
+                agregats[(cle, numero)] = [valeur, type_document if genre == "cote" else None, 1 + poids]
+            else:
+                entree[2] += poids
+
+        ordre = sorted(agregats)
+        cles = [cle for cle, _ in ordre]
+        genres = array("B", (numero for _, numero in ordre))
+        valeurs_affichees = [agregats[cle][0] for cle in ordre]
+        types = [agregats[cle][1] for cle in ordre]
+        poids = array("I", (min(agregats[cle][2], 0xFFFFFFFF) for cle in ordre))
+        del agregats, ordre
+
+        arbre = self._construire_arbre(poids)
+
+        with self._verrou:
+            self._cles, self._genres, self._valeurs, self._types = cles, genres, valeurs_affichees, types
+            self._poids, self._arbre = poids, arbre
+            self.construit = True
+            # les écritures faites pendant la lecture des tables restent appliquées
+            if depuis is None:
+                self._ajouts.clear()
+                self._retires.clear()
+            else:
+                self._ajouts = {cle: ajout for cle, ajout in self._ajouts.items()
+                                if ajout[2] >= depuis and self._indice(*cle) is None}
+                self._retires = {cle: instant for cle, instant in self._retires.items() if instant >= depuis}
+
+    @staticmethod
+    def _cle(genre: str, valeur) -> tuple[str, int] | None:
+        cle = plier(str(valeur)).strip() if valeur else ""
+        return (cle, GENRES.index(genre)) if cle else None
+
+    def _indice(self, cle: str, numero: int) -> int | None:
+        # position de (clé, genre) dans le tableau, appelé verrou tenu
+        indice = bisect.bisect_left(self._cles, cle)
+        while indice < len(self._cles) and self._cles[indice] == cle:
+            if self._genres[indice] == numero:
+                return indice
+            indice += 1
+        return None
+
+    def ajouter(self, type_document: str, row: tuple) -> None:
+        maintenant = time.monotonic()
+        with self._verrou:
+            for genre, colonne in COLONNES_GENRE[type_document].items():
+                valeur = getattr(row, colonne)
+                cle = self._cle(genre, valeur)
+                if cle is None:
+                    continue
+                self._retires.pop(cle, None)
+                # déjà proposée : un document de plus sans emprunt ne change pas son poids
+                if cle not in self._ajouts and self._indice(*cle) is None:
+                    self._ajouts[cle] = (str(valeur), type_document if genre == "cote" else None, maintenant)
+            trop = len(self._ajouts) > self.taille_max_ajouts
+        if trop:
+            self.invalider(0.0)
+
+    def retirer(self, code: str) -> None:
+        # titre et auteur peuvent être portés par d'autres documents : ils attendent la reconstruction
+        cle = self._cle("cote", code)
+        if cle is None:
+            return
+        with self._verrou:
+            self._ajouts.pop(cle, None)
+            if self._indice(*cle) is not None:
+                self._retires[cle] = time.monotonic()
+
+    @staticmethod
+    def _mieux(poids: array, a: int, b: int) -> int:
+        # plus grand poids, puis plus petit indice (ordre alphabétique)
+        if a < 0 or poids[b] > poids[a] or (poids[b] == poids[a] and b < a):
+            return b
+        return a
+
+    def _construire_arbre(self, poids: array) -> array:
+        # arbre de segments itératif : la feuille n + i vaut i, chaque nœud l'indice de plus grand poids
+        n = len(poids)
+        arbre = array("i", range(-n, n))
+        for noeud in range(n - 1, 0, -1):
+            arbre[noeud] = self._mieux(poids, arbre[2 * noeud], arbre[2 * noeud + 1])
+        return arbre
+
+    def _meilleur(self, debut: int, fin: int) -> int:
+        """
+        Indice de plus grand poids dans [debut, fin) (le plus petit indice en cas d'égalité).
+        """
+        poids, arbre, n = self._poids, self._arbre, len(self._poids)
+        meilleur = -1
+        debut += n
+        fin += n
+        while debut < fin:
+            if debut & 1:
+                meilleur = self._mieux(poids, meilleur, arbre[debut])
+                debut += 1
+            if fin & 1:
+                fin -= 1
+                meilleur = self._mieux(poids, meilleur, arbre[fin])
+            debut >>= 1
+            fin >>= 1
+        return meilleur
+
+    def completer(self, prefixe: str, n: int = 10) -> list[dict]:
+        self._rafraichir()
+        cle = plier(prefixe).lstrip()
+        if not cle or n <= 0:
+            return []
+
+        with self._verrou:
+            # (-poids, clé, genre, valeur, type) : même ordre que le tableau, poids puis alphabet
+            candidats: list[tuple] = []
+            debut = bisect.bisect_left(self._cles, cle)
+            # "\uffff" est plus grand que tout caractère replié : fin de la plage du préfixe
+            fin = bisect.bisect_left(self._cles, cle + "\uffff", debut)
+            if debut < fin:
+                meilleur = self._meilleur(debut, fin)
+                plages = [(-self._poids[meilleur], meilleur, debut, fin)]
+                while plages and len(candidats) < n:
+                    _, indice, debut, fin = heapq.heappop(plages)
+                    if (self._cles[indice], self._genres[indice]) not in self._retires:
+                        candidats.append((-self._poids[indice], self._cles[indice], self._genres[indice],
+                                          self._valeurs[indice], self._types[indice]))
+                    for debut_plage, fin_plage in ((debut, indice), (indice + 1, fin)):
+                        if debut_plage < fin_plage:
+                            meilleur = self._meilleur(debut_plage, fin_plage)
+                            heapq.heappush(plages, (-self._poids[meilleur], meilleur, debut_plage, fin_plage))
+            # ajouts depuis la dernière construction : sans emprunt, poids 1
+            for (cle_ajout, numero), (valeur, type_document, _) in self._ajouts.items():
+                if cle_ajout.startswith(cle):
+                    candidats.append((-1, cle_ajout, numero, valeur, type_document))
+
+        candidats.sort(key=lambda candidat: candidat[:3])
+        return [{"valeur": valeur, "genre": GENRES[numero], "type": type_document, "poids": -poids}
+                for poids, _, numero, valeur, type_document in candidats[:n]]
+
+    def invalider(self, delai: float) -> None:
+        # la plus proche des échéances demandées : plusieurs écritures, une reconstruction
+        self._echeance = min(self._echeance, time.monotonic() + delai)
+
+    def _rafraichir(self) -> None:
+        # reconstruction en arrière-plan à l'échéance : les réponses restent servies par
+        # l'ancienne structure et les ajouts en attendant
+        if self._config_db is not None and time.monotonic() >= self._echeance:
+            self._echeance = float("inf")
+            self.construire_en_arriere_plan(self._config_db)
+
+    def memoire(self) -> dict:
+        with self._verrou:
+            cles = sys.getsizeof(self._cles) + sum(sys.getsizeof(cle) for cle in self._cles)
+            # une valeur identique à sa clé est souvent le même objet que la ligne lue : on compte tout
+            valeurs = sys.getsizeof(self._valeurs) + sum(sys.getsizeof(valeur) for valeur in self._valeurs)
+            types = sys.getsizeof(self._types)
+            tableaux = sum(sys.getsizeof(tableau) for tableau in (self._genres, self._poids, self._arbre))
+        return {
+            "valeurs": len(self),
+            "cles": cles,
+            "affichage": valeurs,
+            "types": types,
+            "tableaux": tableaux,
+            "total": cles + valeurs + types + tableaux,
+        }
+
+
+def _suivre_ecritures(action: str, type_document: str, code: str | None) -> None:
+    if autocompletion._config_db is None or type_document not in COLONNES_GENRE:
+        return
+    if code is None:
+        # import en masse : toute une famille a changé
+        autocompletion.invalider(autocompletion.delai_contenu)
+    elif action == "emprunt":
+        # seuls les poids changent : les complétions restent justes, leur ordre attend
+        autocompletion.invalider(autocompletion.delai_reconstruction)
+    elif action == "delete":
+        autocompletion.retirer(code)
+        autocompletion.invalider(autocompletion.delai_contenu)
+    elif action in ("insert", "update"):
+        rows = DOCUMENTS[type_document].get(autocompletion._config_db, code)
+        if rows:
+            autocompletion.ajouter(type_document, rows[0])
+        if action == "update":
+            # l'ancien titre ou auteur est encore proposé jusqu'à la reconstruction
+            autocompletion.invalider(autocompletion.delai_contenu)
+
+
+# Autocomplétion partagée par tout le processus
+autocompletion = Autocompletion()
+Document.abonner(_suivre_ecritures)
@@ -0,0 +1,106 @@
+"""
+Test de charge des pages : compare l'application Flask (main.py) et l'application
+ASGI (asgi.py) en nombre de requêtes par seconde et en latence p50/p99, pour un
+nombre croissant de clients simultanés.
+
+Les deux serveurs doivent être lancés au préalable, par exemple :
+    gunicorn -w 1 --threads 16 -b 127.0.0.1:5000 main:app
+    uvicorn asgi:app --workers 1 --port 8000
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.asgi --flask http://127.0.0.1:5000 --asgi http://127.0.0.1:8000 \\
+        --chemins / /livre/LIV123 --clients 10 100 500 --duree 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def requete(hote: str, port: int, chemin: str, connexion: list) -> int:
+    # HTTP/1.1 keep-alive minimal : aucune dépendance en plus de la bibliothèque standard
+    if not connexion:
+        connexion.extend(await asyncio.open_connection(hote, port))
+    lecteur, ecrivain = connexion
+    ecrivain.write(f"GET {chemin} HTTP/1.1\r\nHost: {hote}\r\nConnection: keep-alive\r\n\r\n".encode())
+    await ecrivain.drain()
+
+    ligne_statut = await lecteur.readline()
+    if not ligne_statut:
+        connexion.clear()
+        raise ConnectionError("connexion fermée par le serveur")
+    entetes = {}
+    while (ligne := await lecteur.readline()) not in (b"\r\n", b""):
+        nom, _, valeur = ligne.decode("latin-1").partition(":")
+        entetes[nom.strip().lower()] = valeur.strip()
+
+    if "content-length" in entetes:
+        await lecteur.readexactly(int(entetes["content-length"]))
+    elif entetes.get("transfer-encoding") == "chunked":
+        while taille := int((await lecteur.readline()).split(b";")[0], 16):
+            await lecteur.readexactly(taille + 2)
+        await lecteur.readline()
+    else:
+        await lecteur.read()
+        connexion.clear()
+
+    if entetes.get("connection") == "close" or ligne_statut.startswith(b"HTTP/1.0"):
+        ecrivain.close()
+        connexion.clear()
+    return int(ligne_statut.split()[1])
+
+
+async def charger(url: str, chemins: list[str], nb_clients: int, duree: float) -> dict:
+    cible = urlsplit(url)
+    hote, port = cible.hostname, cible.port or 80
+    latences: list[float] = []
+    erreurs = [0]
+    fin = time.perf_counter() + duree
+
+    async def client(indice: int):
+        connexion: list = []
+        n = indice
+        while time.perf_counter() < fin:
+            chemin = chemins[n % len(chemins)]
+            n += 1
+            debut = time.perf_counter()
+            try:
+                statut = await requete(hote, port, chemin, connexion)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                erreurs[0] += 1
+                connexion.clear()
+                continue
+            if statut >= 400:
+                erreurs[0] += 1
+            latences.append(time.perf_counter() - debut)
+        if connexion:
+            connexion[1].close()
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client(indice) for indice in range(nb_clients)))
+    ecoule = time.perf_counter() - debut
+
+    if len(latences) < 2:
+        return {"requetes/s": 0, "erreurs": erreurs[0]}
+    quantiles = statistics.quantiles(latences, n=100)
+    return {
+        "requetes/s": round(len(latences) / ecoule, 1),
+        "p50 (ms)": round(quantiles[49] * 1000, 2),
+        "p99 (ms)": round(quantiles[98] * 1000, 2),
+        "erreurs": erreurs[0],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flask", default="http://127.0.0.1:5000")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8000")
+    parser.add_argument("--chemins", nargs="+", default=["/", "/livre/LIV123"])
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--duree", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for nb_clients in args.clients:
+        for nom, url in (("flask", args.flask), ("asgi", args.asgi)):
+            print(f"{nom:5} {nb_clients:4} clients :", asyncio.run(charger(url, args.chemins, nb_clients, args.duree)))
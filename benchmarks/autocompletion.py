@@ -0,0 +1,78 @@
+"""
+Benchmark de l'autocomplétion : charge N valeurs synthétiques (cotes, titres et
+auteurs, poids d'emprunt à distribution de Zipf), puis simule la frappe de
+requêtes caractère par caractère et mesure la latence par frappe. Affiche aussi
+le budget mémoire de la structure.
+
+Aucune base n'est nécessaire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.autocompletion --valeurs 1000000 --frappes 20000 --n 10
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from autocompletion import Autocompletion
+
+SYLLABES = ["ba", "ri", "lo", "ne", "tu", "ma", "che", "vil", "mon", "pra", "dor", "gue", "li", "sa", "ter", "on"]
+
+
+def mot(hasard: random.Random) -> str:
+    return "".join(hasard.choice(SYLLABES) for _ in range(hasard.randint(2, 4))).capitalize()
+
+
+def generer(nb_valeurs: int, graine: int) -> list[tuple]:
+    hasard = random.Random(graine)
+    valeurs = []
+    numero = 0
+    while len(valeurs) < nb_valeurs:
+        code = f"LIV{numero:07d}"
+        # quelques documents très empruntés, beaucoup jamais
+        poids = int(1000 / (1 + hasard.paretovariate(1.2) * 50)) if hasard.random() < 0.3 else 0
+        valeurs.append((code, "cote", "livre", code, poids))
+        valeurs.append((" ".join(mot(hasard) for _ in range(hasard.randint(1, 5))), "titre", "livre", code, poids))
+        valeurs.append((f"{mot(hasard)} {mot(hasard)}", "auteur", "livre", code, poids))
+        numero += 1
+    return valeurs[:nb_valeurs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valeurs", type=int, default=1_000_000)
+    parser.add_argument("--frappes", type=int, default=20_000)
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--graine", type=int, default=7)
+    args = parser.parse_args()
+
+    valeurs = generer(args.valeurs, args.graine)
+    autocompletion = Autocompletion()
+
+    tracemalloc.start()
+    debut = time.perf_counter()
+    autocompletion.charger(valeurs)
+    duree = time.perf_counter() - debut
+    courante, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del valeurs
+
+    print(f"construction : {len(autocompletion)} valeurs distinctes en {duree:.1f} s "
+          f"(pic {pic / 2**20:.0f} Mio pendant la construction)")
+    memoire = autocompletion.memoire()
+    print("mémoire (Mio) :", {cle: round(val / 2**20, 1) for cle, val in memoire.items() if cle != "valeurs"},
+          f"soit {memoire['total'] / max(1, memoire['valeurs']):.0f} octets par valeur")
+
+    hasard = random.Random(args.graine + 1)
+    latences = []
+    while len(latences) < args.frappes:
+        cible = autocompletion._valeurs[hasard.randrange(len(autocompletion))]
+        for longueur in range(1, len(cible) + 1):
+            debut = time.perf_counter()
+            autocompletion.completer(cible[:longueur], args.n)
+            latences.append(time.perf_counter() - debut)
+
+    quantiles = statistics.quantiles(latences, n=100)
+    print(f"{len(latences)} frappes : p50 {quantiles[49] * 1000:.3f} ms, p99 {quantiles[98] * 1000:.3f} ms, "
+          f"max {max(latences) * 1000:.3f} ms")
@@ -0,0 +1,117 @@
+"""
+Test de concurrence des emprunts : des milliers d'emprunts simultanés du même
+document, d'abord par des threads d'un même processus (verrous en mémoire), puis
+par plusieurs processus qui ne partagent que la base (SELECT ... FOR UPDATE).
+Vérifie qu'un seul emprunt réussit, affiche le débit, puis rend le document.
+tests/test_concurrence.py fait la même vérification, sans MySQL, sur les dépôts
+en mémoire et SQLite.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.concurrence --threads 64 --tentatives 4000 --processus 8 --cote LIV123
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+
+from bibiotheques import Bibliotheques
+from livre import Livre
+
+
+def charger_document(config_db: dict, code: str) -> tuple[Bibliotheques, Livre]:
+    bibio = Bibliotheques(config_db, charger=False)
+    rows = Livre.get(config_db, code)
+    if not rows:
+        raise SystemExit(f"Le livre {code} n'existe pas.")
+    document = Livre.depuis_ligne(config_db, rows[0])
+    bibio.ajout_livre(document)
+    return bibio, document
+
+
+def emprunter(config_db: dict, code: str, nb_threads: int, nb_tentatives: int, depart=None) -> tuple[int, int]:
+    """
+    Lance nb_tentatives emprunts répartis sur nb_threads threads ; renvoie (réussis, refusés).
+    """
+    bibio, document = charger_document(config_db, code)
+    reussis = [0]
+    verrou = threading.Lock()
+    barriere = threading.Barrier(nb_threads)
+
+    def travail(indice: int):
+        locaux = 0
+        barriere.wait()
+        for tentative in range(indice, nb_tentatives, nb_threads):
+            if bibio.ajout_emprunt(f"U{tentative}", document)["status"] == 200:
+                locaux += 1
+        with verrou:
+            reussis[0] += locaux
+
+    if depart is not None:
+        depart.wait()
+    threads = [threading.Thread(target=travail, args=(indice,)) for indice in range(nb_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return reussis[0], nb_tentatives - reussis[0]
+
+
+def _processus(config_db: dict, code: str, nb_threads: int, nb_tentatives: int, depart, resultats) -> None:
+    resultats.put(emprunter(config_db, code, nb_threads, nb_tentatives, depart))
+
+
+def rendre(config_db: dict, code: str) -> None:
+    bibio = Bibliotheques(config_db)
+    for document in bibio.livres:
+        if document.code == code:
+            print("retour :", bibio.fin_emprunt(document._num, document)["message"])
+            return
+
+
+def mesurer(nom: str, lancer, nb_tentatives: int) -> None:
+    debut = time.perf_counter()
+    reussis, refuses = lancer()
+    duree = time.perf_counter() - debut
+    verdict = "OK" if reussis == 1 else "ÉCHEC"
+    print(f"{nom} : {reussis} réussi(s), {refuses} refusé(s), "
+          f"{round(nb_tentatives / duree, 1)} tentatives/s -> {verdict}")
+    if reussis != 1:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="wm7ze*2b")
+    parser.add_argument("--database", default="bu")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--tentatives", type=int, default=4000)
+    parser.add_argument("--processus", type=int, default=8)
+    parser.add_argument("--cote", default="LIV123")
+    args = parser.parse_args()
+
+    config = {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+
+    mesurer("threads", lambda: emprunter(config, args.cote, args.threads, args.tentatives), args.tentatives)
+    rendre(config, args.cote)
+
+    def multi_processus() -> tuple[int, int]:
+        depart = multiprocessing.Barrier(args.processus)
+        resultats = multiprocessing.Queue()
+        par_processus = args.tentatives // args.processus
+        threads = max(1, args.threads // args.processus)
+        processus = [
+            multiprocessing.Process(target=_processus,
+                                    args=(config, args.cote, threads, par_processus, depart, resultats))
+            for _ in range(args.processus)
+        ]
+        for p in processus:
+            p.start()
+        totaux = [resultats.get() for _ in processus]
+        for p in processus:
+            p.join()
+        return sum(r for r, _ in totaux), sum(e for _, e in totaux)
+
+    mesurer("processus", multi_processus, args.tentatives // args.processus * args.processus)
+    rendre(config, args.cote)
@@ -0,0 +1,81 @@
+"""
+Benchmark de la couche applicative sur chaque dépôt sans serveur : mémoire, puis
+SQLite en mémoire. Importe N documents synthétiques, puis mesure le chargement
+de Bibliotheques, une page du catalogue, une page de détail (cache vidé) et des
+cycles emprunt/retour.
+
+Le dépôt mémoire donne le coût de l'application seule ; l'écart avec SQLite est
+le coût du stockage. Aucune base MySQL n'est nécessaire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.depot --documents 100000
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from bibiotheques import Bibliotheques
+from cache import cache_documents
+from import_catalogue import importer
+from livre import Livre
+
+STOCKAGES: dict[str, dict] = {
+    "memoire": {"type": "memoire"},
+    "sqlite": {"type": "sqlite", "chemin": ":memory:"},
+}
+
+
+def latence(fonction, repetitions: int) -> float:
+    """
+    Renvoie la latence médiane de `fonction` en millisecondes.
+    """
+    durees = []
+    for numero in range(repetitions):
+        debut = time.perf_counter()
+        fonction(numero)
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees) * 1000
+
+
+def mesurer(stockage: dict, nb_documents: int, repetitions: int) -> dict[str, float]:
+    config = {"stockage": stockage}
+    resultats = {}
+
+    debut = time.perf_counter()
+    importer(config, ({"code": f"LIV{numero:07d}", "salle": "Salle A", "titre": f"Titre {numero}",
+                       "auteur": "Auteur", "sur_place": "0", "online": "1"} for numero in range(nb_documents)),
+             "livre", taille_lot=1000)
+    resultats["import (s)"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    bibio = Bibliotheques(config)
+    resultats["chargement (s)"] = time.perf_counter() - debut
+
+    resultats["page de 50 (ms)"] = latence(
+        lambda numero: bibio.get_page_document(f"LIV{numero * 97 % nb_documents:07d}", 50), repetitions)
+
+    def detail(numero: int) -> None:
+        cache_documents.invalider(("livre", f"LIV{numero:07d}"))
+        Livre.get(config, f"LIV{numero:07d}")
+    resultats["détail (ms)"] = latence(detail, repetitions)
+
+    def cycle(numero: int) -> None:
+        bibio.ajout_emprunt("000001", f"LIV{numero:07d}")
+        bibio.fin_emprunt("000001", f"LIV{numero:07d}")
+    resultats["emprunt + retour (ms)"] = latence(cycle, repetitions)
+    return resultats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--repetitions", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    resultats = {nom: mesurer(stockage, args.documents, min(args.repetitions, args.documents))
+                 for nom, stockage in STOCKAGES.items()}
+    print(f"{args.documents} livres :")
+    for mesure in resultats["memoire"]:
+        print(f"  {mesure:22} : " + ", ".join(f"{nom} {valeurs[mesure]:8.3f}" for nom, valeurs in resultats.items()))
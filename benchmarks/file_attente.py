@@ -0,0 +1,83 @@
+"""
+Benchmark des files d'attente de réservation : N usagers attendent le même
+document. Mesure ajout, position, annulation au hasard et retrait du premier,
+avec FileAttente (arbre de Fenwick) puis avec une simple liste Python
+(list.index, list.remove, list.pop(0)).
+
+Aucune base n'est nécessaire : seule la structure en mémoire est mesurée.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.file_attente --reservations 10000
+"""
+import argparse
+import random
+import time
+
+from file_attente import FileAttente
+
+
+class FileListe:
+    """
+    File naïve, pour comparaison : chaque opération parcourt la liste.
+    """
+
+    def __init__(self):
+        self._usagers: list[str] = []
+
+    def ajouter(self, num_usager: str, expiration: int) -> int:
+        self._usagers.append(num_usager)
+        return len(self._usagers)
+
+    def position(self, num_usager: str) -> int:
+        return self._usagers.index(num_usager) + 1
+
+    def retirer(self, num_usager: str) -> bool:
+        self._usagers.remove(num_usager)
+        return True
+
+    def premier(self) -> tuple[str, int]:
+        return self._usagers[0], 0
+
+
+def mesurer(file, usagers: list[str], consultes: list[str], annules: list[str]) -> dict[str, float]:
+    durees = {}
+    debut = time.perf_counter()
+    for usager in usagers:
+        file.ajouter(usager, 0)
+    durees["ajout"] = (time.perf_counter() - debut) / len(usagers)
+
+    debut = time.perf_counter()
+    for usager in consultes:
+        file.position(usager)
+    durees["position"] = (time.perf_counter() - debut) / len(consultes)
+
+    debut = time.perf_counter()
+    for usager in annules:
+        file.retirer(usager)
+    durees["annulation"] = (time.perf_counter() - debut) / len(annules)
+
+    restants = len(usagers) - len(annules)
+    debut = time.perf_counter()
+    for _ in range(restants):
+        file.retirer(file.premier()[0])
+    durees["retrait du premier"] = (time.perf_counter() - debut) / restants
+    return durees
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=10_000)
+    parser.add_argument("--graine", type=int, default=7)
+    args = parser.parse_args()
+
+    hasard = random.Random(args.graine)
+    usagers = [f"{numero:06d}" for numero in range(args.reservations)]
+    consultes = hasard.choices(usagers, k=args.reservations)
+    annules = hasard.sample(usagers, args.reservations // 4)
+
+    print(f"{args.reservations} réservations sur un même document (µs par opération) :")
+    resultats = {nom: mesurer(classe(), usagers, consultes, annules)
+                 for nom, classe in (("FileAttente", FileAttente), ("liste", FileListe))}
+    for operation in resultats["FileAttente"]:
+        print(f"  {operation:20} : FileAttente {resultats['FileAttente'][operation] * 1e6:8.2f}, "
+              f"liste {resultats['liste'][operation] * 1e6:8.2f}")
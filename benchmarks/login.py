@@ -0,0 +1,79 @@
+"""
+Latence de Personne.connection en fonction du nombre d'usagers.
+
+Remplit la table Personne par paliers (100, 1 000 ... 1 000 000 usagers de test),
+mesure la latence d'authentification à chaque palier puis supprime les usagers
+créés. Avec l'index unique sur login (schema.py), la latence doit rester stable.
+
+Utilisation (depuis la racine du dépôt, sur une base de test) :
+    python -m benchmarks.login --paliers 100 10000 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from databaseconnection import pooled_connection
+from personne import Personne
+from schema import migrer
+
+# Numéros réservés aux usagers de test, loin des numéros réels
+DEBUT_NUM: int = 900_000_000
+
+
+def remplir(config_db: dict, debut: int, fin: int, taille_lot: int = 5000) -> None:
+    with pooled_connection(config_db) as cnx:
+        with cnx.cursor() as cursor:
+            for lot in range(debut, fin, taille_lot):
+                params = [
+                    (DEBUT_NUM + i, "user", "Bench", "Usager", f"bench{i}", f"mdp{i}")
+                    for i in range(lot, min(lot + taille_lot, fin))
+                ]
+                cursor.executemany(
+                    "INSERT INTO Personne (num, perm, nom, prenom, login, password) VALUES (%s, %s, %s, %s, %s, %s)",
+                    params,
+                )
+                cnx.commit()
+
+
+def nettoyer(config_db: dict) -> None:
+    with pooled_connection(config_db) as cnx:
+        with cnx.cursor() as cursor:
+            cursor.execute("DELETE FROM Personne WHERE num >= %s", (DEBUT_NUM,))
+            cnx.commit()
+
+
+def mesurer(config_db: dict, nb_usagers: int, essais: int) -> dict:
+    latences = []
+    for _ in range(essais):
+        i = random.randrange(nb_usagers)
+        debut = time.perf_counter()
+        assert Personne.connection(config_db, f"bench{i}", f"mdp{i}")
+        latences.append(time.perf_counter() - debut)
+
+    quantiles = statistics.quantiles(latences, n=100)
+    return {"usagers": nb_usagers, "p50 (ms)": round(quantiles[49] * 1000, 3), "p99 (ms)": round(quantiles[98] * 1000, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="wm7ze*2b")
+    parser.add_argument("--database", default="bu")
+    parser.add_argument("--paliers", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--essais", type=int, default=1000)
+    args = parser.parse_args()
+
+    config = {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+
+    print(migrer(config)["message"])
+    nettoyer(config)
+    remplis = 0
+    try:
+        for palier in sorted(args.paliers):
+            remplir(config, remplis, palier)
+            remplis = palier
+            print(mesurer(config, palier, args.essais))
+    finally:
+        nettoyer(config)
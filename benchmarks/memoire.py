@@ -0,0 +1,90 @@
+"""
+Benchmark mémoire des objets Document : construit N livres avec l'ancienne
+représentation (attributs dans __dict__, booléens et dates datetime.date par
+objet) puis avec la représentation actuelle (__slots__, drapeaux dans un champ
+de bits, dates en ordinaux, configuration partagée), et compare les octets par
+document. Les chaînes (cotes, titres, auteurs) sont créées avant la mesure :
+seul le coût propre des objets est compté.
+
+Aucune base n'est nécessaire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.memoire --documents 1000000 --empruntes 0.2
+"""
+import argparse
+import datetime
+import gc
+import random
+import time
+import tracemalloc
+
+from livre import Livre
+
+CONFIG = {"host": "127.0.0.1", "user": "root", "password": "", "database": "bu"}
+
+
+class LivreDict:
+    """
+    Reproduction de la représentation précédente de Livre : un __dict__ par objet.
+    """
+
+    def __init__(self, code: str, salle: str, config_db: dict, titre: str, auteur: str, sur_place: bool = False,
+                 est_reserver: bool = False, online: bool = False, attente: bool = False):
+        self.code = code
+        self._num = "NA"
+        self.salle = salle
+        self._est_reserver = est_reserver
+        self.sur_place = sur_place
+        self.online = online
+        self._attente = attente
+        self._date_fin_emprunt = datetime.datetime(1971, 1, 1).date()
+        self._date_debut_emprunt = datetime.datetime(1971, 1, 1).date()
+        self.config_db = config_db
+        self.title = titre
+        self.auteur = auteur
+
+
+def mesurer(classe: type, lignes: list[tuple], empruntes: list[tuple]) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    debut = time.perf_counter()
+    documents = [classe(code, salle, CONFIG, titre, auteur, sur_place=sur_place, online=online)
+                 for code, salle, titre, auteur, sur_place, online in lignes]
+    # un emprunt en cours : numéro d'usager et dates propres au document
+    for indice, num, date_debut in empruntes:
+        document = documents[indice]
+        document._num = num
+        document._est_reserver = True
+        document._date_debut_emprunt = date_debut
+        document._date_fin_emprunt = date_debut + datetime.timedelta(weeks=2)
+    duree = time.perf_counter() - debut
+    courante, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del documents
+    return courante / len(lignes), duree
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--empruntes", type=float, default=0.2, help="part des documents avec un emprunt en cours")
+    parser.add_argument("--graine", type=int, default=7)
+    args = parser.parse_args()
+
+    hasard = random.Random(args.graine)
+    salles = ["Salle A", "Salle B", "Salle C", "Réserve"]
+    lignes = [(f"LIV{numero:07d}", hasard.choice(salles), f"Titre {numero}", f"Auteur {numero % 50_000}",
+               hasard.random() < 0.1, hasard.random() < 0.5) for numero in range(args.documents)]
+    aujourdhui = datetime.date.today()
+    empruntes = [(indice, str(hasard.randrange(1, 10_000)), aujourdhui - datetime.timedelta(days=hasard.randrange(14)))
+                 for indice in hasard.sample(range(args.documents), int(args.documents * args.empruntes))]
+
+    resultats = {}
+    for nom, classe in (("avant (__dict__)", LivreDict), ("après (__slots__)", Livre)):
+        octets, duree = mesurer(classe, lignes, empruntes)
+        resultats[nom] = octets
+        print(f"{nom:18} : {octets:6.1f} octets par document, {octets * args.documents / 2**20:6.1f} Mio "
+              f"pour {args.documents} documents (construction {duree:.1f} s)")
+
+    avant, apres = resultats.values()
+    print(f"gain : {avant - apres:.1f} octets par document ({(1 - apres / avant) * 100:.0f} %)")
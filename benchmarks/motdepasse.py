@@ -0,0 +1,61 @@
+"""
+Benchmark du hachage des mots de passe : connexions vérifiées par seconde pour
+plusieurs réglages de coût (scrypt n, PBKDF2 itérations), avec un seul worker
+puis avec un worker par cœur.
+
+Aucune base n'est nécessaire : seule la vérification (Hacheur.verifier) est
+mesurée, c'est-à-dire le coût CPU ajouté à chaque connexion. Permet de choisir
+les paramètres de config["motdepasse"] pour la machine cible.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.motdepasse --connexions 64
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from motdepasse import Hacheur
+
+REGLAGES: list[dict] = [
+    {"algorithme": "scrypt", "n": 2 ** 13},
+    {"algorithme": "scrypt", "n": 2 ** 14},
+    {"algorithme": "scrypt", "n": 2 ** 15},
+    {"algorithme": "pbkdf2-sha256", "iterations": 100_000},
+    {"algorithme": "pbkdf2-sha256", "iterations": 600_000},
+]
+
+
+def mesurer(reglage: dict, workers: int, connexions: int) -> tuple[float, float]:
+    """
+    Renvoie (connexions par seconde, latence moyenne en ms) pour `connexions`
+    vérifications envoyées en même temps par autant de clients.
+    """
+    hacheur = Hacheur(workers=workers, **reglage)
+    empreinte = hacheur.hacher("mdp123")
+    with ThreadPoolExecutor(max_workers=connexions) as clients:
+        debut = time.perf_counter()
+        latences = list(clients.map(lambda _: chronometrer(hacheur, empreinte), range(connexions)))
+        duree = time.perf_counter() - debut
+    return connexions / duree, sum(latences) / len(latences) * 1000
+
+
+def chronometrer(hacheur: Hacheur, empreinte: str) -> float:
+    debut = time.perf_counter()
+    assert hacheur.verifier("mdp123", empreinte)
+    return time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connexions", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{args.connexions} connexions simultanées, 1 worker puis {args.workers} workers :")
+    for reglage in REGLAGES:
+        nom = ", ".join(f"{cle}={valeur}" for cle, valeur in reglage.items())
+        seul, latence_seul = mesurer(reglage, 1, args.connexions)
+        pool, latence_pool = mesurer(reglage, args.workers, args.connexions)
+        print(f"  {nom:36} : {seul:7.1f} connexions/s ({latence_seul:7.1f} ms), "
+              f"{pool:7.1f} connexions/s ({latence_pool:7.1f} ms), {pool / args.workers:6.1f} /s par cœur")
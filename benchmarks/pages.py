@@ -0,0 +1,93 @@
+"""
+Benchmark de la page d'accueil avec le cache des pages (fragments.py) : coût d'une
+page rendue entièrement (lecture de la page du catalogue et gabarits), d'une page
+dont le fragment du catalogue est en cache (nouveau login : seul le bandeau est
+rendu) et d'une page entière en cache, non compressée ou compressée.
+
+Les gabarits de templates/ sont rendus avec Jinja, comme par main.py, sur un dépôt
+en mémoire : aucune base n'est nécessaire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.pages --documents 100000
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from bibiotheques import Bibliotheques
+from fragments import brotli, cache_pages
+from import_catalogue import importer
+
+CONFIG: dict = {"stockage": {"type": "memoire"}}
+
+
+def latence(fonction, repetitions: int) -> float:
+    """
+    Renvoie la latence médiane de `fonction` en microsecondes.
+    """
+    durees = []
+    for numero in range(repetitions):
+        debut = time.perf_counter()
+        fonction(numero)
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees) * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repetitions", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    importer(CONFIG, ({"code": f"LIV{numero:07d}", "salle": "Salle A", "titre": f"Titre {numero}",
+                      "auteur": "Auteur", "sur_place": "0", "online": "1"} for numero in range(args.documents)),
+             "livre", taille_lot=1000)
+    bibio = Bibliotheques(CONFIG, charger=False)
+    env = Environment(loader=FileSystemLoader("templates"), autoescape=select_autoescape())
+    limit = args.limit
+
+    def rendre_catalogue() -> str:
+        datas = bibio.get_page_document(None, limit)
+        return env.get_template("catalogue.html").render(livres=datas["livre"], journals=datas["journal"],
+                                                         dvds=datas["dvd"], suivant=datas["suivant"], limit=limit)
+
+    def rendre_page(catalogue, login: str | None) -> str:
+        return env.get_template("index.html").render(catalogue=catalogue, login=login, nom=None)
+
+    def complet(_: int) -> None:
+        cache_pages.vider()
+        rendre_page(cache_pages.garder_fragment(("catalogue", None, limit), rendre_catalogue()), None)
+
+    def fragment(numero: int) -> None:
+        # un login différent à chaque fois : le corps n'est jamais en cache
+        login = f"usager{numero}"
+        cache_pages.garder_corps(("index", None, limit, login),
+                                 rendre_page(cache_pages.fragment(("catalogue", None, limit)), login))
+
+    def corps(encodage: str | None):
+        return lambda _: cache_pages.corps(("index", None, limit, None)).encoder(encodage)
+
+    resultats = {"rendu complet": latence(complet, args.repetitions)}
+    cache_pages.vider()
+    cache_pages.garder_fragment(("catalogue", None, limit), rendre_catalogue())
+    resultats["fragment en cache"] = latence(fragment, args.repetitions)
+    page = cache_pages.garder_corps(("index", None, limit, None), rendre_page(
+        cache_pages.fragment(("catalogue", None, limit)), None))
+    encodages = [None, "gzip"] + (["br"] if brotli is not None else [])
+    for encodage in encodages:
+        page.encoder(encodage)
+        resultats[f"corps en cache ({encodage or 'identité'})"] = latence(corps(encodage), args.repetitions)
+
+    print(f"Page d'accueil, {limit} documents parmi {args.documents} :")
+    for mesure, micro in resultats.items():
+        print(f"  {mesure:28} : {micro:9.1f} µs ({1_000_000 / micro:10,.0f} pages/s)")
+    print("Taille du corps :")
+    for encodage in encodages:
+        print(f"  {encodage or 'identité':8} : {len(page.encoder(encodage)):7d} octets")
+    if brotli is None:
+        print("  (brotli non installé : pip install brotli)")
@@ -0,0 +1,104 @@
+"""
+Stress test du pool de connexions : plusieurs threads appellent Livre.get en
+boucle, une fois avec une connexion neuve par requête (ancien comportement) et
+une fois à travers le pool. Affiche la latence p50/p99 et le nombre de
+connexions ouvertes côté serveur.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.pool --threads 32 --requetes 200 --cote LIV123
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import mysql.connector
+
+from databaseconnection import get_pool
+from livre import Livre
+
+
+def get_sans_pool(config_db: dict, code: str) -> list[tuple]:
+    # Reproduit l'ancien Livre.get : une connexion par appel, jamais fermée
+    cnx = mysql.connector.connect(**config_db)
+
+    if cnx.is_connected():
+        with cnx.cursor() as cursor:
+            cursor.execute("SELECT * FROM Livre WHERE code = %s", (code,))
+            return cursor.fetchall()
+
+
+def connexions_ouvertes(config_db: dict) -> int:
+    try:
+        cnx = mysql.connector.connect(**config_db)
+    except mysql.connector.Error:
+        return -1
+    try:
+        with cnx.cursor() as cursor:
+            cursor.execute("SHOW STATUS LIKE 'Threads_connected'")
+            return int(cursor.fetchone()[1]) - 1
+    finally:
+        cnx.close()
+
+
+def marteler(fonction, config_db: dict, code: str, nb_threads: int, nb_requetes: int) -> dict:
+    latences: list[float] = []
+    verrou = threading.Lock()
+    pic = [0]
+    depart = threading.Barrier(nb_threads + 1)
+
+    def travail():
+        locales = []
+        depart.wait()
+        for _ in range(nb_requetes):
+            debut = time.perf_counter()
+            fonction(config_db, code)
+            locales.append(time.perf_counter() - debut)
+        with verrou:
+            latences.extend(locales)
+
+    def surveiller(stop: threading.Event):
+        while not stop.wait(0.2):
+            pic[0] = max(pic[0], connexions_ouvertes(config_db))
+
+    threads = [threading.Thread(target=travail) for _ in range(nb_threads)]
+    for thread in threads:
+        thread.start()
+
+    stop = threading.Event()
+    sonde = threading.Thread(target=surveiller, args=(stop,))
+    sonde.start()
+
+    debut = time.perf_counter()
+    depart.wait()
+    for thread in threads:
+        thread.join()
+    duree = time.perf_counter() - debut
+    stop.set()
+    sonde.join()
+
+    quantiles = statistics.quantiles(latences, n=100)
+    return {
+        "requetes/s": round(len(latences) / duree, 1),
+        "p50 (ms)": round(quantiles[49] * 1000, 2),
+        "p99 (ms)": round(quantiles[98] * 1000, 2),
+        "connexions (pic)": pic[0],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="wm7ze*2b")
+    parser.add_argument("--database", default="bu")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requetes", type=int, default=200)
+    parser.add_argument("--cote", default="LIV123")
+    args = parser.parse_args()
+
+    config = {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+
+    print("sans pool :", marteler(get_sans_pool, config, args.cote, args.threads, args.requetes))
+    print("avec pool :", marteler(Livre.get, config, args.cote, args.threads, args.requetes))
+    print("état du pool :", get_pool(config).stats())
@@ -0,0 +1,94 @@
+"""
+Benchmark des lignes de la page d'accueil et du profil (/user) : octets transférés
+et lignes décodées par seconde, SELECT * contre projection explicite (depot.PROJECTIONS).
+
+Les octets sont ceux du protocole texte de MySQL (4 octets d'en-tête par ligne,
+chaque valeur précédée de sa longueur, 1 octet pour NULL), calculés sur les
+lignes réellement lues. Le décodage compare trois représentations d'une même
+lecture : tuple brut, NamedTuple (lignes.py) et dict, avec leur taille en mémoire.
+
+Aucune base MySQL n'est nécessaire : les lignes sont lues dans un dépôt SQLite en mémoire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.projections --documents 100000
+"""
+import argparse
+import logging
+import sys
+import time
+
+from depot import PROJECTIONS, get_depot
+from import_catalogue import importer
+from lignes import LigneLivre
+from personne import Personne
+
+CONFIG: dict = {"stockage": {"type": "sqlite", "chemin": ":memory:"}, "motdepasse": {"n": 1024}}
+
+
+def octets(rows: list[tuple]) -> int:
+    """
+    Renvoie la taille des lignes dans le protocole texte de MySQL.
+    """
+    total = 0
+    for row in rows:
+        total += 4
+        for valeur in row:
+            if valeur is None:
+                total += 1
+            else:
+                taille = len(str(valeur).encode())
+                total += taille + (1 if taille < 251 else 3)
+    return total
+
+
+def lire(requete: str, params: tuple = ()) -> list[tuple]:
+    with get_depot(CONFIG)._connexion() as cnx:
+        with cnx.cursor() as cursor:
+            cursor.execute(requete, params)
+            return cursor.fetchall()
+
+
+def debit(requete: str, decoder) -> float:
+    """
+    Renvoie le nombre de lignes lues et décodées par seconde (lecture du curseur comprise).
+    """
+    debut = time.perf_counter()
+    rows = decoder(lire(requete))
+    return len(rows) / (time.perf_counter() - debut)
+
+
+def taille(ligne) -> int:
+    return sys.getsizeof(ligne) + (sys.getsizeof(ligne.__dict__) if hasattr(ligne, "__dict__") else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    importer(CONFIG, ({"code": f"LIV{numero:07d}", "salle": "Salle A", "titre": f"Titre {numero}",
+                      "auteur": "Auteur", "sur_place": "0", "online": "1"} for numero in range(args.documents)),
+             "livre", taille_lot=1000)
+    Personne("000001", "user", "Dupont", "Jean", "jean.dupont", "mdp123", CONFIG).create()
+
+    page_etoile = lire("SELECT * FROM Livre WHERE code > %s ORDER BY code LIMIT %s", ("", args.page))
+    page = lire(f"SELECT {PROJECTIONS['Livre']} FROM Livre WHERE code > %s ORDER BY code LIMIT %s", ("", args.page))
+    profil_etoile = lire("SELECT * FROM Personne WHERE num = %s", ("000001",))
+    profil = lire(f"SELECT {PROJECTIONS['Profil']} FROM Personne WHERE num = %s", ("000001",))
+    print("Octets transférés (protocole texte MySQL) :")
+    libelle = f"page d'accueil ({args.page} livres)"
+    print(f"  {libelle:28} : SELECT * {octets(page_etoile):7d}, projection {octets(page):7d}")
+    print(f"  {'profil (/user)':28} : SELECT * {octets(profil_etoile):7d}, projection {octets(profil):7d}")
+
+    requete = f"SELECT {PROJECTIONS['Livre']} FROM Livre"
+    exemple = page[0]
+    colonnes = LigneLivre._fields
+    print(f"Lecture de {args.documents} livres (lignes/s, octets par ligne en mémoire) :")
+    for nom, decoder, ligne in (
+        ("tuple", lambda rows: rows, exemple),
+        ("NamedTuple", lambda rows: list(map(LigneLivre._make, rows)), LigneLivre._make(exemple)),
+        ("dict", lambda rows: [dict(zip(colonnes, row)) for row in rows], dict(zip(colonnes, exemple))),
+    ):
+        print(f"  {nom:10} : {debit(requete, decoder):12,.0f} lignes/s, {taille(ligne):4d} octets")
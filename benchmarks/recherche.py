@@ -0,0 +1,83 @@
+"""
+Benchmark de la recherche plein texte : construit un index de N documents
+synthétiques (vocabulaire à distribution de Zipf, comme des titres réels), puis
+mesure la latence p50/p99 des requêtes top-k, mots complets et préfixes.
+
+Aucune base n'est nécessaire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.recherche --documents 1000000 --requetes 2000 --k 10
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+import tracemalloc
+
+from recherche import IndexRecherche
+
+SYLLABES = ["ba", "ri", "lo", "ne", "tu", "ma", "che", "vil", "mon", "pra", "dor", "gue", "li", "sa", "ter", "on"]
+
+
+def vocabulaire(taille: int, graine: int) -> list[str]:
+    hasard = random.Random(graine)
+    mots = set()
+    while len(mots) < taille:
+        mots.add("".join(hasard.choice(SYLLABES) for _ in range(hasard.randint(2, 4))))
+    return sorted(mots)
+
+
+def generer(index: IndexRecherche, nb_documents: int, mots: list[str], graine: int) -> None:
+    hasard = random.Random(graine)
+    cumul = list(itertools.accumulate(1 / rang for rang in range(1, len(mots) + 1)))
+    for numero in range(nb_documents):
+        titre = hasard.choices(mots, cum_weights=cumul, k=hasard.randint(2, 6))
+        auteur = hasard.choices(mots, cum_weights=cumul, k=2)
+        index.ajouter(f"LIV{numero:07d}", "livre", " ".join(titre + auteur))
+
+
+def mesurer(index: IndexRecherche, requetes: list[str], k: int) -> dict:
+    # premier passage : calcul paresseux des listes d'impact
+    for requete in requetes:
+        index.rechercher(requete, k)
+    latences = []
+    for requete in requetes:
+        debut = time.perf_counter()
+        index.rechercher(requete, k)
+        latences.append(time.perf_counter() - debut)
+    quantiles = statistics.quantiles(latences, n=100)
+    return {"p50 (ms)": round(quantiles[49] * 1000, 3), "p99 (ms)": round(quantiles[98] * 1000, 3),
+            "max (ms)": round(max(latences) * 1000, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--vocabulaire", type=int, default=50_000)
+    parser.add_argument("--requetes", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+
+    mots = vocabulaire(args.vocabulaire, args.graine)
+    index = IndexRecherche()
+
+    tracemalloc.start()
+    debut = time.perf_counter()
+    generer(index, args.documents, mots, args.graine)
+    duree = time.perf_counter() - debut
+    memoire = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"construction : {len(index)} documents en {duree:.1f} s, {memoire / 2**20:.0f} Mio")
+
+    hasard = random.Random(args.graine + 1)
+    frequents, rares = mots[:200], mots
+    jeux = {
+        "1 mot fréquent": [hasard.choice(frequents) + " " for _ in range(args.requetes)],
+        "2 mots": [f"{hasard.choice(frequents)} {hasard.choice(rares)} " for _ in range(args.requetes)],
+        "préfixe": [hasard.choice(rares)[:3] for _ in range(args.requetes)],
+        "mot + préfixe": [f"{hasard.choice(frequents)} {hasard.choice(rares)[:4]}" for _ in range(args.requetes)],
+    }
+    for nom, requetes in jeux.items():
+        print(f"{nom:15}", mesurer(index, requetes, args.k))
@@ -0,0 +1,81 @@
+"""
+Benchmark de la détection des retards : N emprunts en cours dont les dates de fin
+sont réparties sur plusieurs semaines. Mesure la construction du tas, le coût d'une
+notification d'emprunt et la latence de en_retard pour des dates croissantes (k
+retards parmi N), comparée à un parcours complet de Bibliotheques.livres.
+
+Aucune base n'est nécessaire : les emprunts sont posés directement en mémoire.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.retards --emprunts 1000000
+"""
+import argparse
+import datetime
+import logging
+import random
+import statistics
+import time
+
+from bibiotheques import Bibliotheques
+from document import Document
+from lignes import LigneLivre
+from livre import Livre
+from retards import MoteurRetards
+from statuemprunt import StatuEmprunt
+
+CONFIG = {"host": "127.0.0.1", "user": "root", "password": "", "database": "bu", "connection_timeout": 1}
+
+
+def remplir(bibio: Bibliotheques, nb_emprunts: int, aujourdhui: datetime.date, hasard: random.Random) -> None:
+    for numero in range(nb_emprunts):
+        document = Livre.depuis_ligne(CONFIG, LigneLivre(
+            f"LIV{numero:07d}", "Salle A", f"Titre {numero}", "Auteur", 0, 1, None, None))
+        bibio.ajout_livre(document)
+        document._num = str(hasard.randrange(1, 10_000))
+        document._est_reserver = True
+        # emprunts de deux semaines commencés dans les 60 derniers jours : les trois quarts sont en retard
+        document._date_debut_emprunt = aujourdhui - datetime.timedelta(days=hasard.randrange(60))
+        document._date_fin_emprunt = document._date_debut_emprunt + datetime.timedelta(weeks=2)
+        bibio.livres[document] = StatuEmprunt.Reserver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emprunts", type=int, default=1_000_000)
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--graine", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    hasard = random.Random(args.graine)
+    aujourdhui = datetime.date.today()
+    bibio = Bibliotheques(CONFIG, charger=False)
+    remplir(bibio, args.emprunts, aujourdhui, hasard)
+
+    debut = time.perf_counter()
+    moteur = MoteurRetards(bibio)
+    print(f"construction du tas : {len(moteur)} emprunts en {time.perf_counter() - debut:.2f} s")
+
+    # notification d'un emprunt prolongé : une entrée de plus dans le tas
+    codes = [f"LIV{hasard.randrange(args.emprunts):07d}" for _ in range(10_000)]
+    debut = time.perf_counter()
+    for code in codes:
+        document = bibio.document(code)
+        document._date_fin_emprunt += datetime.timedelta(days=7)
+        Document.notifier("emprunt", "livre", code)
+    print(f"notification : {(time.perf_counter() - debut) / len(codes) * 1e6:.1f} µs par emprunt")
+
+    for decalage in (-45, -44, -42, -35, -20, 0):
+        jour = aujourdhui + datetime.timedelta(days=decalage)
+        latences = []
+        for _ in range(args.repetitions):
+            debut = time.perf_counter()
+            retards = moteur.en_retard(jour)
+            latences.append(time.perf_counter() - debut)
+        print(f"en_retard({jour}) : k = {len(retards):7d}, médiane {statistics.median(latences) * 1000:8.3f} ms")
+
+    debut = time.perf_counter()
+    limite = aujourdhui
+    parcours = [document for document, statut in bibio.livres.items()
+                if statut == StatuEmprunt.Reserver and document._date_fin_emprunt < limite]
+    print(f"parcours complet de livres : k = {len(parcours):7d}, {(time.perf_counter() - debut) * 1000:8.3f} ms")
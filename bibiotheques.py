@@ -1,8 +1,21 @@
-from document import Document
+import datetime
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from depot import get_depot
+from lignes import LIGNES
+from document import Document, LIMITE_MAX
 from livre import Livre
 from dvd import Dvd
 from journal import Journal
 from statuemprunt import StatuEmprunt
+from emprunt import Emprunt
+from verrous import verrous_documents
+from index_cotes import DOCUMENTS, index_cotes
+from recherche import index_recherche
+
+logger = logging.getLogger(__name__)
+
 
 class Bibliotheques:
     """
@@ -13,16 +26,26 @@ class Bibliotheques:
     Attributs :
     ----------
     livres : dict
-        Dictionnaire associant un document (Livre, Dvd, Journal) à son statut d'emprunt.
+        Dictionnaire associant un document (Livre, Dvd, Journal) à son statut d'emprunt. Cache
+        de la table Emprunt, où chaque changement de statut est écrit avant d'être confirmé.
+        Les documents sont égaux et hachés selon leur cote : tout objet de même cote retrouve
+        son statut.
 
     Méthodes :
     ---------
-    __init__() -> None:
-        Initialise la bibliothèque avec un dictionnaire vide pour stocker les documents.
+    __init__(config_db: dict, charger: bool = True) -> None:
+        Initialise la bibliothèque et charge ses documents depuis la base.
+
+    charger() -> dict:
+        Reconstruit le dictionnaire des documents et de leur statut à partir des tables de
+        documents et de la table Emprunt.
 
     check_exist(document: Document | Livre | Dvd | Journal) -> bool:
         Vérifie si un document existe déjà dans la bibliothèque.
 
+    document(code: str) -> Document | None:
+        Renvoie en O(1) le document de la bibliothèque qui porte la cote.
+
     consulter() -> dict:
         Permet de consulter les documents présents dans la bibliothèque.
 
@@ -43,14 +66,88 @@ class Bibliotheques:
 
     ajout_en_attente_verif(document: Document | Livre | Dvd | Journal = None) -> dict:
         Ajoute un document à la bibliothèque en attente de vérification.
+
+    fin_attente(document: Document | Livre | Dvd | Journal | str = None) -> dict:
+        Libère un document mis en attente qui n'a pas été emprunté.
+
+    ajout_emprunts(emprunts: list[tuple[str, Document]]) -> dict:
+        Enregistre un lot d'emprunts en une seule transaction.
+
+    fin_emprunts(retours: list[tuple[str, Document]]) -> dict:
+        Enregistre un lot de retours en une seule transaction.
+
+    Les opérations de circulation acceptent un document ou directement sa cote ; elles
+    s'appliquent toujours à l'objet tenu par la bibliothèque.
     """
 
-    def __init__(self, config_db: dict) -> None:
+    def __init__(self, config_db: dict, charger: bool = True) -> None:
         """
         Initialise la bibliothèque avec un dictionnaire vide pour stocker les documents.
+
+        Si `charger` est vrai, le dictionnaire est rempli à partir de la base (voir charger).
         """
         self.livres: dict[Document | Livre | Dvd | Journal, StatuEmprunt] = {}
+        # cote -> document de self.livres
+        self._par_code: dict[str, Document] = {}
         self._config_db: dict = config_db
+        self._executor: ThreadPoolExecutor | None = None
+
+        # Index cote -> type de document, pour répondre à get_document en une requête
+        index_cotes.assurer(config_db)
+
+        if charger:
+            self.charger()
+
+    def charger(self) -> dict:
+        """
+        Reconstruit le dictionnaire des documents et de leur statut à partir de la base.
+
+        La table Emprunt est la source de vérité de l'état des emprunts : self.livres n'en
+        est qu'un cache, reconstruit au démarrage de chaque processus.
+
+        Retourne:
+        ---------
+        dict
+            Un message indiquant le nombre de documents chargés et un statut.
+        """
+        livres: dict[Document | Livre | Dvd | Journal, StatuEmprunt] = {}
+        par_code: dict[str, Document] = {}
+
+        for classe in DOCUMENTS.values():
+            for row in classe.iter_all(self._config_db):
+                document = classe.depuis_ligne(self._config_db, row)
+                livres[document] = StatuEmprunt.Libre
+                par_code[document.code] = document
+
+        emprunts = Emprunt.get_all(self._config_db)
+        if emprunts is None:
+            return {"message": "L'état des emprunts n'a pas pu être chargé.", "status": 500}
+
+        for emprunt in emprunts:
+            document = par_code.get(emprunt.code)
+            if document is not None:
+                livres[document] = self._appliquer_emprunt(document, emprunt)
+
+        self.livres = livres
+        self._par_code = par_code
+        return {
+            "message": f"{len(livres)} document(s) chargé(s), dont {len(emprunts)} non libre(s).",
+            "status": 200
+        }
+
+    @staticmethod
+    def _appliquer_emprunt(document: Document, emprunt: tuple) -> StatuEmprunt:
+        """
+        Recopie sur le document une ligne de la table Emprunt et renvoie son statut.
+        """
+        _, _, num_usager, statut, debut, fin, _ = emprunt
+        statut = StatuEmprunt[statut]
+        document._num = num_usager or "NA"
+        document._est_reserver = statut in (StatuEmprunt.Reserver, StatuEmprunt.Non_Rendue)
+        document._attente = statut == StatuEmprunt.En_Attente
+        document._date_debut_emprunt = debut or document._date_debut_emprunt
+        document._date_fin_emprunt = fin or document._date_fin_emprunt
+        return statut
 
     def check_exist(self, document: Document | Livre | Dvd | Journal) -> bool:
         """
@@ -68,6 +165,22 @@ class Bibliotheques:
         """
         return self.livres.get(document, "NA") != "NA"
 
+    def document(self, code: str) -> Document | Livre | Dvd | Journal | None:
+        """
+        Renvoie le document de la bibliothèque qui porte la cote, sans requête.
+
+        Paramètres:
+        -----------
+        code : str
+            La cote du document.
+
+        Retourne:
+        ---------
+        Document | Livre | Dvd | Journal | None
+            Le document, ou None si la cote n'est pas dans la bibliothèque.
+        """
+        return self._par_code.get(code)
+
     def consulter(self) -> dict[Document | Livre | Dvd | Journal, StatuEmprunt]:
         """
         Consulte les documents dans la bibliothèque.
@@ -100,13 +213,15 @@ class Bibliotheques:
             }
 
         self.livres.setdefault(document, StatuEmprunt.Libre)
+        self._par_code.setdefault(document.code, document)
 
         return {
             "message": f"Le document dont le code est {document.code} a été ajouté à la bibliothèque.",
             "status": 200
         }
 
-    def ajout_en_attente_verif(self, num_usager: str, document: Document | Livre | Dvd | Journal = None) -> dict:
+    def ajout_en_attente_verif(self, num_usager: str, document: Document | Livre | Dvd | Journal | str = None,
+                               date_fin: datetime.date | None = None) -> dict:
         """
         Ajoute un document à la bibliothèque en attente de vérification.
 
@@ -116,8 +231,10 @@ class Bibliotheques:
 
         Paramètres:
         -----------
-        document : Document | Livre | Dvd | Journal, optionnel
-            Le document à ajouter à la bibliothèque.
+        document : Document | Livre | Dvd | Journal | str, optionnel
+            Le document (ou sa cote) à ajouter à la bibliothèque.
+        date_fin : datetime.date | None, optionnel
+            La date jusqu'à laquelle le document reste mis de côté (voir Document.mise_en_attente).
 
         Retourne:
         ---------
@@ -125,27 +242,25 @@ class Bibliotheques:
             Un dictionnaire contenant un message indiquant si le document a été ajouté à la liste
             d'attente pour vérification ou s'il est déjà présent dans un statut incompatible.
         """
-        if document and not self.check_exist(document):
-            return {
-                "message": f"Le document dont le code est {document.code} n'existe pas dans la bibliothèque.",
-                "status": 500
-            }
+        return self._traiter_lot(
+            [(num_usager, document)], lambda num, doc: self._mettre_en_attente(num, doc, date_fin)
+        )["resultats"][0]
 
-        if self.livres.get(document) == StatuEmprunt.Libre:
-            retour_document: dict = document.mise_en_attente(num_usager)
-
-            if retour_document.get("status") == 200:
-                self.livres.setdefault(document, StatuEmprunt.En_Attente)
-                return {
-                    "message": f"Le document {document.code} a été mis en attente de vérification.",
-                    "status": 200
-                }
+    def fin_attente(self, document: Document | Livre | Dvd | Journal | str = None) -> dict:
+        """
+        Libère un document mis en attente qui n'a pas été emprunté : il redevient disponible.
 
+        Paramètres:
+        -----------
+        document : Document | Livre | Dvd | Journal | str, optionnel
+            Le document (ou sa cote) à libérer.
 
-        return {
-            "message": f"Le document {document.code} n'a pas été mis en attente de vérification.",
-            "status": 500
-        }
+        Retourne:
+        ---------
+        dict
+            Un message indiquant si le document a été libéré ou s'il n'était pas en attente.
+        """
+        return self._traiter_lot([(None, document)], lambda _, doc: self._liberer(doc))["resultats"][0]
 
 
     def supprimer_livre(self, document: Document | Livre | Dvd | Journal = None) -> dict:
@@ -175,7 +290,7 @@ class Bibliotheques:
             "status": 200
         }
 
-    def ajout_emprunt(self, num_usager: str, document: Document | Livre | Dvd | Journal = None) -> dict:
+    def ajout_emprunt(self, num_usager: str, document: Document | Livre | Dvd | Journal | str = None) -> dict:
         """
         Enregistre l'emprunt d'un document par un usager.
 
@@ -183,14 +298,55 @@ class Bibliotheques:
         -----------
         num_usager : str
             Le numéro de l'usager effectuant l'emprunt.
-        document : Document | Livre | Dvd | Journal, optionnel
-            Le document à emprunter.
+        document : Document | Livre | Dvd | Journal | str, optionnel
+            Le document (ou sa cote) à emprunter.
 
         Retourne:
         ---------
         dict
             Un message indiquant si l'emprunt a été effectué ou s'il a échoué.
         """
+        return self._traiter_lot([(num_usager, document)], self._emprunter)["resultats"][0]
+
+    def ajout_non_rendue(self, document: Document | Livre | Dvd | Journal | str = None) -> dict:
+        """
+        Marque un document comme non rendu après un emprunt.
+
+        Paramètres:
+        -----------
+        document : Document | Livre | Dvd | Journal | str, optionnel
+            Le document (ou sa cote) à marquer comme non rendu.
+
+        Retourne:
+        ---------
+        dict
+            Un message indiquant si l'opération a réussi ou échoué.
+        """
+        return self._traiter_lot([(None, document)], lambda _, doc: self._marquer_non_rendu(doc))["resultats"][0]
+
+    def fin_emprunt(self, num_usager: str, document: Document | Livre | Dvd | Journal | str = None) -> dict:
+        """
+        Marque la fin d'un emprunt et met à jour le statut d'un document.
+
+        Paramètres:
+        -----------
+        num_usager : str
+            Le numéro de l'usager ayant emprunté le document.
+        document : Document | Livre | Dvd | Journal | str, optionnel
+            Le document (ou sa cote) à rendre.
+
+        Retourne:
+        ---------
+        dict
+            Un message indiquant si le document a été rendu ou s'il y a eu une erreur.
+        """
+        return self._traiter_lot([(num_usager, document)], self._rendre)["resultats"][0]
+
+    def _mettre_en_attente(self, num_usager: str, document: Document | Livre | Dvd | Journal = None,
+                           date_fin: datetime.date | None = None) -> dict:
+        """
+        Met un document en attente de vérification, en mémoire seulement.
+        """
         if document and not self.check_exist(document):
             return {
                 "message": f"Le document dont le code est {document.code} n'existe pas dans la bibliothèque.",
@@ -198,9 +354,37 @@ class Bibliotheques:
             }
 
         if self.livres.get(document) == StatuEmprunt.Libre:
+            retour_document: dict = document.mise_en_attente(num_usager, date_fin)
+
+            if retour_document.get("status") == 200:
+                self.livres[document] = StatuEmprunt.En_Attente
+                return {
+                    "message": f"Le document {document.code} a été mis en attente de vérification.",
+                    "status": 200
+                }
+
+
+        return {
+            "message": f"Le document {document.code} n'a pas été mis en attente de vérification.",
+            "status": 500
+        }
+
+    def _emprunter(self, num_usager: str, document: Document | Livre | Dvd | Journal = None) -> dict:
+        """
+        Emprunte un document, en mémoire seulement.
+        """
+        if document and not self.check_exist(document):
+            return {
+                "message": f"Le document dont le code est {document.code} n'existe pas dans la bibliothèque.",
+                "status": 500
+            }
+
+        statut = self.livres.get(document)
+        # un document mis de côté (file d'attente) ne peut être emprunté que par son usager
+        if statut == StatuEmprunt.Libre or (statut == StatuEmprunt.En_Attente and document._num == num_usager):
             retour_document = document.reserver_emprunt(num_usager)
             if retour_document.get("status") == 200:
-                self.livres[document] = StatuEmprunt.Non_Rendue
+                self.livres[document] = StatuEmprunt.Reserver
                 return {
                     "message": f"Le document {document.code} a été emprunté.",
                     "status": 200
@@ -216,19 +400,9 @@ class Bibliotheques:
             "status": 500
         }
 
-    def ajout_non_rendue(self, document: Document | Livre | Dvd | Journal = None) -> dict:
+    def _marquer_non_rendu(self, document: Document | Livre | Dvd | Journal = None) -> dict:
         """
-        Marque un document comme non rendu après un emprunt.
-
-        Paramètres:
-        -----------
-        document : Document | Livre | Dvd | Journal, optionnel
-            Le document à marquer comme non rendu.
-
-        Retourne:
-        ---------
-        dict
-            Un message indiquant si l'opération a réussi ou échoué.
+        Marque un document comme non rendu, en mémoire seulement.
         """
         if document and not self.check_exist(document):
             return {
@@ -236,36 +410,46 @@ class Bibliotheques:
                 "status": 500
             }
 
-        if self.livres.get(document) == StatuEmprunt.Reserver:
+        if self.livres.get(document) not in (StatuEmprunt.Reserver, StatuEmprunt.Non_Rendue):
             return {
-                "message": f"Le document {document.code} a été emprunté.",
-                "status": 200
+                "message": f"Le document {document.code} n'est pas emprunté.",
+                "status": 500
             }
 
-        self.livres.setdefault(document, StatuEmprunt.Non_Rendue)
+        self.livres[document] = StatuEmprunt.Non_Rendue
 
         return {
             "message": f"Le document {document.code} a été marqué comme non rendu.",
             "status": 200
         }
 
-    def fin_emprunt(self, num_usager: str, document: Document | Livre | Dvd | Journal = None) -> dict:
+    def _liberer(self, document: Document | Livre | Dvd | Journal = None) -> dict:
         """
-        Marque la fin d'un emprunt et met à jour le statut d'un document.
+        Libère un document mis en attente, en mémoire seulement.
+        """
+        if self.livres.get(document) != StatuEmprunt.En_Attente:
+            return {
+                "message": f"Le document {document.code} n'est pas en attente.",
+                "status": 500
+            }
 
-        Paramètres:
-        -----------
-        num_usager : str
-            Le numéro de l'usager ayant emprunté le document.
-        document : Document | Livre | Dvd | Journal, optionnel
-            Le document à rendre.
+        if document.fin_attente().get("status") != 200:
+            return {
+                "message": f"La libération du document {document.code} a échoué.",
+                "status": 500
+            }
 
-        Retourne:
-        ---------
-        dict
-            Un message indiquant si le document a été rendu ou s'il y a eu une erreur.
+        self.livres[document] = StatuEmprunt.Libre
+        return {
+            "message": f"Le document {document.code} n'est plus en attente et est maintenant disponible.",
+            "status": 200
+        }
+
+    def _rendre(self, num_usager: str, document: Document | Livre | Dvd | Journal = None) -> dict:
+        """
+        Rend un document, en mémoire seulement.
         """
-        if self.livres.get(document) == StatuEmprunt.Reserver:
+        if self.livres.get(document) in (StatuEmprunt.Reserver, StatuEmprunt.Non_Rendue):
             retour_document = document.rendue(num_usager)
 
             if retour_document.get("status") == 200:
@@ -284,46 +468,404 @@ class Bibliotheques:
             "status": 500
         }
 
-    def get_all_document(self) -> dict:
+    def _resoudre(self, document: Document | str) -> Document:
+        code = document if isinstance(document, str) else document.code
+        connu = self._par_code.get(code)
+        if connu is not None:
+            return connu
+        # cote inconnue : un document nu, que les opérations signalent comme absent
+        return Document(code, "", self._config_db) if isinstance(document, str) else document
+
+    @staticmethod
+    def _etat(document: Document) -> tuple:
+        return (document._num, document._est_reserver, document._attente,
+                document._date_debut_emprunt, document._date_fin_emprunt)
+
+    @staticmethod
+    def _restaurer(document: Document, etat: tuple) -> None:
+        (document._num, document._est_reserver, document._attente,
+         document._date_debut_emprunt, document._date_fin_emprunt) = etat
+
+    def _traiter_lot(self, operations: list[tuple[str | None, Document | str]], operation) -> dict:
+        """
+        Applique une opération de circulation à un lot de documents, puis enregistre tous
+        les changements dans la table Emprunt en une transaction.
+
+        L'opération est atomique : les verrous des documents sont tenus de la vérification du
+        statut jusqu'à l'écriture, et la base refuse tout changement dont le statut de départ
+        a été modifié par un autre processus. Un changement refusé, ou une transaction en
+        échec, restaure l'état en mémoire et marque l'opération en échec.
+
+        Chaque document (ou cote) est remplacé par l'objet tenu par la bibliothèque.
+        """
+        resultats: list[dict] = []
+        modifies: list[tuple[Document, StatuEmprunt, StatuEmprunt, tuple]] = []
+        operations = [(num_usager, self._resoudre(document)) for num_usager, document in operations]
+
+        with verrous_documents.plusieurs(document.code for _, document in operations):
+            for num_usager, document in operations:
+                statut, etat = self.livres.get(document), self._etat(document)
+                resultat = operation(num_usager, document)
+                resultats.append({"code": document.code, "num_usager": num_usager, **resultat})
+                if resultat.get("status") == 200 and (self.livres.get(document) != statut or self._etat(document) != etat):
+                    modifies.append((document, statut, self.livres[document], etat))
+
+            refuses = Emprunt.enregistrer_lot(
+                self._config_db, [(document, ancien, nouveau) for document, ancien, nouveau, _ in modifies]
+            )
+            echec = refuses is None
+            if echec:
+                refuses = {document.code for document, _, _, _ in modifies}
+
+            # on défait en ordre inverse : un même document peut apparaître plusieurs fois
+            for document, ancien, _, etat in reversed(modifies):
+                if document.code in refuses:
+                    self.livres[document] = ancien
+                    self._restaurer(document, etat)
+
+            if not echec:
+                # un autre processus a modifié ces documents : on reprend leur état en base
+                for document in {document for document, _, _, _ in modifies if document.code in refuses}:
+                    emprunt = Emprunt.get(self._config_db, document.code)
+                    if emprunt is not None:
+                        self.livres[document] = self._appliquer_emprunt(document, emprunt)
+
+        if echec:
+            message = "L'enregistrement de l'opération sur {code} a échoué."
+        else:
+            message = "Le document {code} a été modifié par ailleurs, l'opération est annulée."
+
+        for resultat in resultats:
+            if resultat["code"] in refuses and resultat["status"] == 200:
+                resultat["message"] = message.format(code=resultat["code"])
+                resultat["status"] = 500
+
+        reussis = sum(1 for resultat in resultats if resultat["status"] == 200)
+        return {
+            "resultats": resultats,
+            "message": f"{reussis} opération(s) réussie(s) sur {len(resultats)}.",
+            "status": 200 if reussis == len(resultats) else 500
+        }
+
+    def ajout_emprunts(self, emprunts: list[tuple[str, Document | Livre | Dvd | Journal | str]]) -> dict:
+        """
+        Enregistre un lot d'emprunts (par exemple un chariot scanné au comptoir).
+
+        Chaque emprunt est validé comme par ajout_emprunt, puis tous les changements sont
+        enregistrés en base en une seule transaction.
+
+        Paramètres:
+        -----------
+        emprunts : list[tuple[str, Document | Livre | Dvd | Journal]]
+            Les couples (numéro de l'usager, document).
+
+        Retourne:
+        ---------
+        dict
+            Le résultat de chaque emprunt ("resultats"), un message et un statut.
+        """
+        return self._traiter_lot(emprunts, self._emprunter)
+
+    def fin_emprunts(self, retours: list[tuple[str, Document | Livre | Dvd | Journal | str]]) -> dict:
+        """
+        Enregistre un lot de retours (par exemple le contenu de la boîte de retour).
+
+        Chaque retour est validé comme par fin_emprunt, puis tous les changements sont
+        enregistrés en base en une seule transaction.
+
+        Paramètres:
+        -----------
+        retours : list[tuple[str, Document | Livre | Dvd | Journal]]
+            Les couples (numéro de l'usager, document).
+
+        Retourne:
+        ---------
+        dict
+            Le résultat de chaque retour ("resultats"), un message et un statut.
+        """
+        return self._traiter_lot(retours, self._rendre)
+
+    @staticmethod
+    def _repartir(rows: list[tuple]) -> dict[str, list[tuple]]:
+        """
+        Répartit les lignes d'une requête UNION ALL par famille de document, chacune
+        avec le type de ligne de sa table (voir lignes.py).
+        """
+        documents: dict[str, list[tuple]] = {"livre": [], "journal": [], "dvd": []}
+        for row in rows:
+            famille, data = row[0], row[1:]
+            # l'UNION convertit date_publication en texte, on lui rend son type
+            if famille == "journal" and isinstance(data[3], str):
+                data = data[:3] + (datetime.date.fromisoformat(data[3]),) + data[4:]
+            documents[famille].append(LIGNES[DOCUMENTS[famille].table]._make(data))
+        return documents
+
+    def _get_all_union(self) -> dict[str, list[tuple]] | None:
+        """
+        Récupère les livres, journaux et DVD en un seul aller-retour (UNION ALL).
+
+        Retourne:
+        ---------
+        dict | None
+            Les enregistrements par famille, ou None si la requête a échoué.
+        """
+        rows = get_depot(self._config_db).catalogue()
+        return None if rows is None else self._repartir(rows)
+
+    def _get_all_concurrent(self) -> dict[str, list[tuple]]:
+        """
+        Lance les trois requêtes du catalogue en parallèle, chacune sur sa propre
+        connexion du pool.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="catalogue")
+
+        livres = self._executor.submit(Livre.get_all, self._config_db)
+        journaux = self._executor.submit(Journal.get_all, self._config_db)
+        dvds = self._executor.submit(Dvd.get_all, self._config_db)
+
+        return {"livre": livres.result(), "journal": journaux.result(), "dvd": dvds.result()}
+
+    def get_all_document(self, mode: str = "union") -> dict:
+        """
+        Récupère tous les documents de la bibliothèque.
+
+        Paramètres:
+        -----------
+        mode : str, optionnel
+            "union" (défaut) pour un seul aller-retour avec repli sur "concurrent" en cas
+            d'échec, "concurrent" pour trois requêtes en parallèle, "serie" pour trois
+            requêtes successives.
+
+        Retourne:
+        ---------
+        dict
+            Les livres, journaux et DVD, un message et un statut.
+        """
+        documents: dict[str, list[tuple]] | None = None
+
+        if mode == "union":
+            documents = self._get_all_union()
+
+        if documents is None and mode in ("union", "concurrent"):
+            documents = self._get_all_concurrent()
+
+        if documents is None:
+            documents = {
+                "livre": Livre.get_all(self._config_db),
+                "journal": Journal.get_all(self._config_db),
+                "dvd": Dvd.get_all(self._config_db),
+            }
+
         return {
-            "livre": Livre.get_all(self._config_db),
-            "journal": Journal.get_all(self._config_db),
-            "dvd": Dvd.get_all(self._config_db),
+            **documents,
             "message": "Tous les document de la bibiothèques(livre, journal et dvd).",
             "status": 200
         }
 
-    def get_document(self, code: str) -> dict:
-        tmp: list[tuple] = Livre.get(self._config_db, code)
-        if tmp:
-            return {
-                "document": tmp[0],
-                "message": "le document dont la cote est {code} est un livre à bien été récupérer",
-                "status": 200
+    def get_page_document(self, after: str | None = None, limit: int = 50) -> dict:
+        """
+        Récupère une page du catalogue triée par cote, toutes familles confondues.
+
+        Paramètres:
+        -----------
+        after : str, optionnel
+            La dernière cote de la page précédente (None pour la première page).
+        limit : int, optionnel
+            Le nombre de documents de la page (borné à LIMITE_MAX).
+
+        Retourne:
+        ---------
+        dict
+            Les livres, journaux et DVD de la page, et "suivant", la cote à passer en `after`
+            pour obtenir la page suivante (None s'il n'y en a plus).
+        """
+        limit = max(1, min(limit, LIMITE_MAX))
+
+        rows = get_depot(self._config_db).page_catalogue(after, limit)
+        if rows is None:
+            # repli : une page par famille, fusionnées par cote
+            familles = {
+                "livre": Livre.get_page(self._config_db, after, limit) or [],
+                "journal": Journal.get_page(self._config_db, after, limit) or [],
+                "dvd": Dvd.get_page(self._config_db, after, limit) or [],
             }
+            rows = self._fusionner(familles, limit)
 
-        tmp: list[tuple] = Journal.get(self._config_db, code)
-        if tmp:
-            return {
-                "document": tmp[0],
-                "message": "le document dont la cote est {code} est un journal à bien été récupérer",
-                "status": 200
+        return self._page(rows, after, limit)
+
+    async def get_page_document_async(self, after: str | None = None, limit: int = 50) -> dict:
+        """
+        Version asynchrone de get_page_document, utilisée par l'application ASGI.
+        """
+        limit = max(1, min(limit, LIMITE_MAX))
+
+        rows = await get_depot(self._config_db).page_catalogue_async(after, limit)
+        if rows is None:
+            familles = {
+                famille: await classe.get_page_async(self._config_db, after, limit) or []
+                for famille, classe in DOCUMENTS.items()
             }
+            rows = self._fusionner(familles, limit)
+
+        return self._page(rows, after, limit)
+
+    @staticmethod
+    def _fusionner(familles: dict[str, list[tuple]], limit: int) -> list[tuple]:
+        """
+        Fusionne par cote les pages de chaque famille et garde les `limit` premières lignes.
+        """
+        fusion = heapq.merge(
+            *([(famille,) + data for data in datas] for famille, datas in familles.items()),
+            key=lambda row: row[1],
+        )
+        return [row for row, _ in zip(fusion, range(limit))]
+
+    def _page(self, rows: list[tuple], after: str | None, limit: int) -> dict:
+        return {
+            **self._repartir(rows),
+            "suivant": rows[-1][1] if len(rows) == limit else None,
+            "message": f"Page du catalogue après la cote {after}.",
+            "status": 200
+        }
+
+    def get_document(self, code: str) -> dict:
+        """
+        Récupère un document à partir de sa cote, quel que soit son type.
+
+        Grâce à l'index des cotes, une cote connue coûte une seule requête, et une cote
+        absente aucune tant que l'index la sait absente (voir IndexCotes). Sinon elle est
+        localisée dans les trois tables en une requête, puis lue dans la table trouvée.
+
+        Paramètres:
+        -----------
+        code : str
+            La cote du document.
+
+        Retourne:
+        ---------
+        dict
+            Le document (tuple) ou None, son type, un message et un statut.
+        """
+        index_cotes.assurer(self._config_db)
+        tmp: list[tuple] | None = None
+        type_document = index_cotes.type_de(code)
+        if type_document is not None:
+            tmp = DOCUMENTS[type_document].get(self._config_db, code)
+        if not tmp and (type_document is not None or not index_cotes.absent(code)):
+            # cote inconnue, ou absente de son type connu (supprimée par un autre processus)
+            type_document = index_cotes.localiser(self._config_db, [code]).get(code)
+            tmp = DOCUMENTS[type_document].get(self._config_db, code) if type_document else None
 
-        tmp: list[tuple] = Dvd.get(self._config_db, code)
         if tmp:
             return {
                 "document": tmp[0],
-                "message": "le document dont la cote est {code} est un dvd à bien été récupérer",
+                "type": type_document,
+                "message": f"le document dont la cote est {code} est un {type_document} à bien été récupérer",
                 "status": 200
             }
 
         return {
             "document": None,
-            "message": "le document dont la cote est {code} n'a pas été récupérer",
+            "type": None,
+            "message": f"le document dont la cote est {code} n'a pas été récupérer",
             "status": 500
         }
 
+    def get_documents(self, codes: list[str]) -> dict:
+        """
+        Récupère plusieurs documents à partir de leurs cotes.
+
+        Les cotes sont regroupées par type grâce à l'index, puis chaque type est lu avec
+        une seule requête `IN (...)`. Les cotes inconnues de l'index (sauf celles qu'il sait
+        absentes) et celles absentes de leur type connu sont localisées en une requête, puis
+        lues de la même façon.
+
+        Paramètres:
+        -----------
+        codes : list[str]
+            Les cotes des documents.
+
+        Retourne:
+        ---------
+        dict
+            "documents" associant chaque cote trouvée à son type et son enregistrement,
+            "manquants" la liste des cotes introuvables, un message et un statut.
+        """
+        index_cotes.assurer(self._config_db)
+        uniques = list(dict.fromkeys(codes))
+        documents: dict[str, dict] = {}
+        par_type, a_localiser = index_cotes.repartir(uniques)
+        for passe in ("connues", "localisees"):
+            for type_document, cotes in par_type.items():
+                if cotes:
+                    for row in DOCUMENTS[type_document].get_many(self._config_db, cotes) or []:
+                        documents[row.code] = {"type": type_document, "document": row}
+            if passe == "connues":
+                a_localiser += [code for cotes in par_type.values() for code in cotes if code not in documents]
+                if not a_localiser:
+                    break
+                par_type = index_cotes.par_type(index_cotes.localiser(self._config_db, a_localiser))
+
+        manquants = [code for code in uniques if code not in documents]
+
+        return {
+            "documents": documents,
+            "manquants": manquants,
+            "message": f"{len(documents)} document(s) récupéré(s), {len(manquants)} introuvable(s).",
+            "status": 200 if not manquants else 500
+        }
+
+    def rechercher(self, requete: str, k: int = 20) -> dict:
+        """
+        Recherche des documents par titre ou auteur (voir recherche.IndexRecherche).
+
+        Paramètres:
+        -----------
+        requete : str
+            Les mots recherchés ; le dernier peut être incomplet.
+        k : int, optionnel
+            Le nombre maximal de résultats (borné à LIMITE_MAX).
+
+        Retourne:
+        ---------
+        dict
+            "resultats", liste de dicts (type, document, score) du plus pertinent au moins
+            pertinent, un message et un statut.
+        """
+        trouves = index_recherche.rechercher(requete, max(1, min(k, LIMITE_MAX)))
+        rows: dict[str, tuple] = {}
+        for type_document in {type_document for _, type_document, _ in trouves}:
+            cotes = [code for code, type_doc, _ in trouves if type_doc == type_document]
+            for row in DOCUMENTS[type_document].get_many(self._config_db, cotes) or []:
+                rows[row.code] = row
+        return self._resultats_recherche(requete, trouves, rows)
+
+    async def rechercher_async(self, requete: str, k: int = 20) -> dict:
+        """
+        Version asynchrone de rechercher, utilisée par l'application ASGI.
+        """
+        trouves = index_recherche.rechercher(requete, max(1, min(k, LIMITE_MAX)))
+        rows: dict[str, tuple] = {}
+        for type_document in {type_document for _, type_document, _ in trouves}:
+            cotes = [code for code, type_doc, _ in trouves if type_doc == type_document]
+            for row in await DOCUMENTS[type_document].get_many_async(self._config_db, cotes) or []:
+                rows[row.code] = row
+        return self._resultats_recherche(requete, trouves, rows)
+
+    @staticmethod
+    def _resultats_recherche(requete: str, trouves: list[tuple[str, str, float]], rows: dict[str, tuple]) -> dict:
+        if not index_recherche.construit:
+            return {"resultats": [], "message": "L'index de recherche est en cours de construction.", "status": 500}
+
+        resultats = [{"type": type_document, "document": rows[code], "score": score}
+                     for code, type_document, score in trouves if code in rows]
+        return {
+            "resultats": resultats,
+            "message": f"{len(resultats)} résultat(s) pour « {requete} ».",
+            "status": 200
+        }
+
 
 if __name__ == "__main__":
     # Création de la bibliothèque
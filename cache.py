@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class CacheLRU:
+    """
+    Cache en mémoire borné en taille (LRU) et en durée de vie (TTL), partagé entre threads.
+
+    Attributs :
+    -----------
+    taille_max : int
+        Le nombre maximal d'entrées ; au-delà, la moins récemment utilisée est évincée.
+    ttl : float
+        La durée de vie d'une entrée, en secondes.
+    hits, misses, evictions : int
+        Les compteurs d'accès réussis, manqués et d'évictions (LRU ou expiration).
+
+    Méthodes :
+    ----------
+    get(cle) -> Any | None:
+        Renvoie la valeur associée à la clé, ou None si elle est absente ou expirée.
+
+    set(cle, valeur) -> None:
+        Enregistre une valeur.
+
+    invalider(cle) -> None:
+        Supprime une entrée.
+
+    invalider_si(predicat) -> None:
+        Supprime toutes les entrées dont la clé vérifie le prédicat.
+
+    stats() -> dict:
+        Renvoie les compteurs et la taille du cache.
+    """
+
+    def __init__(self, taille_max: int = 10_000, ttl: float = 300.0):
+        self.taille_max: int = taille_max
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entrees: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle: Hashable) -> Any | None:
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return None
+
+            expiration, valeur = entree
+            if expiration < time.monotonic():
+                del self._entrees[cle]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return valeur
+
+    def set(self, cle: Hashable, valeur: Any) -> None:
+        with self._verrou:
+            self._entrees[cle] = (time.monotonic() + self.ttl, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalider(self, cle: Hashable) -> None:
+        with self._verrou:
+            self._entrees.pop(cle, None)
+
+    def invalider_si(self, predicat: Callable[[Hashable], bool]) -> None:
+        with self._verrou:
+            for cle in [cle for cle in self._entrees if predicat(cle)]:
+                del self._entrees[cle]
+
+    def vider(self) -> None:
+        with self._verrou:
+            self._entrees.clear()
+
+    def stats(self) -> dict:
+        with self._verrou:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "taille": len(self._entrees),
+                "taille_max": self.taille_max,
+            }
+
+
+
+class VersionCatalogue:
+    """
+    Numéro de version du catalogue, incrémenté à chaque écriture (voir Document.abonner).
+
+    Sert d'ETag aux réponses de l'API : tant que la version n'a pas changé, une réponse
+    déjà envoyée est toujours valable. La version comprend un identifiant du processus,
+    et change au moins toutes les `ttl` secondes pour qu'une écriture faite par un autre
+    processus ne soit pas ignorée plus longtemps que par cache_documents.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl: float = ttl
+        self._compteur: int = 0
+        self._processus: str = f"{os.getpid():x}{time.time_ns() & 0xFFFF:04x}"
+        self._verrou = threading.Lock()
+
+    def incrementer(self) -> None:
+        with self._verrou:
+            self._compteur += 1
+
+    @property
+    def valeur(self) -> str:
+        return f"{self._processus}-{self._compteur}-{int(time.time() // self.ttl)}"
+
+
+# Cache des pages de détail, clé (type de document, cote)
+cache_documents = CacheLRU(taille_max=10_000, ttl=300.0)
+
+# Profils des personnes connectées, clé num (voir Personne.get_profil)
+cache_profils = CacheLRU(taille_max=10_000, ttl=300.0)
+
+# Version du catalogue, partagée par tout le processus
+version_catalogue = VersionCatalogue(ttl=cache_documents.ttl)
@@ -1,6 +1,13 @@
+import asyncio
+import collections
 import logging
+import threading
 import time
+import traceback
+from contextlib import asynccontextmanager, contextmanager
 import mysql.connector
+import mysql.connector.aio
+from mysql.connector.constants import ClientFlag
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -17,12 +24,40 @@ file_handler = logging.FileHandler("cpy-errors.log")
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-def connect_to_mysql(config, attempts=3, delay=2):
+# Pool settings, overridable per database through config["pool"]
+POOL_DEFAULTS = {
+    "size": 5,
+    "max_overflow": 10,
+    "timeout": 30.0,
+    "idle_timeout": 300.0,
+    "ping_after": 5.0,
+    "leak_timeout": 60.0,
+}
+
+
+def _connection_params(config):
+    # "pool", "motdepasse" and "stockage" configure this package, mysql.connector must not see them
+    params = {key: value for key, value in config.items() if key not in ("pool", "motdepasse", "stockage")}
+    # UPDATE reports matched rows, as SQLite does, not only the rows it changed (see DepotSQL._modifier)
+    params.setdefault("client_flags", [ClientFlag.FOUND_ROWS])
+    return params
+
+
+def type_stockage(config) -> str:
+    """
+    Return the storage backend of this configuration: "mysql" (the default),
+    "sqlite" or "memoire", read from config["stockage"]["type"] (see depot.py).
+    """
+    return config.get("stockage", {}).get("type", "mysql")
+
+
+def _connect(config, attempts=3, delay=2):
+    # Opens a new server connection for ConnectionPool; everything else borrows from the pool
     attempt = 1
     # Implement a reconnection routine
     while attempt < attempts + 1:
         try:
-            return mysql.connector.connect(**config)
+            return mysql.connector.connect(**_connection_params(config))
         except (mysql.connector.Error, IOError) as err:
             if attempts is attempt:
                 # Attempts to reconnect failed; returning None
@@ -37,4 +72,416 @@ def connect_to_mysql(config, attempts=3, delay=2):
             # progressive reconnect delay
             time.sleep(delay ** attempt)
             attempt += 1
-    return None
\ No newline at end of file
+    return None
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections shared by every thread of the process.
+
+    At most ``size + max_overflow`` connections are open at once. ``size``
+    connections are kept warm; overflow connections are closed as soon as they
+    are returned. Idle connections older than ``idle_timeout`` are dropped,
+    connections idle for more than ``ping_after`` seconds are health-checked on
+    checkout, and connections held longer than ``leak_timeout`` are reported as
+    probable leaks together with the stack that borrowed them.
+    """
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=30.0, idle_timeout=300.0,
+                 ping_after=5.0, leak_timeout=60.0, attempts=3, delay=2):
+        self._config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.leak_timeout = leak_timeout
+        self._attempts = attempts
+        self._delay = delay
+
+        self._idle = collections.deque()
+        self._checked_out = {}
+        self._open = 0
+        self._reported_leaks = set()
+        self._cond = threading.Condition()
+
+    def _healthy(self, cnx, last_used):
+        if time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            return cnx.is_connected()
+        except (mysql.connector.Error, IOError):
+            return False
+
+    def _discard(self, cnx):
+        try:
+            cnx.close()
+        except (mysql.connector.Error, IOError):
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _check_leaks(self, now):
+        # called with self._cond held
+        for key, (_, since, stack) in self._checked_out.items():
+            if now - since > self.leak_timeout and key not in self._reported_leaks:
+                self._reported_leaks.add(key)
+                logger.warning(
+                    "Connection held for %.1fs, probable leak. Borrowed at:\n%s",
+                    now - since,
+                    "".join(traceback.format_list(stack)),
+                )
+
+    def acquire(self):
+        """
+        Borrow a connection, waiting at most ``timeout`` seconds for one to be
+        returned when the pool is exhausted. Returns None on failure.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            cnx = None
+            stale = []
+            with self._cond:
+                self._check_leaks(time.monotonic())
+                while True:
+                    now = time.monotonic()
+                    # oldest connections sit on the left, drop those idle for too long
+                    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                        stale.append(self._idle.popleft()[0])
+                        self._open -= 1
+                    if self._idle:
+                        cnx, last_used = self._idle.pop()
+                        break
+                    if self._open < self.size + self.max_overflow:
+                        self._open += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        logger.info("Connection pool exhausted (%d open), giving up.", self._open)
+                        return None
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                try:
+                    old.close()
+                except (mysql.connector.Error, IOError):
+                    pass
+
+            if cnx is None:
+                cnx = _connect(self._config, attempts=self._attempts, delay=self._delay)
+                if cnx is None:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    return None
+            elif not self._healthy(cnx, last_used):
+                logger.info("Dropping dead pooled connection.")
+                self._discard(cnx)
+                continue
+
+            with self._cond:
+                self._checked_out[id(cnx)] = (cnx, time.monotonic(), traceback.extract_stack(limit=8)[:-1])
+            return cnx
+
+    def release(self, cnx, discard=False):
+        """
+        Return a borrowed connection. Uncommitted work is rolled back; broken
+        and overflow connections are closed instead of being kept.
+        """
+        with self._cond:
+            self._checked_out.pop(id(cnx), None)
+            self._reported_leaks.discard(id(cnx))
+
+        if not discard:
+            try:
+                if cnx.in_transaction:
+                    cnx.rollback()
+            except (mysql.connector.Error, IOError):
+                discard = True
+
+        with self._cond:
+            if not discard and len(self._idle) < self.size:
+                self._idle.append((cnx, time.monotonic()))
+                self._cond.notify()
+                return
+
+        self._discard(cnx)
+
+    @contextmanager
+    def connection(self):
+        cnx = self.acquire()
+        if cnx is None:
+            yield None
+            return
+        broken = False
+        try:
+            yield cnx
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(cnx, discard=broken)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": len(self._checked_out),
+                "leaks": sum(1 for _, since, _ in self._checked_out.values() if now - since > self.leak_timeout),
+                "max": self.size + self.max_overflow,
+            }
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for cnx, _ in idle:
+            try:
+                cnx.close()
+            except (mysql.connector.Error, IOError):
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config) -> ConnectionPool:
+    """
+    Return the process-wide pool for this database configuration, creating it
+    on first use with the settings of config["pool"].
+    """
+    key = tuple(sorted((k, str(v)) for k, v in _connection_params(config).items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                settings = {**POOL_DEFAULTS, **config.get("pool", {})}
+                pool = ConnectionPool(config, **settings)
+                _pools[key] = pool
+    return pool
+
+
+class PooledConnection:
+    """
+    Connection returned by connect_to_mysql: it behaves like the mysql.connector
+    connection it wraps, except that close() gives it back to the pool instead
+    of closing the server connection.
+    """
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("Connection already returned to the pool.")
+        return getattr(self._cnx, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.release(cnx)
+
+
+def connect_to_mysql(config, attempts=3, delay=2):
+    """
+    Borrow a connection from the shared pool (see get_pool), for callers that
+    manage the connection themselves; close() returns it to the pool. New code
+    should prefer the pooled_connection with block.
+
+    ``attempts`` and ``delay`` are kept for compatibility: reconnection is now
+    configured per pool, through config["pool"]. Returns None when the database
+    cannot be reached.
+    """
+    pool = get_pool(config)
+    cnx = pool.acquire()
+    return None if cnx is None else PooledConnection(pool, cnx)
+
+
+@contextmanager
+def pooled_connection(config):
+    """
+    Borrow a connection from the shared pool for the duration of a with block:
+
+        with pooled_connection(config) as cnx:
+            if cnx:
+                ...
+
+    The connection is None when the database cannot be reached.
+    """
+    with get_pool(config).connection() as cnx:
+        yield cnx
+
+
+class AsyncConnectionPool:
+    """
+    Bounded pool of asyncio MySQL connections (mysql.connector.aio) for the
+    ASGI app. Same settings and behaviour as ConnectionPool, leak reports
+    included, except that a coroutine waiting for a connection yields to the
+    event loop instead of blocking a thread. A pool belongs to the event loop that created it.
+    """
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=30.0, idle_timeout=300.0,
+                 ping_after=5.0, leak_timeout=60.0):
+        self._config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.leak_timeout = leak_timeout
+
+        self._idle = collections.deque()
+        self._slots = asyncio.Semaphore(size + max_overflow)
+        self._checked_out = {}
+        self._reported_leaks = set()
+
+    def _check_leaks(self, now):
+        for key, (_, since, stack) in self._checked_out.items():
+            if now - since > self.leak_timeout and key not in self._reported_leaks:
+                self._reported_leaks.add(key)
+                logger.warning(
+                    "Connection held for %.1fs, probable leak. Borrowed at:\n%s",
+                    now - since,
+                    "".join(traceback.format_list(stack)),
+                )
+
+    def _check_out(self, cnx):
+        self._checked_out[id(cnx)] = (cnx, time.monotonic(), traceback.extract_stack(limit=8)[:-2])
+        return cnx
+
+    async def _close(self, cnx):
+        try:
+            await cnx.close()
+        except (mysql.connector.Error, IOError):
+            pass
+
+    async def acquire(self):
+        """
+        Borrow a connection, waiting at most ``timeout`` seconds for one to be
+        returned when the pool is exhausted. Returns None on failure.
+        """
+        self._check_leaks(time.monotonic())
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            logger.info("Async connection pool exhausted (%d in use), giving up.", len(self._checked_out))
+            return None
+
+        while self._idle:
+            cnx, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                await self._close(cnx)
+                continue
+            try:
+                if idle_for < self.ping_after or await cnx.is_connected():
+                    return self._check_out(cnx)
+            except (mysql.connector.Error, IOError):
+                pass
+            logger.info("Dropping dead pooled connection.")
+            await self._close(cnx)
+
+        try:
+            cnx = await mysql.connector.aio.connect(**_connection_params(self._config))
+        except (mysql.connector.Error, IOError) as err:
+            logger.info("Failed to connect, exiting without a connection: %s", err)
+            self._slots.release()
+            return None
+        return self._check_out(cnx)
+
+    async def release(self, cnx, discard=False):
+        """
+        Return a borrowed connection. Uncommitted work is rolled back; broken
+        and overflow connections are closed instead of being kept.
+        """
+        self._checked_out.pop(id(cnx), None)
+        self._reported_leaks.discard(id(cnx))
+
+        if not discard:
+            try:
+                if cnx.in_transaction:
+                    await cnx.rollback()
+            except (mysql.connector.Error, IOError):
+                discard = True
+
+        if not discard and len(self._idle) < self.size:
+            self._idle.append((cnx, time.monotonic()))
+        else:
+            await self._close(cnx)
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        cnx = await self.acquire()
+        if cnx is None:
+            yield None
+            return
+        broken = False
+        try:
+            yield cnx
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+            broken = True
+            raise
+        finally:
+            await self.release(cnx, discard=broken)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "open": len(self._checked_out) + len(self._idle),
+            "idle": len(self._idle),
+            "in_use": len(self._checked_out),
+            "leaks": sum(1 for _, since, _ in self._checked_out.values() if now - since > self.leak_timeout),
+            "max": self.size + self.max_overflow,
+        }
+
+    async def close(self):
+        idle = list(self._idle)
+        self._idle.clear()
+        for cnx, _ in idle:
+            await self._close(cnx)
+
+
+_async_pools = {}
+
+
+def get_async_pool(config) -> AsyncConnectionPool:
+    """
+    Return the async pool for this database configuration and the running
+    event loop, creating it on first use with the settings of config["pool"].
+    """
+    key = (id(asyncio.get_running_loop()),
+           tuple(sorted((k, str(v)) for k, v in _connection_params(config).items())))
+    pool = _async_pools.get(key)
+    if pool is None:
+        settings = {**POOL_DEFAULTS, **config.get("pool", {})}
+        pool = _async_pools[key] = AsyncConnectionPool(config, **settings)
+    return pool
+
+
+@asynccontextmanager
+async def async_pooled_connection(config):
+    """
+    Async counterpart of pooled_connection:
+
+        async with async_pooled_connection(config) as cnx:
+            if cnx:
+                ...
+
+    The connection is None when the database cannot be reached.
+    """
+    async with get_async_pool(config).connection() as cnx:
+        yield cnx
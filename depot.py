@@ -0,0 +1,1061 @@
+"""
+Dépôts : tous les accès aux données du modèle, derrière une même interface.
+
+Les classes du modèle (Livre, Dvd, Journal, Personne, Emprunt, Reservation) ne
+parlent plus directement à MySQL : elles demandent le dépôt de leur configuration
+avec get_depot(config_db). Trois implémentations :
+
+- DepotMySQL : la base MySQL, par le pool de connexions (comportement historique) ;
+- DepotSQLite : un fichier SQLite, ou ":memory:", sans serveur ;
+- DepotMemoire : des dictionnaires Python, sans aucune base (tests, benchmarks de la
+  couche applicative sans la latence de la base).
+
+Le dépôt se choisit avec la clé "stockage" de la configuration :
+    config = {"stockage": {"type": "sqlite", "chemin": "bu.sqlite3"}}
+    config = {"stockage": {"type": "memoire"}}
+Sans cette clé, les données sont dans MySQL (clés host, user, password, database).
+
+Les lignes renvoyées ont les mêmes colonnes, dans le même ordre, quelle que soit
+l'implémentation : des NamedTuple de lignes.py, qui ne portent que les colonnes lues
+(jamais de SELECT *, voir PROJECTIONS).
+"""
+import bisect
+import datetime
+import heapq
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+import mysql.connector
+from databaseconnection import async_pooled_connection, pooled_connection, type_stockage
+from lignes import LIGNES, LigneEmprunt, LignePersonne, LigneReservation, Profil
+from schema import SCHEMA_SQLITE
+from statuemprunt import StatuEmprunt
+
+logger = logging.getLogger(__name__)
+
+# Colonnes de chaque table, dans l'ordre des lignes renvoyées par les dépôts
+COLONNES: dict[str, tuple[str, ...]] = {table: ligne._fields for table, ligne in LIGNES.items()}
+
+# Liste des colonnes lues par les SELECT de chaque table ; "Profil" est la Personne sans empreinte
+PROJECTIONS: dict[str, str] = {
+    **{table: ", ".join(colonnes) for table, colonnes in COLONNES.items()},
+    "Profil": ", ".join(Profil._fields),
+}
+
+# Famille de chaque table de documents, dans l'ordre du catalogue
+FAMILLES: dict[str, str] = {"Livre": "livre", "Journal": "journal", "Dvd": "dvd"}
+
+# Valeur d'une colonne absente d'un INSERT
+DEFAUTS: dict[str, object] = {"sur_place": 0, "online": 0, "statut": StatuEmprunt.Libre.name, "nb_emprunts": 0}
+
+# Un changement d'emprunt : cote, type, table, statut attendu, nouveau statut, usager, début, fin
+Changement = tuple[str, str, str, StatuEmprunt, StatuEmprunt, str | None,
+                   datetime.date | None, datetime.date | None]
+
+# Statuts d'un document sorti ou mis de côté
+NON_LIBRES: tuple[str, ...] = tuple(statut.name for statut in StatuEmprunt if statut != StatuEmprunt.Libre)
+
+CONNEXION_IMPOSSIBLE: str = "connexion à la base impossible"
+
+
+def _typer(rows: list[tuple] | tuple | None, un: bool, ligne: type[tuple] | None) -> list[tuple] | tuple | None:
+    # construit les NamedTuple d'un résultat brut du curseur
+    if ligne is None or rows is None:
+        return rows
+    return ligne._make(rows) if un else list(map(ligne._make, rows))
+
+
+class ErreurDepot(Exception):
+    """
+    Erreur de lecture levée par un dépôt pendant un parcours (voir Depot.parcourir).
+    """
+
+
+class Depot(ABC):
+    """
+    Interface commune des dépôts. Les lectures renvoient None quand la base est
+    inaccessible ; les écritures renvoient False (ou un message d'erreur) sans lever.
+    Classe abstraite : un dépôt qui n'implémente pas toutes les méthodes ne peut pas être créé.
+
+    Méthodes :
+    ----------
+    document(table: str, code: str) -> list[tuple] | None:
+    documents(table: str, codes: list[str]) -> list[tuple] | None:
+    page(table: str, after: str | None, limit: int) -> list[tuple] | None:
+    tous(table: str) -> list[tuple] | None:
+    parcourir(table: str, taille_lot: int) -> Iterator[tuple]:
+    codes(table: str) -> list[str] | None:
+        Lectures d'une table de documents (Livre, Dvd ou Journal), triées par cote pour page et parcourir.
+
+    catalogue() -> list[tuple] | None:
+    page_catalogue(after: str | None, limit: int) -> list[tuple] | None:
+        Lectures des trois tables à la fois, chaque ligne précédée de sa famille.
+
+    localiser(codes: list[str]) -> list[tuple[str, str]] | None:
+        Les couples (cote, famille) des cotes présentes dans l'une des trois tables, en une requête.
+
+    inserer_document(table: str, valeurs: dict) -> bool:
+    modifier_document(table: str, code: str, valeurs: dict) -> bool:
+    supprimer_document(table: str, code: str) -> bool:
+    ecrire_documents(table: str, colonnes: tuple[str, ...], lignes: list[tuple]) -> str | None:
+        Écritures dans une table de documents ; ecrire_documents insère ou met à jour un lot
+        en une transaction et renvoie le message d'erreur si le lot est refusé.
+
+    personne(num: str) -> Profil | None:
+    personne_par_login(login: str) -> LignePersonne | None:
+    personnes_par_login(login: str) -> list[Profil] | None:
+    personnes() -> list[Profil] | None:
+    inserer_personne(ligne: tuple) -> bool:
+    modifier_personne(num: str, perm: str, nom: str, prenom: str) -> bool:
+    supprimer_personne(num: str) -> bool:
+    remplacer_empreinte(num: str, ancienne: str, nouvelle: str) -> bool:
+        Table Personne ; seul personne_par_login (authentification) lit l'empreinte,
+        remplacer_empreinte n'écrit que si elle n'a pas changé.
+
+    modifier_*, supprimer_* et remplacer_empreinte renvoient False si aucune ligne ne
+    correspondait (cote ou numéro inconnu, empreinte déjà remplacée).
+
+    emprunt(code: str) -> tuple | None:
+    emprunts() -> list[tuple] | None:
+    compteurs() -> dict[str, int]:
+    emprunts_en_retard(jour: datetime.date) -> list[tuple] | None:
+    enregistrer_emprunts(changements: list[Changement]) -> set[str] | None:
+        Table Emprunt (voir Emprunt pour le détail de chaque méthode).
+
+    reservations() -> list[tuple] | None:
+    ajouter_reservation(code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+    supprimer_reservations(reservations: list[tuple[str, str]]) -> bool:
+        Table Reservation (voir Reservation).
+
+    Les méthodes document_async, documents_async, localiser_async, page_async, page_catalogue_async,
+    personne_async, personne_par_login_async, personnes_par_login_async et
+    remplacer_empreinte_async en sont les versions coroutines : par défaut elles appellent
+    la version synchrone, DepotMySQL les sert par le pool asynchrone.
+    """
+
+    # erreurs de la base transformées en ErreurDepot par parcourir
+    erreurs: tuple[type[Exception], ...] = ()
+
+    @abstractmethod
+    def document(self, table: str, code: str) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def documents(self, table: str, codes: list[str]) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def page(self, table: str, after: str | None, limit: int) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def tous(self, table: str) -> list[tuple] | None:
+        ...
+
+    def parcourir(self, table: str, taille_lot: int = 500) -> Iterator[tuple]:
+        """
+        Parcourt une table de documents par pages de `taille_lot` lignes, triées par cote.
+
+        Rien n'est gardé verrouillé entre deux pages : le consommateur peut aller à son rythme.
+
+        :raises ErreurDepot: Si une page ne peut pas être lue.
+        """
+        dernier = None
+        while True:
+            try:
+                rows = self.page(table, dernier, taille_lot)
+            except self.erreurs as err:
+                raise ErreurDepot(str(err)) from err
+            if not rows:
+                return
+            yield from rows
+            dernier = rows[-1].code
+
+    @abstractmethod
+    def codes(self, table: str) -> list[str] | None:
+        ...
+
+    @abstractmethod
+    def catalogue(self) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def localiser(self, codes: list[str]) -> list[tuple[str, str]] | None:
+        ...
+
+    @abstractmethod
+    def page_catalogue(self, after: str | None, limit: int) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def inserer_document(self, table: str, valeurs: dict) -> bool:
+        ...
+
+    @abstractmethod
+    def modifier_document(self, table: str, code: str, valeurs: dict) -> bool:
+        ...
+
+    @abstractmethod
+    def supprimer_document(self, table: str, code: str) -> bool:
+        ...
+
+    @abstractmethod
+    def ecrire_documents(self, table: str, colonnes: tuple[str, ...], lignes: list[tuple]) -> str | None:
+        ...
+
+    @abstractmethod
+    def personne(self, num: str) -> Profil | None:
+        ...
+
+    @abstractmethod
+    def personne_par_login(self, login: str) -> LignePersonne | None:
+        ...
+
+    @abstractmethod
+    def personnes_par_login(self, login: str) -> list[Profil] | None:
+        ...
+
+    @abstractmethod
+    def personnes(self) -> list[Profil] | None:
+        ...
+
+    @abstractmethod
+    def inserer_personne(self, ligne: tuple) -> bool:
+        ...
+
+    @abstractmethod
+    def modifier_personne(self, num: str, perm: str, nom: str, prenom: str) -> bool:
+        ...
+
+    @abstractmethod
+    def supprimer_personne(self, num: str) -> bool:
+        ...
+
+    @abstractmethod
+    def remplacer_empreinte(self, num: str, ancienne: str, nouvelle: str) -> bool:
+        ...
+
+    @abstractmethod
+    def emprunt(self, code: str) -> tuple | None:
+        ...
+
+    @abstractmethod
+    def emprunts(self) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def compteurs(self) -> dict[str, int]:
+        ...
+
+    @abstractmethod
+    def emprunts_en_retard(self, jour: datetime.date) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def enregistrer_emprunts(self, changements: list[Changement]) -> set[str] | None:
+        ...
+
+    @abstractmethod
+    def reservations(self) -> list[tuple] | None:
+        ...
+
+    @abstractmethod
+    def ajouter_reservation(self, code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+        ...
+
+    @abstractmethod
+    def supprimer_reservations(self, reservations: list[tuple[str, str]]) -> bool:
+        ...
+
+    async def document_async(self, table: str, code: str) -> list[tuple] | None:
+        return self.document(table, code)
+
+    async def documents_async(self, table: str, codes: list[str]) -> list[tuple] | None:
+        return self.documents(table, codes)
+
+    async def localiser_async(self, codes: list[str]) -> list[tuple[str, str]] | None:
+        return self.localiser(codes)
+
+    async def page_async(self, table: str, after: str | None, limit: int) -> list[tuple] | None:
+        return self.page(table, after, limit)
+
+    async def page_catalogue_async(self, after: str | None, limit: int) -> list[tuple] | None:
+        return self.page_catalogue(after, limit)
+
+    async def personne_async(self, num: str) -> Profil | None:
+        return self.personne(num)
+
+    async def personne_par_login_async(self, login: str) -> LignePersonne | None:
+        return self.personne_par_login(login)
+
+    async def personnes_par_login_async(self, login: str) -> list[Profil] | None:
+        return self.personnes_par_login(login)
+
+    async def remplacer_empreinte_async(self, num: str, ancienne: str, nouvelle: str) -> bool:
+        return self.remplacer_empreinte(num, ancienne, nouvelle)
+
+
+class DepotSQL(Depot):
+    """
+    Requêtes communes aux dépôts SQL, écrites pour MySQL (marqueurs %s).
+
+    Une sous-classe fournit _connexion (un gestionnaire de contexte qui donne une connexion
+    DB-API, ou None) et adapte les quelques requêtes propres à son dialecte.
+    """
+
+    requete_catalogue: str = f"""
+    SELECT 'livre', {PROJECTIONS["Livre"]} FROM Livre
+    UNION ALL
+    SELECT 'journal', {PROJECTIONS["Journal"]} FROM Journal
+    UNION ALL
+    SELECT 'dvd', {PROJECTIONS["Dvd"]} FROM Dvd
+    """
+
+    # Chaque sous-requête profite de l'index de la clé primaire
+    requete_page_catalogue: str = f"""
+    (SELECT 'livre', {PROJECTIONS["Livre"]} FROM Livre WHERE code > %s ORDER BY code LIMIT %s)
+    UNION ALL
+    (SELECT 'journal', {PROJECTIONS["Journal"]} FROM Journal WHERE code > %s ORDER BY code LIMIT %s)
+    UNION ALL
+    (SELECT 'dvd', {PROJECTIONS["Dvd"]} FROM Dvd WHERE code > %s ORDER BY code LIMIT %s)
+    ORDER BY 2
+    LIMIT %s
+    """
+
+    requete_emprunt: str = """
+    INSERT INTO Emprunt (code, type_document, num_usager, statut, date_debut, date_fin, nb_emprunts)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        num_usager = VALUES(num_usager),
+        statut = VALUES(statut),
+        date_debut = VALUES(date_debut),
+        date_fin = VALUES(date_fin),
+        nb_emprunts = nb_emprunts + VALUES(nb_emprunts)
+    """
+
+    inserer_ignorer: str = "INSERT IGNORE"
+    pour_modifier: str = " FOR UPDATE"
+
+    @abstractmethod
+    def _connexion(self):
+        ...
+
+    def _commencer(self, cursor) -> None:
+        # début explicite d'une transaction d'écriture, si le dialecte en a besoin
+        pass
+
+    def _upsert(self, table: str, colonnes: tuple[str, ...]) -> str:
+        mises_a_jour = ", ".join(f"{colonne} = VALUES({colonne})" for colonne in colonnes[1:])
+        return (f"INSERT INTO {table} ({', '.join(colonnes)}) VALUES ({', '.join(['%s'] * len(colonnes))}) "
+                f"ON DUPLICATE KEY UPDATE {mises_a_jour}")
+
+    def _requete_dates(self, table: str, marqueurs: str) -> str:
+        return f"""
+        UPDATE {table} JOIN Emprunt USING (code)
+        SET {table}.date_debut_emprunt = Emprunt.date_debut,
+            {table}.date_fin_emprunt = Emprunt.date_fin
+        WHERE Emprunt.code IN ({marqueurs})
+        """
+
+    def _lire(self, requete: str, params: tuple = (), un: bool = False,
+              ligne: type[tuple] | None = None) -> list[tuple] | tuple | None:
+        with self._connexion() as cnx:
+            if cnx:
+                with cnx.cursor() as cursor:
+                    cursor.execute(requete, params)
+                    rows = cursor.fetchone() if un else cursor.fetchall()
+                return _typer(rows, un, ligne)
+        return None
+
+    def _ecrire(self, requete: str, params: tuple | list, lot: bool = False) -> str | None:
+        """
+        Exécute une écriture dans sa propre transaction ; renvoie le message d'erreur, None si elle a réussi.
+        """
+        with self._connexion() as cnx:
+            if not cnx:
+                return CONNEXION_IMPOSSIBLE
+            try:
+                with cnx.cursor() as cursor:
+                    self._commencer(cursor)
+                    if lot:
+                        cursor.executemany(requete, params)
+                    else:
+                        cursor.execute(requete, params)
+                cnx.commit()
+                return None
+            except self.erreurs as err:
+                cnx.rollback()
+                return str(err)
+
+    def _modifier(self, requete: str, params: tuple) -> bool:
+        """
+        Exécute un UPDATE ou un DELETE dans sa propre transaction ; renvoie True si une ligne correspondait.
+        """
+        with self._connexion() as cnx:
+            if not cnx:
+                return False
+            try:
+                with cnx.cursor() as cursor:
+                    self._commencer(cursor)
+                    cursor.execute(requete, params)
+                    # lignes trouvées, même inchangées (FOUND_ROWS pour MySQL, voir databaseconnection)
+                    trouvees = cursor.rowcount
+                cnx.commit()
+                return trouvees > 0
+            except self.erreurs as err:
+                cnx.rollback()
+                logger.info("Écriture impossible : %s", err)
+                return False
+
+    def document(self, table: str, code: str) -> list[tuple] | None:
+        return self._lire(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code = %s", (code,), ligne=LIGNES[table])
+
+    def documents(self, table: str, codes: list[str]) -> list[tuple] | None:
+        marqueurs = ", ".join(["%s"] * len(codes))
+        return self._lire(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code IN ({marqueurs})", tuple(codes),
+                          ligne=LIGNES[table])
+
+    def page(self, table: str, after: str | None, limit: int) -> list[tuple] | None:
+        # code > '' aussi pour la première page : une seule forme de requête, un parcours de clé borné
+        return self._lire(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code > %s ORDER BY code LIMIT %s",
+                          (after or "", limit), ligne=LIGNES[table])
+
+    def tous(self, table: str) -> list[tuple] | None:
+        return self._lire(f"SELECT {PROJECTIONS[table]} FROM {table}", ligne=LIGNES[table])
+
+    def codes(self, table: str) -> list[str] | None:
+        rows = self._lire(f"SELECT code FROM {table}")
+        return None if rows is None else [code for (code,) in rows]
+
+    @staticmethod
+    def _requete_localiser(nb_codes: int) -> str:
+        marqueurs = ", ".join(["%s"] * nb_codes)
+        return " UNION ALL ".join(f"SELECT code, '{famille}' FROM {table} WHERE code IN ({marqueurs})"
+                                  for table, famille in FAMILLES.items())
+
+    def localiser(self, codes: list[str]) -> list[tuple[str, str]] | None:
+        if not codes:
+            return []
+        return self._lire(self._requete_localiser(len(codes)), tuple(codes) * len(FAMILLES))
+
+    def catalogue(self) -> list[tuple] | None:
+        try:
+            return self._lire(self.requete_catalogue)
+        except self.erreurs as err:
+            logger.info("Requête groupée sur le catalogue impossible (%s), repli sur une requête par table.", err)
+            return None
+
+    def page_catalogue(self, after: str | None, limit: int) -> list[tuple] | None:
+        try:
+            return self._lire(self.requete_page_catalogue, (after or "", limit) * 3 + (limit,))
+        except self.erreurs as err:
+            logger.info("Requête groupée sur le catalogue impossible (%s), repli sur une requête par table.", err)
+            return None
+
+    def inserer_document(self, table: str, valeurs: dict) -> bool:
+        requete = (f"INSERT INTO {table} ({', '.join(valeurs)}) "
+                   f"VALUES ({', '.join(['%s'] * len(valeurs))})")
+        erreur = self._ecrire(requete, tuple(valeurs.values()))
+        if erreur:
+            logger.info("Insertion de %s dans %s impossible : %s", valeurs.get("code"), table, erreur)
+        return erreur is None
+
+    def modifier_document(self, table: str, code: str, valeurs: dict) -> bool:
+        affectations = ", ".join(f"{colonne} = %s" for colonne in valeurs)
+        return self._modifier(f"UPDATE {table} SET {affectations} WHERE code = %s",
+                              tuple(valeurs.values()) + (code,))
+
+    def supprimer_document(self, table: str, code: str) -> bool:
+        return self._modifier(f"DELETE FROM {table} WHERE code = %s", (code,))
+
+    def ecrire_documents(self, table: str, colonnes: tuple[str, ...], lignes: list[tuple]) -> str | None:
+        return self._ecrire(self._upsert(table, colonnes), lignes, lot=True)
+
+    def personne(self, num: str) -> Profil | None:
+        return self._lire(f"SELECT {PROJECTIONS['Profil']} FROM Personne WHERE num = %s LIMIT 1", (num,),
+                          un=True, ligne=Profil)
+
+    def personne_par_login(self, login: str) -> LignePersonne | None:
+        return self._lire(f"SELECT {PROJECTIONS['Personne']} FROM Personne WHERE login = %s LIMIT 1", (login,),
+                          un=True, ligne=LignePersonne)
+
+    def personnes_par_login(self, login: str) -> list[Profil] | None:
+        return self._lire(f"SELECT {PROJECTIONS['Profil']} FROM Personne WHERE login = %s", (login,), ligne=Profil)
+
+    def personnes(self) -> list[Profil] | None:
+        return self._lire(f"SELECT {PROJECTIONS['Profil']} FROM Personne", ligne=Profil)
+
+    def inserer_personne(self, ligne: tuple) -> bool:
+        erreur = self._ecrire(
+            "INSERT INTO Personne (num, perm, nom, prenom, login, password) VALUES (%s, %s, %s, %s, %s, %s)", ligne
+        )
+        if erreur:
+            logger.info("Création de la personne %s impossible : %s", ligne[0], erreur)
+        return erreur is None
+
+    def modifier_personne(self, num: str, perm: str, nom: str, prenom: str) -> bool:
+        return self._modifier("UPDATE Personne SET perm = %s, nom = %s, prenom = %s WHERE num = %s",
+                              (perm, nom, prenom, num))
+
+    def supprimer_personne(self, num: str) -> bool:
+        return self._modifier("DELETE FROM Personne WHERE num = %s", (num,))
+
+    def remplacer_empreinte(self, num: str, ancienne: str, nouvelle: str) -> bool:
+        return self._modifier("UPDATE Personne SET password = %s WHERE num = %s AND password = %s",
+                              (nouvelle, num, ancienne))
+
+    def emprunt(self, code: str) -> tuple | None:
+        return self._lire(f"SELECT {PROJECTIONS['Emprunt']} FROM Emprunt WHERE code = %s", (code,),
+                          un=True, ligne=LigneEmprunt)
+
+    def emprunts(self) -> list[tuple] | None:
+        # IN plutôt que <> Libre : la lecture passe par l'index sur le statut
+        marqueurs = ", ".join(["%s"] * len(NON_LIBRES))
+        return self._lire(f"SELECT {PROJECTIONS['Emprunt']} FROM Emprunt WHERE statut IN ({marqueurs})", NON_LIBRES,
+                          ligne=LigneEmprunt)
+
+    def compteurs(self) -> dict[str, int]:
+        rows = self._lire("SELECT code, nb_emprunts FROM Emprunt WHERE nb_emprunts > 0")
+        return dict(rows) if rows else {}
+
+    def emprunts_en_retard(self, jour: datetime.date) -> list[tuple] | None:
+        return self._lire(
+            """
+            SELECT code, type_document, num_usager, statut, date_fin FROM Emprunt
+            WHERE statut IN (%s, %s) AND date_fin < %s
+            ORDER BY date_fin, code
+            """,
+            (StatuEmprunt.Reserver.name, StatuEmprunt.Non_Rendue.name, jour),
+        )
+
+    def enregistrer_emprunts(self, changements: list[Changement]) -> set[str] | None:
+        codes = [changement[0] for changement in changements]
+
+        with self._connexion() as cnx:
+            if not cnx:
+                return None
+
+            try:
+                with cnx.cursor() as cursor:
+                    self._commencer(cursor)
+                    # un document libre n'a pas forcément de ligne : on la crée pour pouvoir la verrouiller
+                    libres = [(code, type_document, StatuEmprunt.Libre.name)
+                              for code, type_document, _, ancien, *_ in changements if ancien == StatuEmprunt.Libre]
+                    if libres:
+                        cursor.executemany(
+                            f"{self.inserer_ignorer} INTO Emprunt (code, type_document, statut) VALUES (%s, %s, %s)",
+                            libres,
+                        )
+
+                    marqueurs = ", ".join(["%s"] * len(codes))
+                    cursor.execute(f"SELECT code, statut FROM Emprunt WHERE code IN ({marqueurs}){self.pour_modifier}",
+                                   tuple(codes))
+                    en_base = dict(cursor.fetchall())
+
+                    refuses: set[str] = set()
+                    emprunts: list[tuple] = []
+                    tables: set[str] = set()
+                    for code, type_document, table, ancien, nouveau, num_usager, debut, fin in changements:
+                        if en_base.get(code, StatuEmprunt.Libre.name) != ancien.name:
+                            refuses.add(code)
+                            continue
+                        # le lot peut contenir plusieurs opérations sur le même document
+                        en_base[code] = nouveau.name
+                        nouvel_emprunt = ancien == StatuEmprunt.Libre and nouveau == StatuEmprunt.Reserver
+                        emprunts.append((code, type_document, None if nouveau == StatuEmprunt.Libre else num_usager,
+                                         nouveau.name, debut, fin, int(nouvel_emprunt)))
+                        tables.add(table)
+
+                    if emprunts:
+                        cursor.executemany(self.requete_emprunt, emprunts)
+                        acceptes = tuple(row[0] for row in emprunts)
+                        marqueurs = ", ".join(["%s"] * len(acceptes))
+                        for table in tables:
+                            cursor.execute(self._requete_dates(table, marqueurs), acceptes)
+                cnx.commit()
+            except self.erreurs as err:
+                cnx.rollback()
+                logger.info("Enregistrement des emprunts impossible : %s", err)
+                return None
+
+        return refuses
+
+    def reservations(self) -> list[tuple] | None:
+        return self._lire(f"SELECT {PROJECTIONS['Reservation']} FROM Reservation ORDER BY code, id",
+                          ligne=LigneReservation)
+
+    def ajouter_reservation(self, code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+        with self._connexion() as cnx:
+            if not cnx:
+                return None
+            try:
+                with cnx.cursor() as cursor:
+                    self._commencer(cursor)
+                    cursor.execute(
+                        "INSERT INTO Reservation (code, num_usager, date_demande, date_expiration) "
+                        "VALUES (%s, %s, %s, %s)",
+                        (code, num_usager, datetime.datetime.now(), date_expiration),
+                    )
+                    identifiant = cursor.lastrowid
+                cnx.commit()
+                return identifiant
+            except self.erreurs as err:
+                cnx.rollback()
+                logger.info("Réservation de %s par %s impossible : %s", code, num_usager, err)
+                return None
+
+    def supprimer_reservations(self, reservations: list[tuple[str, str]]) -> bool:
+        erreur = self._ecrire("DELETE FROM Reservation WHERE code = %s AND num_usager = %s", reservations, lot=True)
+        if erreur:
+            logger.info("Suppression de %d réservation(s) impossible : %s", len(reservations), erreur)
+        return erreur is None
+
+
+class DepotMySQL(DepotSQL):
+    """
+    Dépôt MySQL : les connexions sont empruntées au pool partagé (databaseconnection.py),
+    les versions coroutines au pool asynchrone de la boucle d'événements.
+    """
+
+    erreurs = (mysql.connector.Error,)
+
+    def __init__(self, config_db: dict):
+        self.config_db: dict = config_db
+
+    def _connexion(self):
+        return pooled_connection(self.config_db)
+
+    def parcourir(self, table: str, taille_lot: int = 500) -> Iterator[tuple]:
+        """
+        Lit la table au fil de l'eau avec fetchmany : une seule requête, et la connexion reste
+        empruntée au pool tant que le générateur n'est pas épuisé ou fermé.
+        """
+        with self._connexion() as cnx:
+            if cnx:
+                cursor = cnx.cursor()
+                try:
+                    cursor.execute(f"SELECT {PROJECTIONS[table]} FROM {table} ORDER BY code")
+                    while True:
+                        rows = cursor.fetchmany(taille_lot)
+                        if not rows:
+                            break
+                        yield from map(LIGNES[table]._make, rows)
+                except self.erreurs as err:
+                    raise ErreurDepot(str(err)) from err
+                finally:
+                    # générateur abandonné en cours de route : on vide le reste du résultat
+                    if cnx.unread_result:
+                        cnx.consume_results()
+                    cursor.close()
+
+    async def _lire_async(self, requete: str, params: tuple = (), un: bool = False,
+                          ligne: type[tuple] | None = None) -> list[tuple] | tuple | None:
+        async with async_pooled_connection(self.config_db) as cnx:
+            if cnx:
+                async with await cnx.cursor() as cursor:
+                    await cursor.execute(requete, params)
+                    rows = await (cursor.fetchone() if un else cursor.fetchall())
+                return _typer(rows, un, ligne)
+        return None
+
+    async def document_async(self, table: str, code: str) -> list[tuple] | None:
+        return await self._lire_async(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code = %s", (code,),
+                                      ligne=LIGNES[table])
+
+    async def documents_async(self, table: str, codes: list[str]) -> list[tuple] | None:
+        marqueurs = ", ".join(["%s"] * len(codes))
+        return await self._lire_async(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code IN ({marqueurs})",
+                                      tuple(codes), ligne=LIGNES[table])
+
+    async def localiser_async(self, codes: list[str]) -> list[tuple[str, str]] | None:
+        if not codes:
+            return []
+        return await self._lire_async(self._requete_localiser(len(codes)), tuple(codes) * len(FAMILLES))
+
+    async def page_async(self, table: str, after: str | None, limit: int) -> list[tuple] | None:
+        return await self._lire_async(f"SELECT {PROJECTIONS[table]} FROM {table} WHERE code > %s ORDER BY code LIMIT %s",
+                                      (after or "", limit), ligne=LIGNES[table])
+
+    async def page_catalogue_async(self, after: str | None, limit: int) -> list[tuple] | None:
+        try:
+            return await self._lire_async(self.requete_page_catalogue, (after or "", limit) * 3 + (limit,))
+        except self.erreurs as err:
+            logger.info("Requête groupée sur le catalogue impossible (%s), repli sur une requête par table.", err)
+            return None
+
+    async def personne_async(self, num: str) -> Profil | None:
+        return await self._lire_async(f"SELECT {PROJECTIONS['Profil']} FROM Personne WHERE num = %s LIMIT 1", (num,),
+                                      un=True, ligne=Profil)
+
+    async def personne_par_login_async(self, login: str) -> LignePersonne | None:
+        return await self._lire_async(f"SELECT {PROJECTIONS['Personne']} FROM Personne WHERE login = %s LIMIT 1",
+                                      (login,), un=True, ligne=LignePersonne)
+
+    async def personnes_par_login_async(self, login: str) -> list[Profil] | None:
+        return await self._lire_async(f"SELECT {PROJECTIONS['Profil']} FROM Personne WHERE login = %s", (login,),
+                                      ligne=Profil)
+
+    async def remplacer_empreinte_async(self, num: str, ancienne: str, nouvelle: str) -> bool:
+        async with async_pooled_connection(self.config_db) as cnx:
+            if cnx:
+                async with await cnx.cursor() as cursor:
+                    await cursor.execute("UPDATE Personne SET password = %s WHERE num = %s AND password = %s",
+                                         (nouvelle, num, ancienne))
+                    remplacee = cursor.rowcount > 0
+                await cnx.commit()
+                return remplacee
+        return False
+
+
+# Les dates sont stockées en texte ISO et relues avec leur type grâce aux types déclarés
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_adapter(datetime.datetime, lambda valeur: valeur.isoformat(" "))
+sqlite3.register_converter("DATE", lambda valeur: datetime.date.fromisoformat(valeur.decode()))
+sqlite3.register_converter("DATETIME", lambda valeur: datetime.datetime.fromisoformat(valeur.decode()))
+
+
+class _CurseurSQLite(sqlite3.Cursor):
+    # mêmes usages qu'un curseur mysql.connector : marqueurs %s et bloc with
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, requete: str, params=()):
+        return super().execute(requete.replace("%s", "?"), params)
+
+    def executemany(self, requete: str, params):
+        return super().executemany(requete.replace("%s", "?"), params)
+
+
+class _ConnexionSQLite(sqlite3.Connection):
+    def cursor(self, factory=_CurseurSQLite):
+        return super().cursor(factory)
+
+
+class DepotSQLite(DepotSQL):
+    """
+    Dépôt SQLite, dans un fichier ou en mémoire (chemin ":memory:").
+
+    Le schéma (schema.SCHEMA_SQLITE) est créé à l'ouverture s'il n'existe pas. Une seule
+    connexion, protégée par un verrou : les accès d'un processus sont sérialisés,
+    ce qui suffit à une petite bibliothèque ou à une suite de tests. Les transactions
+    d'écriture commencent par BEGIN IMMEDIATE, ce qui tient lieu de SELECT ... FOR UPDATE
+    entre processus partageant un même fichier.
+    """
+
+    erreurs = (sqlite3.Error,)
+    inserer_ignorer = "INSERT OR IGNORE"
+    pour_modifier = ""
+
+    requete_page_catalogue = f"""
+    SELECT * FROM (SELECT 'livre', {PROJECTIONS["Livre"]} FROM Livre WHERE code > %s ORDER BY code LIMIT %s)
+    UNION ALL
+    SELECT * FROM (SELECT 'journal', {PROJECTIONS["Journal"]} FROM Journal WHERE code > %s ORDER BY code LIMIT %s)
+    UNION ALL
+    SELECT * FROM (SELECT 'dvd', {PROJECTIONS["Dvd"]} FROM Dvd WHERE code > %s ORDER BY code LIMIT %s)
+    ORDER BY 2
+    LIMIT %s
+    """
+
+    requete_emprunt = """
+    INSERT INTO Emprunt (code, type_document, num_usager, statut, date_debut, date_fin, nb_emprunts)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (code) DO UPDATE SET
+        num_usager = excluded.num_usager,
+        statut = excluded.statut,
+        date_debut = excluded.date_debut,
+        date_fin = excluded.date_fin,
+        nb_emprunts = nb_emprunts + excluded.nb_emprunts
+    """
+
+    def __init__(self, chemin: str = ":memory:"):
+        self.chemin: str = chemin
+        self._verrou = threading.RLock()
+        self._cnx = sqlite3.connect(chemin, timeout=5.0, isolation_level=None, check_same_thread=False,
+                                    detect_types=sqlite3.PARSE_DECLTYPES, factory=_ConnexionSQLite)
+        if chemin != ":memory:":
+            self._cnx.execute("PRAGMA journal_mode=WAL")
+        self._cnx.executescript(SCHEMA_SQLITE)
+
+    @contextmanager
+    def _connexion(self):
+        with self._verrou:
+            try:
+                yield self._cnx
+            finally:
+                if self._cnx.in_transaction:
+                    self._cnx.rollback()
+
+    def _commencer(self, cursor) -> None:
+        cursor.execute("BEGIN IMMEDIATE")
+
+    def _upsert(self, table: str, colonnes: tuple[str, ...]) -> str:
+        mises_a_jour = ", ".join(f"{colonne} = excluded.{colonne}" for colonne in colonnes[1:])
+        return (f"INSERT INTO {table} ({', '.join(colonnes)}) VALUES ({', '.join(['%s'] * len(colonnes))}) "
+                f"ON CONFLICT ({colonnes[0]}) DO UPDATE SET {mises_a_jour}")
+
+    def _requete_dates(self, table: str, marqueurs: str) -> str:
+        return f"""
+        UPDATE {table}
+        SET date_debut_emprunt = (SELECT date_debut FROM Emprunt WHERE Emprunt.code = {table}.code),
+            date_fin_emprunt = (SELECT date_fin FROM Emprunt WHERE Emprunt.code = {table}.code)
+        WHERE code IN ({marqueurs})
+        """
+
+    # la connexion est partagée : pas de curseur gardé ouvert entre deux pages
+    parcourir = Depot.parcourir
+
+
+class DepotMemoire(Depot):
+    """
+    Dépôt en mémoire : les tables sont des dictionnaires du processus, rien n'est persisté.
+
+    Mêmes lignes et même comportement que les dépôts SQL (contrainte d'unicité des cotes, des
+    logins et des réservations comprise) ; chaque méthode est atomique sous un verrou.
+    """
+
+    def __init__(self):
+        self._verrou = threading.RLock()
+        self._tables: dict[str, dict[str, tuple]] = {table: {} for table in FAMILLES}
+        # cotes triées de chaque table, pour la pagination par clé
+        self._cotes: dict[str, list[str]] = {table: [] for table in FAMILLES}
+        self._personnes: dict[str, LignePersonne] = {}
+        self._logins: dict[str, str] = {}
+        self._emprunts: dict[str, LigneEmprunt] = {}
+        self._reservations: dict[int, LigneReservation] = {}
+        self._prochain_id: int = 1
+
+    @staticmethod
+    def _ligne(table: str, valeurs: dict, ancienne: tuple | None = None) -> tuple:
+        colonnes = COLONNES[table]
+        if ancienne is None:
+            ligne = (valeurs.get(colonne, DEFAUTS.get(colonne)) for colonne in colonnes)
+        else:
+            ligne = (valeurs.get(colonne, ancienne[i]) for i, colonne in enumerate(colonnes))
+        # les bases SQL rendent les booléens sous forme d'entiers
+        return LIGNES[table]._make(int(valeur) if isinstance(valeur, bool) else valeur for valeur in ligne)
+
+    def document(self, table: str, code: str) -> list[tuple]:
+        with self._verrou:
+            row = self._tables[table].get(code)
+        return [] if row is None else [row]
+
+    def documents(self, table: str, codes: list[str]) -> list[tuple]:
+        with self._verrou:
+            lignes = self._tables[table]
+            return [lignes[code] for code in dict.fromkeys(codes) if code in lignes]
+
+    def page(self, table: str, after: str | None, limit: int) -> list[tuple]:
+        with self._verrou:
+            cotes = self._cotes[table]
+            debut = 0 if after is None else bisect.bisect_right(cotes, after)
+            lignes = self._tables[table]
+            return [lignes[code] for code in cotes[debut:debut + limit]]
+
+    def tous(self, table: str) -> list[tuple]:
+        with self._verrou:
+            return list(self._tables[table].values())
+
+    def codes(self, table: str) -> list[str]:
+        with self._verrou:
+            return list(self._cotes[table])
+
+    def localiser(self, codes: list[str]) -> list[tuple[str, str]]:
+        with self._verrou:
+            return [(code, famille) for table, famille in FAMILLES.items()
+                    for code in dict.fromkeys(codes) if code in self._tables[table]]
+
+    def catalogue(self) -> list[tuple]:
+        with self._verrou:
+            return [(famille,) + row for table, famille in FAMILLES.items() for row in self._tables[table].values()]
+
+    def page_catalogue(self, after: str | None, limit: int) -> list[tuple]:
+        pages = [[(famille,) + row for row in self.page(table, after, limit)] for table, famille in FAMILLES.items()]
+        return [row for row, _ in zip(heapq.merge(*pages, key=lambda row: row[1]), range(limit))]
+
+    def _ecrire_document(self, table: str, valeurs: dict) -> None:
+        # insère ou remplace, appelé verrou tenu
+        lignes = self._tables[table]
+        code = valeurs["code"]
+        if code not in lignes:
+            bisect.insort(self._cotes[table], code)
+        lignes[code] = self._ligne(table, valeurs, lignes.get(code))
+
+    def inserer_document(self, table: str, valeurs: dict) -> bool:
+        with self._verrou:
+            if valeurs["code"] in self._tables[table]:
+                logger.info("Insertion de %s dans %s impossible : cote déjà présente", valeurs["code"], table)
+                return False
+            self._ecrire_document(table, valeurs)
+        return True
+
+    def modifier_document(self, table: str, code: str, valeurs: dict) -> bool:
+        with self._verrou:
+            lignes = self._tables[table]
+            if code not in lignes:
+                return False
+            lignes[code] = self._ligne(table, valeurs, lignes[code])
+        return True
+
+    def supprimer_document(self, table: str, code: str) -> bool:
+        with self._verrou:
+            if self._tables[table].pop(code, None) is None:
+                return False
+            cotes = self._cotes[table]
+            del cotes[bisect.bisect_left(cotes, code)]
+        return True
+
+    def ecrire_documents(self, table: str, colonnes: tuple[str, ...], lignes: list[tuple]) -> str | None:
+        with self._verrou:
+            for ligne in lignes:
+                self._ecrire_document(table, dict(zip(colonnes, ligne)))
+        return None
+
+    def personne(self, num: str) -> Profil | None:
+        with self._verrou:
+            row = self._personnes.get(num)
+        return None if row is None else Profil._make(row[:5])
+
+    def personne_par_login(self, login: str) -> LignePersonne | None:
+        with self._verrou:
+            num = self._logins.get(login)
+            return None if num is None else self._personnes[num]
+
+    def personnes_par_login(self, login: str) -> list[Profil]:
+        row = self.personne_par_login(login)
+        return [] if row is None else [Profil._make(row[:5])]
+
+    def personnes(self) -> list[Profil]:
+        with self._verrou:
+            return [Profil._make(row[:5]) for row in self._personnes.values()]
+
+    def inserer_personne(self, ligne: tuple) -> bool:
+        num, login = ligne[0], ligne[4]
+        with self._verrou:
+            if num in self._personnes or login in self._logins:
+                logger.info("Création de la personne %s impossible : numéro ou login déjà pris", num)
+                return False
+            self._personnes[num] = LignePersonne._make(ligne)
+            self._logins[login] = num
+        return True
+
+    def modifier_personne(self, num: str, perm: str, nom: str, prenom: str) -> bool:
+        with self._verrou:
+            ancienne = self._personnes.get(num)
+            if ancienne is None:
+                return False
+            self._personnes[num] = ancienne._replace(perm=perm, nom=nom, prenom=prenom)
+        return True
+
+    def supprimer_personne(self, num: str) -> bool:
+        with self._verrou:
+            ancienne = self._personnes.pop(num, None)
+            if ancienne is None:
+                return False
+            del self._logins[ancienne[4]]
+        return True
+
+    def remplacer_empreinte(self, num: str, ancienne: str, nouvelle: str) -> bool:
+        with self._verrou:
+            row = self._personnes.get(num)
+            if row is None or row.password != ancienne:
+                return False
+            self._personnes[num] = row._replace(password=nouvelle)
+        return True
+
+    def emprunt(self, code: str) -> tuple | None:
+        with self._verrou:
+            return self._emprunts.get(code)
+
+    def emprunts(self) -> list[tuple]:
+        with self._verrou:
+            return [row for row in self._emprunts.values() if row[3] != StatuEmprunt.Libre.name]
+
+    def compteurs(self) -> dict[str, int]:
+        with self._verrou:
+            return {code: row[6] for code, row in self._emprunts.items() if row[6] > 0}
+
+    def emprunts_en_retard(self, jour: datetime.date) -> list[tuple]:
+        statuts = (StatuEmprunt.Reserver.name, StatuEmprunt.Non_Rendue.name)
+        with self._verrou:
+            rows = [(row[0], row[1], row[2], row[3], row[5]) for row in self._emprunts.values()
+                    if row[3] in statuts and row[5] is not None and row[5] < jour]
+        return sorted(rows, key=lambda row: (row[4], row[0]))
+
+    def enregistrer_emprunts(self, changements: list[Changement]) -> set[str]:
+        refuses: set[str] = set()
+        with self._verrou:
+            for code, type_document, table, ancien, nouveau, num_usager, debut, fin in changements:
+                row = self._emprunts.get(code)
+                if (row[3] if row else StatuEmprunt.Libre.name) != ancien.name:
+                    refuses.add(code)
+                    continue
+                nouvel_emprunt = ancien == StatuEmprunt.Libre and nouveau == StatuEmprunt.Reserver
+                self._emprunts[code] = LigneEmprunt(
+                    code, type_document, None if nouveau == StatuEmprunt.Libre else num_usager,
+                    nouveau.name, debut, fin, (row.nb_emprunts if row else 0) + int(nouvel_emprunt))
+                lignes = self._tables[table]
+                if code in lignes:
+                    lignes[code] = self._ligne(table, {"date_debut_emprunt": debut, "date_fin_emprunt": fin},
+                                               lignes[code])
+        return refuses
+
+    def reservations(self) -> list[tuple]:
+        with self._verrou:
+            return sorted(self._reservations.values(), key=lambda row: (row[1], row[0]))
+
+    def ajouter_reservation(self, code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+        with self._verrou:
+            if any(row[1] == code and row[2] == num_usager for row in self._reservations.values()):
+                logger.info("Réservation de %s par %s impossible : déjà en file", code, num_usager)
+                return None
+            identifiant = self._prochain_id
+            self._prochain_id += 1
+            self._reservations[identifiant] = LigneReservation(identifiant, code, num_usager,
+                                                               datetime.datetime.now(), date_expiration)
+        return identifiant
+
+    def supprimer_reservations(self, reservations: list[tuple[str, str]]) -> bool:
+        supprimees = set(reservations)
+        with self._verrou:
+            for identifiant in [identifiant for identifiant, row in self._reservations.items()
+                                if (row[1], row[2]) in supprimees]:
+                del self._reservations[identifiant]
+        return True
+
+
+_depots: dict[tuple, Depot] = {}
+_depots_verrou = threading.Lock()
+
+
+def get_depot(config_db: dict) -> Depot:
+    """
+    Renvoie le dépôt du processus pour cette configuration, en le créant au premier appel.
+
+    :param config_db: La configuration, dont la clé facultative "stockage".
+    :return: Le dépôt partagé pour cette configuration.
+    :rtype: Depot
+    :raises ValueError: Si le type de stockage est inconnu.
+    """
+    cle = tuple(sorted((k, str(v)) for k, v in config_db.items()))
+    depot = _depots.get(cle)
+    if depot is None:
+        with _depots_verrou:
+            depot = _depots.get(cle)
+            if depot is None:
+                stockage = type_stockage(config_db)
+                if stockage == "mysql":
+                    depot = DepotMySQL(config_db)
+                elif stockage == "sqlite":
+                    depot = DepotSQLite(config_db["stockage"].get("chemin", ":memory:"))
+                elif stockage == "memoire":
+                    depot = DepotMemoire()
+                else:
+                    raise ValueError(f"Type de stockage inconnu : {stockage}")
+                _depots[cle] = depot
+    return depot
@@ -1,5 +1,46 @@
 import datetime
-from databaseconnection import connect_to_mysql
+import weakref
+from collections.abc import Callable, Iterator
+from cache import cache_documents, version_catalogue
+from depot import get_depot
+from verrous import verrous_documents
+
+# Taille de page maximale acceptée par get_page
+LIMITE_MAX: int = 500
+
+# Bits de Document._etat ; les bits de poids fort donnent l'indice de la configuration de base
+_EST_RESERVER, _SUR_PLACE, _ONLINE, _ATTENTE = 1, 2, 4, 8
+_BITS_DRAPEAUX: int = 4
+_MASQUE_DRAPEAUX: int = (1 << _BITS_DRAPEAUX) - 1
+# Date des documents sans emprunt, en ordinal : un seul objet int partagé par tous
+_DATE_NULLE: int = datetime.date(1971, 1, 1).toordinal()
+
+
+def _drapeau(bit: int) -> property:
+    """
+    Propriété booléenne stockée dans un bit de Document._etat.
+    """
+    def lire(self) -> bool:
+        return bool(self._etat & bit)
+
+    def ecrire(self, valeur: bool) -> None:
+        self._etat = self._etat | bit if valeur else self._etat & ~bit
+
+    return property(lire, ecrire)
+
+
+def _date(attribut: str) -> property:
+    """
+    Propriété datetime.date stockée en ordinal (int) dans l'attribut donné.
+    """
+    def lire(self) -> datetime.date:
+        return datetime.date.fromordinal(getattr(self, attribut))
+
+    def ecrire(self, valeur: datetime.date) -> None:
+        ordinal = valeur.toordinal()
+        setattr(self, attribut, _DATE_NULLE if ordinal == _DATE_NULLE else ordinal)
+
+    return property(lire, ecrire)
 
 
 class Document:
@@ -17,6 +58,15 @@ class Document:
         _date_fin_emprunt (datetime.datetime): La date de fin de l'emprunt du document. Initialisée à une valeur par défaut.
         _date_debut_emprunt (datetime.datetime): La date de début de l'emprunt du document. Initialisée à une valeur par défaut.
 
+    Représentation mémoire:
+        Les documents utilisent __slots__ : les quatre booléens sont des bits de _etat, dont les bits de poids
+        fort donnent l'indice de config_db dans Document._configs (partagé par tous les documents), et les dates
+        sont stockées en ordinaux (int). Les attributs ci-dessus restent accessibles sous forme de propriétés.
+
+    Identité:
+        Deux documents sont égaux, et ont le même hash, s'ils ont la même cote. depuis_ligne renvoie toujours
+        le même objet pour une cote tant qu'il est référencé (carte d'identité faible).
+
     Méthodes:
         __init__(self, code: str, salle: str, sur_place: bool = False, est_reserver: bool = False, online: bool = False):
             Initialise un nouvel objet Document avec les informations fournies, y compris le code du document,
@@ -37,28 +87,126 @@ class Document:
         rendue(self, num_usager: str) -> dict:
             Marque un document comme rendu par un usager spécifique. Renvoie un dictionnaire avec un message et un code
             de statut.
+
+        fin_attente(self) -> dict:
+            Libère un document mis de côté (mise_en_attente) qui n'a pas été emprunté. Renvoie un dictionnaire avec un
+            message et un code de statut.
+
+        get_many(cls, config_db: dict, codes: list[str]) -> list[tuple]:
+            Récupère plusieurs enregistrements de la table du document en une seule requête.
+
+        get_page(cls, config_db: dict, after: str | None = None, limit: int = 50) -> list[tuple]:
+            Récupère une page d'enregistrements de la table du document, triés par code, après la cote `after`.
+
+        get_async(cls, config_db: dict, code: str) -> list[tuple]:
+        get_many_async(cls, config_db: dict, codes: list[str]) -> list[tuple]:
+        get_page_async(cls, config_db: dict, after: str | None = None, limit: int = 50) -> list[tuple]:
+            Versions asynchrones (coroutines) de get, get_many et get_page, utilisées par l'application ASGI.
+
+        iter_all(cls, config_db: dict, taille_lot: int = 500) -> Iterator[tuple]:
+            Parcourt tous les enregistrements de la table du document par lots, sans les charger tous en mémoire.
+
+        vivant(code: str) -> Document | None:
+            Renvoie l'objet qui représente la cote s'il est encore en mémoire (voir depuis_ligne des sous-classes).
+
+        abonner(observateur: Callable[[str, str, str | None], None]) -> None:
+            Enregistre une fonction appelée après chaque insert, update ou delete réussi, avec l'action,
+            le type de document et la cote (None quand toute une famille a changé).
+
+        desabonner(observateur: Callable[[str, str, str | None], None]) -> None:
+            Retire une fonction enregistrée par abonner.
     """
 
+    __slots__ = ("code", "salle", "_num", "_etat", "_debut", "_fin", "__weakref__")
+
     num_document: int = 0
+    table: str = ""
+    type_document: str = ""
+    _observateurs: list[Callable[[str, str, str | None], None]] = []
+    # Configurations de base partagées par les documents, repérées par leur indice dans _etat
+    _configs: list[dict] = []
+    # Carte d'identité : l'objet vivant de chaque cote construit par depuis_ligne
+    _vivants: "weakref.WeakValueDictionary[str, Document]" = weakref.WeakValueDictionary()
 
     def __init__(self, code: str, salle: str, config_db: dict, sur_place: bool = False, est_reserver: bool = False,
                  online: bool = False, attente: bool = False):
         self.code: str = code
         self._num: str = "NA"
         self.salle: str = salle
-        self._est_reserver: bool = est_reserver
-        self.sur_place: bool = sur_place
-        self.online: bool = online
-        self._attente: bool = attente
-        self._date_fin_emprunt: datetime.datetime.date = datetime.datetime(1971, 1, 1).date()
-        self._date_debut_emprunt: datetime.datetime.date = datetime.datetime(1971, 1, 1).date()
-
-        # connexion à la base
-        self.config_db: dict = config_db
+        self._etat: int = (Document._indice_config(config_db) << _BITS_DRAPEAUX
+                           | _EST_RESERVER * bool(est_reserver) | _SUR_PLACE * bool(sur_place)
+                           | _ONLINE * bool(online) | _ATTENTE * bool(attente))
+        self._debut: int = _DATE_NULLE
+        self._fin: int = _DATE_NULLE
 
         # increase number of docs
         Document.num_document += 1
 
+    _est_reserver = _drapeau(_EST_RESERVER)
+    sur_place = _drapeau(_SUR_PLACE)
+    online = _drapeau(_ONLINE)
+    _attente = _drapeau(_ATTENTE)
+    _date_debut_emprunt = _date("_debut")
+    _date_fin_emprunt = _date("_fin")
+
+    @staticmethod
+    def _indice_config(config_db: dict) -> int:
+        # une bibliothèque passe la même configuration à tous ses documents : la liste reste très courte
+        for indice, config in enumerate(Document._configs):
+            if config is config_db:
+                return indice
+        Document._configs.append(config_db)
+        return len(Document._configs) - 1
+
+    def __eq__(self, other: object) -> bool:
+        # une cote désigne un seul document, quel que soit l'objet qui le représente
+        if not isinstance(other, Document):
+            return NotImplemented
+        return self.code == other.code
+
+    def __hash__(self) -> int:
+        return hash(self.code)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.code!r})"
+
+    @staticmethod
+    def vivant(code: str) -> "Document | None":
+        """
+        Renvoie l'objet vivant qui représente la cote, s'il en existe un.
+
+        :param code: La cote du document.
+        :return: Le document construit par depuis_ligne et encore référencé, ou None.
+        :rtype: Document | None
+        """
+        return Document._vivants.get(code)
+
+    @staticmethod
+    def _unique(document: "Document") -> "Document":
+        """
+        Enregistre document dans la carte d'identité, ou, si sa cote a déjà un objet vivant
+        du même type, recopie sur celui-ci les informations du catalogue (l'état de l'emprunt
+        est conservé) et le renvoie.
+        """
+        vivant = Document._vivants.get(document.code)
+        if type(vivant) is not type(document):
+            Document._vivants[document.code] = document
+            return document
+
+        vivant.salle, vivant.sur_place, vivant.online = document.salle, document.sur_place, document.online
+        vivant.config_db = document.config_db
+        for attribut in type(document).__slots__:
+            setattr(vivant, attribut, getattr(document, attribut))
+        return vivant
+
+    @property
+    def config_db(self) -> dict:
+        return Document._configs[self._etat >> _BITS_DRAPEAUX]
+
+    @config_db.setter
+    def config_db(self, config_db: dict) -> None:
+        self._etat = Document._indice_config(config_db) << _BITS_DRAPEAUX | self._etat & _MASQUE_DRAPEAUX
+
     def reserver_sur_place(self, num_usager: str) -> dict:
         """
         Réserve un document pour être emprunté sur place.
@@ -68,35 +216,57 @@ class Document:
         :return: Dictionnaire contenant un message et un statut.
         :rtype: dict
         """
-        if self._est_reserver:
-            return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
+        with verrous_documents.pour(self.code):
+            if self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
 
-        self._num: str = num_usager
-        self._est_reserver: bool = True
-        self._attente: bool = False
-        self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
-        self._date_fin_emprunt: datetime.datetime = datetime.datetime.now() + datetime.timedelta(weeks=2)
+            self._num: str = num_usager
+            self._est_reserver: bool = True
+            self._attente: bool = False
+            self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
+            self._date_fin_emprunt: datetime.datetime = datetime.datetime.now() + datetime.timedelta(weeks=2)
 
-        return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
+            return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
 
-    def mise_en_attente(self, num_usager: str) -> dict:
+    def mise_en_attente(self, num_usager: str, date_fin: datetime.date | None = None) -> dict:
         """
         Réserve un document pour être emprunté sur place.
 
         :param num_usager: Le numéro d'identification de l'usager qui réserve le document.
         :paramtype num_usager: str
+        :param date_fin: La date jusqu'à laquelle le document est mis de côté, dans deux semaines par défaut.
+        :paramtype date_fin: datetime.date | None
+        :return: Dictionnaire contenant un message et un statut.
+        :rtype: dict
+        """
+        with verrous_documents.pour(self.code):
+            if self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
+
+            self._num: str = num_usager
+            self._attente: bool = True
+            self._date_debut_emprunt: datetime.datetime = datetime.datetime.now().date()
+            self._date_fin_emprunt: datetime.datetime = date_fin or datetime.datetime.now() + datetime.timedelta(weeks=2)
+
+            return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
+
+    def fin_attente(self) -> dict:
+        """
+        Libère un document mis de côté qui n'a pas été emprunté.
+
         :return: Dictionnaire contenant un message et un statut.
         :rtype: dict
         """
-        if self._est_reserver:
-            return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
+        with verrous_documents.pour(self.code):
+            if not self._attente or self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} n'est pas mis de côté.", "status": 500}
 
-        self._num: str = num_usager
-        self._attente: bool = True
-        self._date_debut_emprunt: datetime.datetime = datetime.datetime.now().date()
-        self._date_fin_emprunt: datetime.datetime = datetime.datetime.now() + datetime.timedelta(weeks=2)
+            self._num: str = "NA"
+            self._attente: bool = False
+            self._date_debut_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
+            self._date_fin_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
 
-        return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
+            return {"message": f"Le document dont le code est {self.code} n'est plus mis de côté.", "status": 200}
 
     def reserver_online(self, num_usager: str) -> dict:
         """
@@ -107,18 +277,19 @@ class Document:
         :return: Dictionnaire contenant un message et un statut.
         :rtype: dict
         """
-        if not self._online and self._est_reserver:
-            return {"message": f"Le document dont le code est {self.code} ne peut pas être réservé en ligne !",
-                    "status": 500}
+        with verrous_documents.pour(self.code):
+            if not self.online and self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} ne peut pas être réservé en ligne !",
+                        "status": 500}
 
-        self._num: str = num_usager
-        self._est_reserver: bool = True
-        self._attente: bool = False
-        self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
-        self._date_fin_emprunt: datetime.datetime = datetime.datetime.now() + datetime.timedelta(weeks=2)
+            self._num: str = num_usager
+            self._est_reserver: bool = True
+            self._attente: bool = False
+            self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
+            self._date_fin_emprunt: datetime.datetime = datetime.datetime.now() + datetime.timedelta(weeks=2)
 
-        return {"message": f"Le document dont le code est {self.code} est réservé en ligne avec succès !",
-                "status": 200}
+            return {"message": f"Le document dont le code est {self.code} est réservé en ligne avec succès !",
+                    "status": 200}
 
     def reserver_emprunt(self, num_usager: str) -> dict:
         """
@@ -129,16 +300,17 @@ class Document:
         :return: Dictionnaire contenant un message et un statut.
         :rtype: dict
         """
-        if self._est_reserver:
-            return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
+        with verrous_documents.pour(self.code):
+            if self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} est déjà réservé !", "status": 500}
 
-        self._num: str = num_usager
-        self._est_reserver: bool = True
-        self._attente: bool = False
-        self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
-        self._date_fin_emprunt: datetime.datetime.date = datetime.datetime.now().date() + datetime.timedelta(weeks=2)
+            self._num: str = num_usager
+            self._est_reserver: bool = True
+            self._attente: bool = False
+            self._date_debut_emprunt: datetime.datetime.date = datetime.datetime.now().date()
+            self._date_fin_emprunt: datetime.datetime.date = datetime.datetime.now().date() + datetime.timedelta(weeks=2)
 
-        return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
+            return {"message": f"Le document dont le code est {self.code} est réservé avec succès !", "status": 200}
 
     def rendue(self, num_usager: str) -> dict:
         """
@@ -149,15 +321,202 @@ class Document:
         :return: Dictionnaire contenant un message et un statut.
         :rtype: dict
         """
-        if not self._est_reserver:
-            return {"message": f"Le document dont le code est {self.code} n'est pas réservé.", "status": 500}
+        with verrous_documents.pour(self.code):
+            if not self._est_reserver:
+                return {"message": f"Le document dont le code est {self.code} n'est pas réservé.", "status": 500}
+
+            self._num: str = num_usager
+            self._est_reserver: bool = False
+            self._date_debut_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
+            self._date_fin_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
+
+            return {"message": f"Le document dont le code est {self.code} a bien été rendu !", "status": 200}
+
+    @staticmethod
+    def abonner(observateur: Callable[[str, str, str | None], None]) -> None:
+        """
+        Abonne une fonction aux modifications du catalogue.
+
+        :param observateur: Fonction appelée avec (action, type_document, code) après chaque
+            insert, update ou delete réussi ; code vaut None si toute la famille a changé.
+        """
+        Document._observateurs.append(observateur)
+
+    @staticmethod
+    def desabonner(observateur: Callable[[str, str, str | None], None]) -> None:
+        """
+        Retire une fonction abonnée par abonner ; sans effet si elle ne l'est pas.
+
+        :param observateur: La fonction (ou méthode liée) passée à abonner.
+        """
+        try:
+            Document._observateurs.remove(observateur)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def notifier(action: str, type_document: str, code: str | None = None) -> None:
+        """
+        Prévient les observateurs d'une écriture réussie dans le catalogue.
+
+        :param action: "insert", "update", "delete" ou "import".
+        :param type_document: Le type des documents modifiés.
+        :param code: La cote du document modifié, None si toute la famille a pu changer.
+        """
+        # copie : un observateur peut se désabonner pendant la notification
+        for observateur in tuple(Document._observateurs):
+            observateur(action, type_document, code)
+
+    def _notifier(self, action: str) -> None:
+        """
+        Prévient les observateurs qu'une écriture a réussi sur ce document.
+
+        :param action: "insert", "update" ou "delete".
+        """
+        Document.notifier(action, self.type_document, self.code)
+
+    @classmethod
+    def get_many(cls, config_db: dict, codes: list[str]) -> list[tuple]:
+        """
+        Récupère plusieurs documents de la table en une seule requête `IN (...)`.
+
+        Les cotes déjà présentes dans le cache des pages de détail ne sont pas redemandées
+        à la base ; celles qui sont lues y sont ajoutées.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param codes: Les cotes recherchées.
+        :return: Les enregistrements trouvés (les cotes inconnues sont ignorées).
+        :rtype: list[tuple]
+        """
+        rows: list[tuple] = []
+        manquants: list[str] = []
+        for code in dict.fromkeys(codes):
+            cached = cache_documents.get((cls.type_document, code))
+            if cached is None:
+                manquants.append(code)
+            else:
+                rows.extend(cached)
+
+        if manquants:
+            lus = get_depot(config_db).documents(cls.table, manquants)
+            if lus is not None:
+                cls._mettre_en_cache(manquants, lus)
+                rows.extend(lus)
+
+        return rows
+
+    @classmethod
+    def _mettre_en_cache(cls, codes: list[str], lus: list[tuple]) -> None:
+        # une cote absente est mise en cache comme telle : elle ne sera pas redemandée
+        trouves = {row.code: row for row in lus}
+        for code in codes:
+            cache_documents.set((cls.type_document, code), [trouves[code]] if code in trouves else [])
+
+    @classmethod
+    def get_page(cls, config_db: dict, after: str | None = None, limit: int = 50) -> list[tuple]:
+        """
+        Récupère une page d'enregistrements triés par code (pagination par clé).
+
+        La page commence juste après la cote `after`, ce qui permet à l'index de la clé
+        primaire de sauter directement au bon endroit quelle que soit la profondeur de la page.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param after: La dernière cote de la page précédente, None pour la première page.
+        :param limit: Le nombre maximal d'enregistrements (borné à LIMITE_MAX).
+        :return: Une liste de tuples contenant les enregistrements de la page.
+        :rtype: list[tuple]
+        """
+        limit = max(1, min(limit, LIMITE_MAX))
+        return get_depot(config_db).page(cls.table, after, limit)
+
+    @classmethod
+    async def get_async(cls, config_db: dict, code: str) -> list[tuple]:
+        """
+        Version asynchrone de get, pour l'application ASGI : partage le même cache.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param code: La cote du document.
+        :return: Une liste contenant l'enregistrement du document (vide si la cote est inconnue).
+        :rtype: list[tuple]
+        """
+        cle = (cls.type_document, code)
+        rows = cache_documents.get(cle)
+        if rows is not None:
+            return rows
+
+        rows = await get_depot(config_db).document_async(cls.table, code)
+        if rows is not None:
+            cache_documents.set(cle, rows)
+        return rows
+
+    @classmethod
+    async def get_many_async(cls, config_db: dict, codes: list[str]) -> list[tuple]:
+        """
+        Version asynchrone de get_many.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param codes: Les cotes recherchées.
+        :return: Les enregistrements trouvés (les cotes inconnues sont ignorées).
+        :rtype: list[tuple]
+        """
+        rows: list[tuple] = []
+        manquants: list[str] = []
+        for code in dict.fromkeys(codes):
+            cached = cache_documents.get((cls.type_document, code))
+            if cached is None:
+                manquants.append(code)
+            else:
+                rows.extend(cached)
+
+        if manquants:
+            lus = await get_depot(config_db).documents_async(cls.table, manquants)
+            if lus is not None:
+                cls._mettre_en_cache(manquants, lus)
+                rows.extend(lus)
+
+        return rows
+
+    @classmethod
+    async def get_page_async(cls, config_db: dict, after: str | None = None, limit: int = 50) -> list[tuple]:
+        """
+        Version asynchrone de get_page.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param after: La dernière cote de la page précédente, None pour la première page.
+        :param limit: Le nombre maximal d'enregistrements (borné à LIMITE_MAX).
+        :return: Une liste de tuples contenant les enregistrements de la page.
+        :rtype: list[tuple]
+        """
+        limit = max(1, min(limit, LIMITE_MAX))
+        return await get_depot(config_db).page_async(cls.table, after, limit)
+
+    @classmethod
+    def iter_all(cls, config_db: dict, taille_lot: int = 500) -> Iterator[tuple]:
+        """
+        Parcourt tous les enregistrements de la table par lots de `taille_lot` lignes.
+
+        Contrairement à get_all, les lignes sont lues au fil de l'eau (voir Depot.parcourir) :
+        la mémoire utilisée ne dépend pas de la taille de la table. Avec MySQL, la connexion
+        reste empruntée au pool tant que le générateur n'est pas épuisé ou fermé.
+
+        :param config_db: La configuration de connexion à la base de données.
+        :param taille_lot: Le nombre de lignes lues à chaque aller-retour.
+        :return: Un générateur de tuples.
+        :rtype: Iterator[tuple]
+        :raises ErreurDepot: Si la lecture échoue en cours de parcours.
+        """
+        yield from get_depot(config_db).parcourir(cls.table, taille_lot)
+
+
+def _invalider_cache(action: str, type_document: str, code: str | None) -> None:
+    version_catalogue.incrementer()
+    if code is None:
+        cache_documents.invalider_si(lambda cle: cle[0] == type_document)
+    else:
+        cache_documents.invalider((type_document, code))
 
-        self._num: str = num_usager
-        self._est_reserver: bool = False
-        self._date_debut_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
-        self._date_fin_emprunt: datetime.datetime = datetime.datetime(1971, 1, 1)
 
-        return {"message": f"Le document dont le code est {self.code} a bien été rendu !", "status": 200}
+Document.abonner(_invalider_cache)
 
 
 if __name__ == "__main__":
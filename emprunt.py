@@ -0,0 +1,144 @@
+import datetime
+from depot import get_depot
+from document import Document
+from statuemprunt import StatuEmprunt
+
+# Date utilisée par Document pour « pas d'emprunt en cours »
+DATE_VIDE: datetime.date = datetime.date(1971, 1, 1)
+
+
+def _date_sql(valeur: datetime.date | datetime.datetime | None) -> datetime.date | None:
+    if valeur is None:
+        return None
+    if isinstance(valeur, datetime.datetime):
+        valeur = valeur.date()
+    return None if valeur == DATE_VIDE else valeur
+
+
+class Emprunt:
+    """
+    Dépôt de l'état d'emprunt des documents (table Emprunt).
+
+    Une ligne par document déjà sorti au moins une fois : statut courant, usager, dates
+    de l'emprunt en cours et nombre total d'emprunts. Un document sans ligne est libre.
+    C'est la source de vérité ; Bibliotheques.livres n'en est qu'un cache en mémoire.
+
+    Colonnes :
+    ----------
+    code, type_document, num_usager, statut, date_debut, date_fin, nb_emprunts
+
+    Méthodes :
+    ----------
+    get(config_db: dict, code: str) -> tuple | None:
+        Récupère l'état d'emprunt d'un document.
+
+    get_all(config_db: dict) -> list[tuple]:
+        Récupère l'état d'emprunt de tous les documents qui ne sont pas libres.
+
+    compteurs(config_db: dict) -> dict[str, int]:
+        Récupère le nombre d'emprunts de chaque document déjà emprunté.
+
+    en_retard(config_db: dict, jour: datetime.date) -> list[tuple] | None:
+        Récupère les emprunts en cours ou non rendus dont la date de fin est passée.
+
+    enregistrer_lot(config_db: dict, changements: list[tuple[Document, StatuEmprunt, StatuEmprunt]]) -> set[str] | None:
+        Enregistre le nouvel état de plusieurs documents en une seule transaction, à condition
+        que leur statut en base n'ait pas changé entre-temps.
+    """
+
+    @staticmethod
+    def get(config_db: dict, code: str) -> tuple | None:
+        """
+        Récupère l'état d'emprunt d'un document.
+
+        Paramètres :
+        ------------
+        code : str
+            La cote du document.
+
+        Retourne :
+        ----------
+        tuple | None : La ligne de la table Emprunt, None si le document n'a jamais été emprunté.
+        """
+        return get_depot(config_db).emprunt(code)
+
+    @staticmethod
+    def get_all(config_db: dict) -> list[tuple]:
+        """
+        Récupère l'état d'emprunt de tous les documents qui ne sont pas libres.
+
+        Retourne :
+        ----------
+        list[tuple] : Les lignes de la table Emprunt dont le statut n'est pas Libre.
+        """
+        return get_depot(config_db).emprunts()
+
+    @staticmethod
+    def compteurs(config_db: dict) -> dict[str, int]:
+        """
+        Récupère le nombre d'emprunts de chaque document déjà emprunté.
+
+        Retourne :
+        ----------
+        dict[str, int] : Le nombre total d'emprunts par cote (les documents jamais empruntés sont absents).
+        """
+        return get_depot(config_db).compteurs()
+
+    @staticmethod
+    def en_retard(config_db: dict, jour: datetime.date) -> list[tuple] | None:
+        """
+        Récupère les emprunts en cours ou non rendus dont la date de fin est antérieure à `jour`.
+
+        Avec une base SQL, l'index (statut, date_fin) limite la lecture aux lignes en retard.
+
+        Paramètres :
+        ------------
+        jour : datetime.date
+            La date de référence.
+
+        Retourne :
+        ----------
+        list[tuple] | None : (code, type_document, num_usager, statut, date_fin), triés par date de fin,
+        None si la base est inaccessible.
+        """
+        return get_depot(config_db).emprunts_en_retard(jour)
+
+    @staticmethod
+    def enregistrer_lot(config_db: dict, changements: list[tuple[Document, StatuEmprunt, StatuEmprunt]]) -> set[str] | None:
+        """
+        Enregistre le nouvel état d'emprunt de plusieurs documents en une seule transaction.
+
+        Chaque changement n'est appliqué que si le statut en base est toujours celui attendu
+        (lignes verrouillées par le dépôt, SELECT ... FOR UPDATE sous MySQL) : si un autre
+        processus a emprunté ou rendu le document entre-temps, le changement est refusé. Le nombre d'allers-retours
+        ne dépend pas de la taille du lot.
+
+        Les dates d'emprunt affichées par les pages de détail (colonnes date_debut_emprunt et
+        date_fin_emprunt des tables de documents) sont mises à jour dans la même transaction.
+
+        Paramètres :
+        ------------
+        changements : list[tuple[Document, StatuEmprunt, StatuEmprunt]]
+            Pour chaque document : le statut attendu en base et le nouveau statut.
+
+        Retourne :
+        ----------
+        set[str] | None : Les cotes dont le changement a été refusé, None si la transaction a échoué
+        (rien n'est écrit).
+        """
+        if not changements:
+            return set()
+
+        refuses = get_depot(config_db).enregistrer_emprunts([
+            (document.code, document.type_document, document.table, ancien, nouveau, document._num,
+             _date_sql(document._date_debut_emprunt), _date_sql(document._date_fin_emprunt))
+            for document, ancien, nouveau in changements
+        ])
+        if refuses is None:
+            return None
+
+        # les pages de détail affichent les dates d'emprunt
+        for document, _, _ in changements:
+            if document.code not in refuses:
+                Document.notifier("emprunt", document.type_document, document.code)
+        return refuses
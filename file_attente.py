@@ -0,0 +1,458 @@
+"""
+Files d'attente de réservation des documents.
+
+Chaque document emprunté peut avoir une file FIFO d'usagers qui l'attendent. La
+file garde ses entrées dans l'ordre d'arrivée ; une annulation laisse un trou,
+et un arbre de Fenwick sur les entrées encore présentes donne la position d'un
+usager en O(log n). Ajout, annulation, position et retrait du premier coûtent
+O(log n) (amorti pour le retrait, les trous étant compactés par moitié).
+
+Quand un document est rendu, l'usager en tête de file est promu : le document
+lui est mis de côté (statut En_Attente) jusqu'à ce qu'il vienne l'emprunter, dans
+un délai de retrait enregistré comme date de fin dans la table Emprunt. Passé ce
+délai, le document est libéré et aussitôt mis de côté pour l'usager suivant. Une
+réservation non servie expire elle aussi après un délai. Les files sont enregistrées
+dans la table Reservation (voir reservation.py et la migration 4 de schema.py).
+"""
+import datetime
+import logging
+import threading
+from bibiotheques import Bibliotheques
+from document import Document
+from reservation import Reservation
+from statuemprunt import StatuEmprunt
+
+logger = logging.getLogger(__name__)
+
+
+class FileAttente:
+    """
+    File FIFO des usagers qui attendent un document.
+
+    Méthodes :
+    ----------
+    ajouter(num_usager: str, expiration: int) -> int:
+        Ajoute un usager en fin de file et renvoie sa position (à partir de 1).
+
+    retirer(num_usager: str) -> bool:
+        Retire un usager de la file, où qu'il soit.
+
+    position(num_usager: str) -> int | None:
+        Renvoie la position de l'usager dans la file (1 pour le premier), None s'il n'y est pas.
+
+    premier() -> tuple[str, int] | None:
+        Renvoie l'usager en tête de file et l'expiration (ordinal) de sa réservation.
+    """
+
+    def __init__(self):
+        # entrées dans l'ordre d'arrivée ; None marque une entrée retirée
+        self._usagers: list[str | None] = []
+        self._expirations: list[int] = []
+        # arbre de Fenwick (indexé à partir de 1) : 1 par entrée présente
+        self._arbre: list[int] = [0]
+        self._index: dict[str, int] = {}
+        self._tete: int = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, num_usager: str) -> bool:
+        return num_usager in self._index
+
+    def __iter__(self):
+        return (usager for usager in self._usagers[self._tete:] if usager is not None)
+
+    def _prefixe(self, fin: int) -> int:
+        # nombre d'entrées présentes parmi les `fin` premières
+        total = 0
+        while fin > 0:
+            total += self._arbre[fin]
+            fin -= fin & -fin
+        return total
+
+    def _modifier(self, indice: int, delta: int) -> None:
+        indice += 1
+        while indice < len(self._arbre):
+            self._arbre[indice] += delta
+            indice += indice & -indice
+
+    def ajouter(self, num_usager: str, expiration: int) -> int:
+        if num_usager in self._index:
+            return self.position(num_usager)
+
+        indice = len(self._usagers)
+        self._usagers.append(num_usager)
+        self._expirations.append(expiration)
+        # le nœud n couvre les entrées (n - lowbit(n), n] : la nouvelle et celles déjà présentes avant elle
+        noeud = indice + 1
+        self._arbre.append(1 + self._prefixe(noeud - 1) - self._prefixe(noeud - (noeud & -noeud)))
+        self._index[num_usager] = indice
+        return len(self._index)
+
+    def retirer(self, num_usager: str) -> bool:
+        indice = self._index.pop(num_usager, None)
+        if indice is None:
+            return False
+        self._usagers[indice] = None
+        self._modifier(indice, -1)
+        self._avancer()
+        return True
+
+    def position(self, num_usager: str) -> int | None:
+        indice = self._index.get(num_usager)
+        if indice is None:
+            return None
+        return self._prefixe(indice + 1)
+
+    def premier(self) -> tuple[str, int] | None:
+        if not self._index:
+            return None
+        return self._usagers[self._tete], self._expirations[self._tete]
+
+    def _avancer(self) -> None:
+        # la tête pointe toujours sur une entrée présente (ou la fin de la file)
+        while self._tete < len(self._usagers) and self._usagers[self._tete] is None:
+            self._tete += 1
+        if self._tete > 64 and 2 * self._tete > len(self._usagers):
+            self._compacter()
+
+    def _compacter(self) -> None:
+        presents = [(usager, expiration) for usager, expiration in zip(self._usagers, self._expirations)
+                    if usager is not None]
+        self._usagers = [usager for usager, _ in presents]
+        self._expirations = [expiration for _, expiration in presents]
+        self._index = {usager: indice for indice, usager in enumerate(self._usagers)}
+        self._tete = 0
+        # construction de l'arbre en O(n) : chaque nœud se reporte sur son parent
+        arbre = [0] + [1] * len(presents)
+        for noeud in range(1, len(arbre)):
+            parent = noeud + (noeud & -noeud)
+            if parent < len(arbre):
+                arbre[parent] += arbre[noeud]
+        self._arbre = arbre
+
+
+class ReservationsAttente:
+    """
+    Files d'attente de réservation des documents d'une bibliothèque.
+
+    Attributs :
+    -----------
+    bibio : Bibliotheques
+        La bibliothèque dont les documents sont réservés (son état doit être chargé).
+    delai : datetime.timedelta
+        La durée de validité d'une réservation non servie.
+    delai_retrait : datetime.timedelta
+        La durée pendant laquelle un document mis de côté attend son usager.
+
+    Méthodes :
+    ----------
+    charger() -> dict:
+        Reconstruit les files à partir de la table Reservation.
+
+    reserver(num_usager: str, document: Document | str) -> dict:
+        Ajoute l'usager en fin de file du document.
+
+    annuler(num_usager: str, document: Document | str) -> dict:
+        Retire l'usager de la file du document.
+
+    position(num_usager: str, document: Document | str) -> dict:
+        Renvoie la position de l'usager dans la file du document.
+
+    promouvoir(document: Document | str, jour: datetime.date | None = None) -> dict:
+        Met le document de côté pour le premier usager dont la réservation est valable.
+        Appelé automatiquement quand un document qui a une file redevient libre.
+
+    purger(jour: datetime.date | None = None) -> dict:
+        Retire les réservations expirées et libère les documents mis de côté qui n'ont pas été retirés à temps.
+
+    demarrer(intervalle: float = 3600) -> threading.Thread:
+        Lance la tâche périodique (purger).
+
+    arreter() -> None:
+        Arrête la tâche périodique et le suivi des emprunts (désabonnement de Document).
+    """
+
+    def __init__(self, bibio: Bibliotheques, delai: datetime.timedelta = datetime.timedelta(days=90),
+                 charger: bool = True, delai_retrait: datetime.timedelta = datetime.timedelta(days=7)):
+        self.bibio: Bibliotheques = bibio
+        self.delai: datetime.timedelta = delai
+        self.delai_retrait: datetime.timedelta = delai_retrait
+        self._files: dict[str, FileAttente] = {}
+        # cote d'un document mis de côté -> date limite de retrait (ordinal)
+        self._retraits: dict[str, int] = {}
+        self._verrou = threading.Lock()
+        self._arret = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        if charger:
+            self.charger()
+        Document.abonner(self._suivre_emprunts)
+
+    def charger(self) -> dict:
+        """
+        Reconstruit les files à partir de la table Reservation, et les dates limites de retrait
+        à partir des documents mis de côté de la bibliothèque.
+
+        Retourne :
+        ----------
+        dict : Un message indiquant le nombre de réservations chargées et un statut.
+        """
+        rows = Reservation.get_all(self.bibio._config_db)
+        if rows is None:
+            return {"message": "Les réservations n'ont pas pu être chargées.", "status": 500}
+
+        files: dict[str, FileAttente] = {}
+        for _, code, num_usager, _, expiration in rows:
+            files.setdefault(code, FileAttente()).ajouter(num_usager, expiration.toordinal())
+        retraits = {document.code: document._date_fin_emprunt.toordinal()
+                    for document, statut in self.bibio.livres.items() if statut == StatuEmprunt.En_Attente}
+        with self._verrou:
+            self._files, self._retraits = files, retraits
+        return {"message": f"{len(rows)} réservation(s) chargée(s) sur {len(files)} document(s).", "status": 200}
+
+    def _code(self, document: Document | str) -> str:
+        return document if isinstance(document, str) else document.code
+
+    def reserver(self, num_usager: str, document: Document | str) -> dict:
+        """
+        Ajoute l'usager en fin de file d'un document emprunté ou mis de côté.
+
+        Paramètres :
+        ------------
+        num_usager : str
+            Le numéro de l'usager.
+        document : Document | str
+            Le document (ou sa cote).
+
+        Retourne :
+        ----------
+        dict : La position de l'usager dans la file, un message et un statut.
+        """
+        code = self._code(document)
+        document = self.bibio.document(code)
+        if document is None:
+            return {"position": None, "message": f"Le document dont le code est {code} n'existe pas.", "status": 500}
+
+        statut = self.bibio.livres.get(document)
+        if statut == StatuEmprunt.Libre:
+            return {"position": None, "status": 500,
+                    "message": f"Le document {code} est disponible, il n'est pas nécessaire de le réserver."}
+        if document._num == num_usager and statut != StatuEmprunt.Libre:
+            return {"position": None, "status": 500,
+                    "message": f"Le document {code} est déjà emprunté ou mis de côté pour l'usager {num_usager}."}
+
+        with self._verrou:
+            file = self._files.get(code)
+            if file is not None and num_usager in file:
+                return {"position": file.position(num_usager), "status": 500,
+                        "message": f"L'usager {num_usager} attend déjà le document {code}."}
+
+            expiration = datetime.date.today() + self.delai
+            if Reservation.ajouter(self.bibio._config_db, code, num_usager, expiration) is None:
+                return {"position": None, "status": 500,
+                        "message": f"La réservation du document {code} n'a pas pu être enregistrée."}
+            position = self._files.setdefault(code, FileAttente()).ajouter(num_usager, expiration.toordinal())
+
+        return {"position": position, "status": 200,
+                "message": f"L'usager {num_usager} est en position {position} pour le document {code}."}
+
+    def annuler(self, num_usager: str, document: Document | str) -> dict:
+        """
+        Retire l'usager de la file d'attente d'un document.
+
+        Paramètres :
+        ------------
+        num_usager : str
+            Le numéro de l'usager.
+        document : Document | str
+            Le document (ou sa cote).
+
+        Retourne :
+        ----------
+        dict : Un message et un statut.
+        """
+        code = self._code(document)
+        with self._verrou:
+            file = self._files.get(code)
+            if file is None or num_usager not in file:
+                return {"message": f"L'usager {num_usager} n'attend pas le document {code}.", "status": 500}
+            if not Reservation.supprimer_lot(self.bibio._config_db, [(code, num_usager)]):
+                return {"message": f"L'annulation de la réservation de {code} a échoué.", "status": 500}
+            file.retirer(num_usager)
+            if not file:
+                del self._files[code]
+
+        return {"message": f"La réservation du document {code} par l'usager {num_usager} est annulée.", "status": 200}
+
+    def position(self, num_usager: str, document: Document | str) -> dict:
+        """
+        Renvoie la position de l'usager dans la file d'attente d'un document.
+
+        Paramètres :
+        ------------
+        num_usager : str
+            Le numéro de l'usager.
+        document : Document | str
+            Le document (ou sa cote).
+
+        Retourne :
+        ----------
+        dict : La position (1 pour le premier) et la longueur de la file, un message et un statut.
+        """
+        code = self._code(document)
+        with self._verrou:
+            file = self._files.get(code)
+            position = file.position(num_usager) if file is not None else None
+            longueur = len(file) if file is not None else 0
+
+        if position is None:
+            return {"position": None, "longueur": longueur, "status": 500,
+                    "message": f"L'usager {num_usager} n'attend pas le document {code}."}
+        return {"position": position, "longueur": longueur, "status": 200,
+                "message": f"L'usager {num_usager} est en position {position} sur {longueur} pour le document {code}."}
+
+    def _premier_valable(self, code: str, limite: int) -> tuple[str | None, list[tuple[str, str]]]:
+        """
+        Retire de la file les réservations expirées à la date `limite` qui sont en tête, et
+        renvoie le premier usager restant (sans le retirer). À appeler avec self._verrou.
+        """
+        file = self._files.get(code)
+        expirees: list[tuple[str, str]] = []
+        while file and file.premier()[1] <= limite:
+            num_usager, _ = file.premier()
+            file.retirer(num_usager)
+            expirees.append((code, num_usager))
+        if file is not None and not file:
+            del self._files[code]
+        return (file.premier()[0] if file else None), expirees
+
+    def promouvoir(self, document: Document | str, jour: datetime.date | None = None) -> dict:
+        """
+        Met un document libre de côté pour le premier usager de sa file (statut En_Attente),
+        jusqu'à la date `jour` + delai_retrait.
+
+        L'usager ne quitte la file que si le document a bien été mis de côté pour lui.
+
+        Paramètres :
+        ------------
+        document : Document | str
+            Le document (ou sa cote).
+        jour : datetime.date | None
+            La date de référence pour l'expiration des réservations, aujourd'hui par défaut.
+
+        Retourne :
+        ----------
+        dict : L'usager servi (ou None), un message et un statut.
+        """
+        code = self._code(document)
+        jour = jour or datetime.date.today()
+        with self._verrou:
+            num_usager, retirees = self._premier_valable(code, jour.toordinal())
+
+        # hors du verrou des files : l'opération prend les verrous des documents, et la date
+        # limite de retrait est relevée par _suivre_emprunts
+        promu = num_usager is not None and self.bibio.ajout_en_attente_verif(
+            num_usager, code, jour + self.delai_retrait
+        )["status"] == 200
+
+        with self._verrou:
+            file = self._files.get(code)
+            if promu and file is not None and file.retirer(num_usager):
+                retirees.append((code, num_usager))
+                if not file:
+                    del self._files[code]
+            if retirees and not Reservation.supprimer_lot(self.bibio._config_db, retirees):
+                logger.info("Les réservations retirées de %s n'ont pas pu être supprimées en base.", code)
+
+        if num_usager is None:
+            return {"num_usager": None, "message": f"Personne n'attend le document {code}.", "status": 200}
+        if not promu:
+            return {"num_usager": None, "status": 500,
+                    "message": f"Le document {code} n'a pas pu être mis de côté pour l'usager {num_usager}."}
+        return {"num_usager": num_usager, "status": 200,
+                "message": f"Le document {code} est mis de côté pour l'usager {num_usager}."}
+
+    def purger(self, jour: datetime.date | None = None) -> dict:
+        """
+        Retire les réservations expirées à la date `jour`, puis libère les documents mis de côté
+        dont la date limite de retrait est passée : chacun est aussitôt mis de côté pour l'usager
+        suivant de sa file (voir _suivre_emprunts).
+
+        Les réservations ayant toutes la même durée de validité, les expirées sont en tête
+        de file : seules elles sont parcourues.
+
+        Paramètres :
+        ------------
+        jour : datetime.date | None
+            La date de référence, aujourd'hui par défaut.
+
+        Retourne :
+        ----------
+        dict : Le nombre de réservations retirées et de documents libérés, un message et un statut.
+        """
+        limite = (jour or datetime.date.today()).toordinal()
+        with self._verrou:
+            expirees: list[tuple[str, str]] = []
+            for code in list(self._files):
+                expirees += self._premier_valable(code, limite)[1]
+            enregistre = Reservation.supprimer_lot(self.bibio._config_db, expirees)
+            non_retires = [code for code, echeance in self._retraits.items() if echeance <= limite]
+
+        # hors du verrou des files : la libération prévient _suivre_emprunts, qui promeut le suivant
+        liberes = sum(1 for code in non_retires if self.bibio.fin_attente(code)["status"] == 200)
+
+        return {
+            "expirees": len(expirees),
+            "liberes": liberes,
+            "message": f"{len(expirees)} réservation(s) expirée(s) retirée(s), "
+                       f"{liberes} document(s) non retiré(s) libéré(s).",
+            "status": 200 if enregistre and liberes == len(non_retires) else 500
+        }
+
+    def demarrer(self, intervalle: float = 3600.0) -> threading.Thread:
+        """
+        Lance la tâche périodique dans un thread, un passage de purger toutes les `intervalle` secondes.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._arret.clear()
+
+        def boucle():
+            while not self._arret.is_set():
+                try:
+                    logger.info("Réservations : %s", self.purger()["message"])
+                except Exception:
+                    logger.exception("La purge des réservations a échoué.")
+                self._arret.wait(intervalle)
+
+        self._thread = threading.Thread(target=boucle, name="reservations", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def arreter(self) -> None:
+        """
+        Arrête la tâche périodique et se désabonne des écritures du catalogue : l'instance
+        ne suit plus les emprunts.
+        """
+        self._arret.set()
+        Document.desabonner(self._suivre_emprunts)
+
+    def _suivre_emprunts(self, action: str, type_document: str, code: str | None) -> None:
+        if action != "emprunt" or code is None:
+            return
+        document = self.bibio.document(code)
+        if document is None:
+            return
+
+        statut = self.bibio.livres.get(document)
+        with self._verrou:
+            if statut == StatuEmprunt.En_Attente:
+                self._retraits[code] = document._date_fin_emprunt.toordinal()
+            else:
+                self._retraits.pop(code, None)
+            attendu = code in self._files
+
+        # un document rendu ou libéré qui a une file est aussitôt mis de côté pour le suivant
+        if attendu and statut == StatuEmprunt.Libre:
+            self.promouvoir(document)
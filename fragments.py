@@ -0,0 +1,212 @@
+"""
+Cache des pages du catalogue déjà rendues.
+
+Deux niveaux, tous deux indexés par la version du catalogue (cache.version_catalogue,
+incrémentée à chaque écriture, import et emprunt) : une entrée n'est jamais
+invalidée, elle cesse simplement d'être demandée quand la version change et sort
+du cache LRU.
+
+- fragment : le HTML des tableaux du catalogue (templates/catalogue.html) pour une
+  page (after, limit), commun à tous les visiteurs ;
+- corps : la page complète, bandeau compris, pour une page et un login. Le bandeau
+  ne dépend que du login : la page d'un visiteur anonyme est la même pour tous.
+  Les versions compressées (gzip, et brotli si le module est installé) sont
+  calculées une fois, à la première demande, puis servies telles quelles.
+
+Une page d'accueil déjà servie coûte donc une recherche dans un dictionnaire ;
+un nouveau login ne rend que le bandeau autour du fragment en cache.
+
+Une page absente du cache est envoyée au fil du rendu (page_en_flux) : le bandeau
+part avant les tableaux, et le fragment et la page ne sont gardés qu'une fois
+le rendu terminé. par_blocs regroupe les morceaux produits par Jinja pour les
+listes envoyées en flux sans passer par le cache (route /catalogue).
+"""
+import gzip
+from collections.abc import Hashable, Iterable, Iterator
+from markupsafe import Markup
+from cache import CacheLRU, version_catalogue
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NIVEAU_GZIP: int = 9
+QUALITE_BROTLI: int = 11
+
+# Taille visée des blocs envoyés en flux, en caractères
+TAILLE_BLOC: int = 16 * 1024
+
+# Remplacée par les tableaux du catalogue dans une page envoyée en flux
+MARQUE_CATALOGUE: str = "\x00catalogue\x00"
+
+
+def choisir_encodage(accept_encoding: str | None) -> str | None:
+    """
+    Choisit la compression d'une réponse d'après l'en-tête Accept-Encoding de la requête.
+
+    :param accept_encoding: La valeur de l'en-tête, ou None.
+    :return: "br", "gzip", ou None pour une réponse non compressée.
+    :rtype: str | None
+    """
+    acceptes = set()
+    for partie in (accept_encoding or "").split(","):
+        nom, _, parametres = partie.partition(";")
+        qualite = parametres.strip().replace(" ", "")
+        if qualite.startswith("q=") and not qualite[2:].strip("0."):
+            continue  # q=0 : refusé explicitement
+        acceptes.add(nom.strip().lower())
+    if brotli is not None and "br" in acceptes:
+        return "br"
+    if "gzip" in acceptes:
+        return "gzip"
+    return None
+
+
+class Corps:
+    """
+    Corps d'une réponse HTML rendue une fois, et ses versions compressées.
+
+    Attributs :
+    -----------
+    html : bytes
+        Le HTML encodé en UTF-8.
+    """
+
+    __slots__ = ("html", "_encodes")
+
+    def __init__(self, html: str):
+        self.html: bytes = html.encode()
+        self._encodes: dict[str | None, bytes] = {None: self.html}
+
+    def encoder(self, encodage: str | None) -> bytes:
+        """
+        Renvoie le corps compressé avec `encodage` ("br", "gzip" ou None), calculé au premier appel.
+        """
+        donnees = self._encodes.get(encodage)
+        if donnees is None:
+            if encodage == "gzip":
+                donnees = gzip.compress(self.html, compresslevel=NIVEAU_GZIP, mtime=0)
+            elif encodage == "br" and brotli is not None:
+                donnees = brotli.compress(self.html, quality=QUALITE_BROTLI)
+            else:
+                raise ValueError(f"Encodage inconnu : {encodage}")
+            # deux threads peuvent compresser en même temps : le résultat est identique
+            self._encodes[encodage] = donnees
+        return donnees
+
+    @staticmethod
+    def entetes(encodage: str | None) -> dict[str, str]:
+        """
+        Renvoie les en-têtes HTTP d'une réponse servie avec `encodage`.
+        """
+        # le bandeau dépend du login, donc du cookie de session
+        entetes = {"Content-Type": "text/html; charset=utf-8", "Vary": "Accept-Encoding, Cookie"}
+        if encodage is not None:
+            entetes["Content-Encoding"] = encodage
+        return entetes
+
+
+class CachePages:
+    """
+    Fragments et corps de pages rendus, par version du catalogue.
+
+    Méthodes :
+    ----------
+    fragment(cle: Hashable) -> Markup | None:
+    garder_fragment(cle: Hashable, html: str) -> Markup:
+        Lecture et écriture d'un fragment HTML, à insérer tel quel dans un gabarit.
+
+    corps(cle: Hashable) -> Corps | None:
+    garder_corps(cle: Hashable, html: str) -> Corps:
+        Lecture et écriture d'une page complète.
+
+    Les méthodes garder_* acceptent la version du catalogue à laquelle les données ont été
+    lues ; par défaut, la version courante.
+
+    stats() -> dict:
+        Renvoie les compteurs du cache.
+    """
+
+    def __init__(self, taille_max: int = 2_000, ttl: float = 300.0):
+        self._cache = CacheLRU(taille_max=taille_max, ttl=ttl)
+
+    @staticmethod
+    def _cle(genre: str, cle: Hashable, version: str | None = None) -> tuple:
+        return genre, version or version_catalogue.valeur, cle
+
+    def fragment(self, cle: Hashable) -> Markup | None:
+        return self._cache.get(self._cle("fragment", cle))
+
+    def garder_fragment(self, cle: Hashable, html: str, version: str | None = None) -> Markup:
+        # version : celle lue avant la lecture des données, si le rendu a pu durer (voir page_en_flux)
+        fragment = Markup(html)
+        self._cache.set(self._cle("fragment", cle, version), fragment)
+        return fragment
+
+    def corps(self, cle: Hashable) -> Corps | None:
+        return self._cache.get(self._cle("corps", cle))
+
+    def garder_corps(self, cle: Hashable, html: str, version: str | None = None) -> Corps:
+        corps = Corps(html)
+        self._cache.set(self._cle("corps", cle, version), corps)
+        return corps
+
+    def vider(self) -> None:
+        self._cache.vider()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# Pages rendues, partagées par tout le processus
+cache_pages = CachePages(taille_max=2_000, ttl=version_catalogue.ttl)
+
+
+def par_blocs(morceaux: Iterable[str], taille: int = TAILLE_BLOC) -> Iterator[str]:
+    """
+    Regroupe les morceaux de texte produits par Jinja (Template.generate) en blocs d'environ
+    `taille` caractères : un envoi par bloc plutôt qu'un par balise.
+
+    :param morceaux: Les morceaux rendus, dans l'ordre.
+    :param taille: La taille minimale d'un bloc, sauf le dernier.
+    :return: Un générateur de blocs ; un seul bloc est en mémoire à la fois.
+    :rtype: Iterator[str]
+    """
+    bloc: list[str] = []
+    longueur = 0
+    for morceau in morceaux:
+        bloc.append(morceau)
+        longueur += len(morceau)
+        if longueur >= taille:
+            yield "".join(bloc)
+            bloc, longueur = [], 0
+    if bloc:
+        yield "".join(bloc)
+
+
+def page_en_flux(page: str, catalogue: Iterable[str], cle_page: Hashable, cle_fragment: Hashable,
+                 version: str) -> Iterator[str]:
+    """
+    Envoie une page au fil du rendu de ses tableaux, puis la garde en cache.
+
+    :param page: La page rendue avec Markup(MARQUE_CATALOGUE) à la place des tableaux.
+    :param catalogue: Les morceaux des tableaux (Template.generate de catalogue.html).
+    :param cle_page: La clé de la page complète dans cache_pages.
+    :param cle_fragment: La clé du fragment des tableaux dans cache_pages.
+    :param version: La version du catalogue lue avant les données : si une écriture a lieu
+        pendant l'envoi, la page n'est pas gardée sous la nouvelle version.
+    :return: Un générateur de blocs de texte : le bandeau, les tableaux, la fin de la page.
+    :rtype: Iterator[str]
+    """
+    debut, _, fin = page.partition(MARQUE_CATALOGUE)
+    yield debut
+    blocs = []
+    for bloc in par_blocs(catalogue):
+        blocs.append(bloc)
+        yield bloc
+    yield fin
+    # envoi interrompu (client parti) : GeneratorExit plus haut, rien n'est gardé
+    fragment = cache_pages.garder_fragment(cle_fragment, "".join(blocs), version)
+    # str.join : debut + fragment passerait par Markup.__radd__, qui échappe le bandeau
+    cache_pages.garder_corps(cle_page, "".join((debut, fragment, fin)), version)
@@ -0,0 +1,230 @@
+"""
+Import en masse du catalogue à partir de fichiers CSV ou JSON Lines.
+
+Les enregistrements sont lus au fil de l'eau, validés, puis écrits par lots
+(Depot.ecrire_documents : `executemany` avec MySQL et SQLite) dans une transaction
+par lot. Un document dont la cote existe déjà est mis à jour (upsert).
+
+Utilisation :
+    python import_catalogue.py catalogue.csv --type livre --taille-lot 1000
+    python import_catalogue.py union.jsonl            # colonne "type" dans chaque ligne
+    python import_catalogue.py union.jsonl --sqlite bu.sqlite3
+"""
+import argparse
+import csv
+import datetime
+import json
+import logging
+from collections.abc import Iterator
+from depot import CONNEXION_IMPOSSIBLE, get_depot
+from document import Document
+from index_cotes import DOCUMENTS
+
+logger = logging.getLogger(__name__)
+
+# Colonnes écrites pour chaque type de document, la cote en premier
+COLONNES: dict[str, tuple[str, ...]] = {
+    "livre": ("code", "salle", "titre", "auteur", "sur_place", "online"),
+    "dvd": ("code", "salle", "titre", "auteur", "sur_place", "online"),
+    "journal": ("code", "salle", "titre", "date_publication", "sur_place", "online"),
+}
+
+VRAI: set[str] = {"1", "true", "vrai", "oui", "yes", "o", "y"}
+FAUX: set[str] = {"", "0", "false", "faux", "non", "no", "n"}
+
+
+def lire_csv(chemin: str) -> Iterator[dict]:
+    """
+    Lit un fichier CSV (avec une ligne d'en-tête) enregistrement par enregistrement.
+    """
+    with open(chemin, newline="", encoding="utf-8") as fichier:
+        yield from csv.DictReader(fichier)
+
+
+def lire_jsonl(chemin: str) -> Iterator[dict | ValueError]:
+    """
+    Lit un fichier JSON Lines (un objet JSON par ligne) enregistrement par enregistrement.
+
+    Une ligne illisible ne stoppe pas la lecture : elle produit une ValueError (avec son
+    numéro de ligne), que importer compte parmi les rejets.
+    """
+    with open(chemin, encoding="utf-8") as fichier:
+        for numero, ligne in enumerate(fichier, start=1):
+            if not ligne.strip():
+                continue
+            try:
+                enregistrement = json.loads(ligne)
+            except json.JSONDecodeError as err:
+                yield ValueError(f"ligne {numero} : JSON invalide ({err.msg}, colonne {err.colno})")
+                continue
+            if not isinstance(enregistrement, dict):
+                yield ValueError(f"ligne {numero} : un objet JSON est attendu")
+                continue
+            yield enregistrement
+
+
+def _booleen(valeur) -> bool:
+    if isinstance(valeur, bool):
+        return valeur
+    texte = str(valeur if valeur is not None else "").strip().lower()
+    if texte in VRAI:
+        return True
+    if texte in FAUX:
+        return False
+    raise ValueError(f"valeur booléenne invalide : {valeur!r}")
+
+
+def valider(type_document: str, enregistrement: dict) -> tuple:
+    """
+    Vérifie un enregistrement et le convertit en paramètres de l'INSERT.
+
+    :param type_document: "livre", "dvd" ou "journal".
+    :param enregistrement: Les champs lus dans le fichier.
+    :return: Les valeurs dans l'ordre de COLONNES[type_document].
+    :rtype: tuple
+    :raises ValueError: Si un champ obligatoire manque ou est invalide.
+    """
+    if type_document not in COLONNES:
+        raise ValueError(f"type de document inconnu : {type_document!r}")
+
+    valeurs = []
+    for colonne in COLONNES[type_document]:
+        valeur = enregistrement.get(colonne)
+        if colonne in ("sur_place", "online"):
+            valeurs.append(_booleen(valeur))
+        elif colonne == "date_publication":
+            if isinstance(valeur, datetime.date):
+                valeurs.append(valeur)
+            else:
+                try:
+                    valeurs.append(datetime.date.fromisoformat(str(valeur).strip()))
+                except ValueError:
+                    raise ValueError(f"date de publication invalide : {valeur!r}") from None
+        else:
+            texte = str(valeur).strip() if valeur is not None else ""
+            if not texte:
+                raise ValueError(f"champ obligatoire manquant : {colonne}")
+            valeurs.append(texte)
+
+    return tuple(valeurs)
+
+
+def _ecrire_lot(config_db: dict, type_document: str, lot: list[tuple[int, tuple]]) -> dict:
+    """
+    Écrit un lot dans une transaction. Si le lot est refusé, il est rejoué ligne par
+    ligne pour isoler les enregistrements fautifs sans perdre les autres.
+    """
+    depot = get_depot(config_db)
+    table, colonnes = DOCUMENTS[type_document].table, COLONNES[type_document]
+    rapport = {"type": type_document, "premier": lot[0][0], "lignes": len(lot), "ecrites": 0, "erreurs": []}
+
+    erreur = depot.ecrire_documents(table, colonnes, [params for _, params in lot])
+    if erreur is None:
+        rapport["ecrites"] = len(lot)
+        return rapport
+    if erreur == CONNEXION_IMPOSSIBLE:
+        rapport["erreurs"].append((lot[0][0], erreur))
+        return rapport
+    logger.info("Lot %s à partir de l'enregistrement %d refusé (%s), reprise ligne par ligne.",
+                type_document, lot[0][0], erreur)
+
+    for numero, params in lot:
+        erreur = depot.ecrire_documents(table, colonnes, [params])
+        if erreur is None:
+            rapport["ecrites"] += 1
+        else:
+            rapport["erreurs"].append((numero, erreur))
+
+    return rapport
+
+
+def importer(config_db: dict, enregistrements: Iterator[dict | ValueError], type_document: str | None = None,
+             taille_lot: int = 1000) -> dict:
+    """
+    Importe des enregistrements dans le catalogue par lots.
+
+    :param config_db: La configuration de connexion à la base de données.
+    :param enregistrements: Les enregistrements à importer (voir lire_csv et lire_jsonl) ; une
+        ValueError à la place d'un enregistrement (ligne illisible) est comptée comme un rejet.
+    :param type_document: Le type de tous les enregistrements ; si None, chaque enregistrement
+        doit porter un champ "type".
+    :param taille_lot: Le nombre d'enregistrements écrits par transaction.
+    :return: Dictionnaire contenant un message, un statut, les compteurs et le rapport de chaque lot.
+    :rtype: dict
+    """
+    lots: dict[str, list[tuple[int, tuple]]] = {type_doc: [] for type_doc in COLONNES}
+    rapports: list[dict] = []
+    rejets: list[tuple[int, str]] = []
+    lus = 0
+
+    for numero, enregistrement in enumerate(enregistrements, start=1):
+        lus += 1
+        if isinstance(enregistrement, ValueError):
+            rejets.append((numero, str(enregistrement)))
+            continue
+        type_doc = type_document or str(enregistrement.get("type", "")).strip().lower()
+        try:
+            params = valider(type_doc, enregistrement)
+        except ValueError as err:
+            rejets.append((numero, str(err)))
+            continue
+
+        lots[type_doc].append((numero, params))
+        if len(lots[type_doc]) >= taille_lot:
+            rapports.append(_ecrire_lot(config_db, type_doc, lots[type_doc]))
+            lots[type_doc] = []
+
+    for type_doc, lot in lots.items():
+        if lot:
+            rapports.append(_ecrire_lot(config_db, type_doc, lot))
+
+    # caches et index ne connaissent pas les documents importés
+    for type_doc in {rapport["type"] for rapport in rapports if rapport["ecrites"]}:
+        Document.notifier("import", type_doc)
+
+    ecrits = sum(rapport["ecrites"] for rapport in rapports)
+    erreurs = sum(len(rapport["erreurs"]) for rapport in rapports)
+
+    return {
+        "message": f"{ecrits} document(s) importé(s) sur {lus}, {len(rejets)} rejeté(s) à la validation, "
+                   f"{erreurs} refusé(s) par la base.",
+        "status": 200 if not rejets and not erreurs else 500,
+        "lus": lus,
+        "ecrits": ecrits,
+        "rejets": rejets,
+        "lots": rapports,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fichier", help="fichier .csv ou .jsonl à importer")
+    parser.add_argument("--type", choices=sorted(COLONNES), default=None,
+                        help="type de tous les documents (sinon colonne 'type')")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None,
+                        help="format du fichier (déduit de l'extension par défaut)")
+    parser.add_argument("--taille-lot", type=int, default=1000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="wm7ze*2b")
+    parser.add_argument("--database", default="bu")
+    parser.add_argument("--sqlite", default=None, help="fichier SQLite à remplir au lieu de la base MySQL")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        config = {"stockage": {"type": "sqlite", "chemin": args.sqlite}}
+    else:
+        config = {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+    format_fichier = args.format or ("csv" if args.fichier.lower().endswith(".csv") else "jsonl")
+    lecteur = lire_csv if format_fichier == "csv" else lire_jsonl
+
+    resultat = importer(config, lecteur(args.fichier), args.type, args.taille_lot)
+
+    for rapport in resultat["lots"]:
+        print(f"lot {rapport['type']} à partir de l'enregistrement {rapport['premier']} : "
+              f"{rapport['ecrites']}/{rapport['lignes']} écrites")
+        for numero, erreur in rapport["erreurs"]:
+            print(f"    enregistrement {numero} : {erreur}")
+    for numero, erreur in resultat["rejets"]:
+        print(f"rejet de l'enregistrement {numero} : {erreur}")
+    print(resultat["message"])
@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from document import Document
+from depot import get_depot
+from livre import Livre
+from journal import Journal
+from dvd import Dvd
+
+logger = logging.getLogger(__name__)
+
+# Classe de document associée à chaque type
+DOCUMENTS: dict[str, type[Document]] = {"livre": Livre, "journal": Journal, "dvd": Dvd}
+
+
+class IndexCotes:
+    """
+    Index en mémoire cote -> type de document ("livre", "journal" ou "dvd").
+
+    Construit à partir des trois tables puis tenu à jour par les insert et delete des
+    documents (voir Document.abonner), et par les lectures (constater).
+
+    Une cote connue coûte une requête, dans la table de son type. Une cote inconnue
+    est absente sans aucune requête tant que l'index a moins de `duree_absence`
+    secondes, ou que son absence a été constatée depuis moins de `duree_absence`
+    secondes : c'est le délai au bout duquel un document écrit par un autre processus
+    (import_catalogue.py, autre worker), que l'index ne voit pas, devient visible.
+    Au-delà, la cote est localisée dans les trois tables en une seule requête
+    (localiser), et l'index retient le résultat.
+
+    Attributs :
+    -----------
+    construit : bool
+        True si l'index reflète le contenu des tables ; sinon les recherches doivent
+        interroger la base.
+    duree_absence : float
+        La durée (en secondes) pendant laquelle une cote inconnue est tenue pour absente.
+
+    Méthodes :
+    ----------
+    construire(config_db: dict) -> bool:
+        (Re)construit l'index à partir des tables Livre, Journal et Dvd.
+
+    assurer(config_db: dict) -> bool:
+        Construit l'index s'il ne l'est pas, au plus une tentative par `delai_reessai` secondes.
+
+    invalider() -> None:
+        Marque l'index comme périmé ; il sera reconstruit au prochain appel à assurer.
+
+    type_de(code: str) -> str | None:
+        Renvoie le type du document, ou None si la cote est inconnue de l'index.
+
+    absent(code: str) -> bool:
+        Indique si la cote peut être tenue pour absente sans interroger la base.
+
+    repartir(codes: Iterable[str]) -> tuple[dict[str, list[str]], list[str]]:
+        Regroupe les cotes connues par type, et renvoie les cotes à localiser.
+
+    localiser(config_db: dict, codes: list[str]) -> dict[str, str]:
+        Cherche des cotes dans les trois tables en une requête et renvoie leur type
+        (localiser_async : même chose par le pool asynchrone).
+
+    par_type(types: dict[str, str]) -> dict[str, list[str]]:
+        Regroupe par type le résultat de localiser.
+
+    constater(code: str, type_document: str | None) -> None:
+        Met l'index à jour d'après une lecture en base.
+    """
+
+    def __init__(self, delai_reessai: float = 60.0, duree_absence: float = 60.0,
+                 taille_max_absents: int = 100_000):
+        self.construit: bool = False
+        self.duree_absence: float = duree_absence
+        self._delai_reessai: float = delai_reessai
+        self._derniere_tentative: float = float("-inf")
+        self._construit_le: float = float("-inf")
+        self._types: dict[str, str] = {}
+        # cote -> instant (time.monotonic) où son absence a été constatée
+        self._absents: dict[str, float] = {}
+        self._taille_max_absents: int = taille_max_absents
+        self._verrou = threading.Lock()
+
+    def construire(self, config_db: dict) -> bool:
+        types: dict[str, str] = {}
+        debut = time.monotonic()
+
+        for classe in DOCUMENTS.values():
+            codes = get_depot(config_db).codes(classe.table)
+            if codes is None:
+                logger.info("Index des cotes non construit : base injoignable.")
+                return False
+            for code in codes:
+                types[code] = classe.type_document
+
+        with self._verrou:
+            self._types = types
+            self._absents = {}
+            self._construit_le = debut
+            self.construit = True
+        return True
+
+    def assurer(self, config_db: dict) -> bool:
+        if self.construit:
+            return True
+        maintenant = time.monotonic()
+        if maintenant - self._derniere_tentative < self._delai_reessai:
+            return False
+        self._derniere_tentative = maintenant
+        return self.construire(config_db)
+
+    def invalider(self) -> None:
+        self.construit = False
+        self._derniere_tentative = float("-inf")
+
+    def ajouter(self, code: str, type_document: str) -> None:
+        with self._verrou:
+            self._types[code] = type_document
+            self._absents.pop(code, None)
+
+    def retirer(self, code: str) -> None:
+        with self._verrou:
+            self._types.pop(code, None)
+            if len(self._absents) >= self._taille_max_absents:
+                self._absents.clear()
+            self._absents[code] = time.monotonic()
+
+    def type_de(self, code: str) -> str | None:
+        return self._types.get(code)
+
+    def absent(self, code: str) -> bool:
+        if code in self._types:
+            return False
+        maintenant = time.monotonic()
+        if self.construit and maintenant - self._construit_le < self.duree_absence:
+            return True
+        return maintenant - self._absents.get(code, float("-inf")) < self.duree_absence
+
+    def repartir(self, codes: Iterable[str]) -> tuple[dict[str, list[str]], list[str]]:
+        # une requête IN par type pour les cotes connues ; les inconnues qui ne sont pas
+        # absentes à coup sûr restent à localiser
+        par_type: dict[str, list[str]] = {type_document: [] for type_document in DOCUMENTS}
+        a_localiser: list[str] = []
+        for code in codes:
+            type_document = self._types.get(code)
+            if type_document is not None:
+                par_type[type_document].append(code)
+            elif not self.absent(code):
+                a_localiser.append(code)
+        return par_type, a_localiser
+
+    @staticmethod
+    def par_type(types: dict[str, str]) -> dict[str, list[str]]:
+        # cote -> type, regroupé en type -> cotes comme le renvoie repartir
+        par_type: dict[str, list[str]] = {type_document: [] for type_document in DOCUMENTS}
+        for code, type_document in types.items():
+            par_type[type_document].append(code)
+        return par_type
+
+    def _localisees(self, codes: list[str], rows: list[tuple[str, str]] | None) -> dict[str, str]:
+        if rows is None:
+            # base injoignable : rien n'est constaté
+            return {}
+        types = dict(rows)
+        for code in codes:
+            self.constater(code, types.get(code))
+        return types
+
+    def localiser(self, config_db: dict, codes: list[str]) -> dict[str, str]:
+        return self._localisees(codes, get_depot(config_db).localiser(codes))
+
+    async def localiser_async(self, config_db: dict, codes: list[str]) -> dict[str, str]:
+        return self._localisees(codes, await get_depot(config_db).localiser_async(codes))
+
+    def constater(self, code: str, type_document: str | None) -> None:
+        # type_document : où la cote a été lue, ou None si elle n'est dans aucune table
+        if type_document is None:
+            self.retirer(code)
+        elif self._types.get(code) != type_document:
+            self.ajouter(code, type_document)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+
+def _suivre_ecritures(action: str, type_document: str, code: str | None) -> None:
+    if code is None:
+        # toute une famille a changé (import en masse) : l'index doit être reconstruit
+        index_cotes.invalider()
+    elif action == "insert":
+        index_cotes.ajouter(code, type_document)
+    elif action == "delete":
+        index_cotes.retirer(code)
+
+
+# Index partagé par tout le processus
+index_cotes = IndexCotes()
+Document.abonner(_suivre_ecritures)
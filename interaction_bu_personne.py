@@ -5,10 +5,11 @@ from livre import Livre
 from journal import Journal
 from dvd import Dvd
 from statuemprunt import StatuEmprunt
-from databaseconnection import connect_to_mysql
+from file_attente import ReservationsAttente
 
 
-def mise_attente_document(bibi: Bibliotheques, document: Document | Livre | Journal | Dvd, employer: Personne, num_usager: str) -> dict:
+def mise_attente_document(bibi: Bibliotheques, document: Document | Livre | Journal | Dvd, employer: Personne, num_usager: str,
+                          reservations: ReservationsAttente | None = None) -> dict:
     """
     Met un document en attente pour un usager si celui-ci est déjà emprunté ou réservé.
 
@@ -22,6 +23,8 @@ def mise_attente_document(bibi: Bibliotheques, document: Document | Livre | Jour
         L'employé qui effectue l'action.
     num_usager : str
         Le numéro de l'usager souhaitant réserver le document.
+    reservations : ReservationsAttente, optionnel
+        Les files d'attente de la bibliothèque : l'usager est alors ajouté à la file du document.
 
     Retourne:
     ---------
@@ -48,6 +51,8 @@ def mise_attente_document(bibi: Bibliotheques, document: Document | Livre | Jour
         }
 
     # Ajout en attente pour le document
+    if reservations is not None:
+        return reservations.reserver(num_usager, document)
     return bibi.ajout_en_attente_verif(num_usager, document)
 
 
@@ -83,7 +88,10 @@ def valider_reservation_document(bibi: Bibliotheques, document: Document | Livre
             "status": 500
         }
 
-    if bibi.livres.get(document) != StatuEmprunt.Libre:
+    statut = bibi.livres.get(document)
+    # un document mis de côté par la file d'attente est remis à l'usager pour qui il l'a été
+    if statut != StatuEmprunt.Libre and not (statut == StatuEmprunt.En_Attente
+                                            and bibi.document(document.code)._num == num_usager):
         return {
             "message": f"Le document {document.code} est déjà emprunté ou réservé.",
             "status": 500
@@ -125,10 +133,66 @@ def enregistrer_retour_document(bibi: Bibliotheques, document: Document | Livre
             "status": 500
         }
 
-    if bibi.livres.get(document) != StatuEmprunt.Non_Rendue:
+    if bibi.livres.get(document) not in (StatuEmprunt.Reserver, StatuEmprunt.Non_Rendue):
         return {
             "message": f"Le document {document.code} n'est pas actuellement emprunté.",
             "status": 500
         }
 
     return bibi.fin_emprunt(num_usager, document)
+
+
+def valider_reservations_documents(bibi: Bibliotheques, employer: Personne, emprunts: list[tuple[str, Document | Livre | Journal | Dvd]]) -> dict:
+    """
+    Valide un lot de réservations (chariot scanné au comptoir) en une seule transaction.
+
+    Paramètres:
+    -----------
+    bibi : Bibliotheques
+        L'objet de la bibliothèque où les documents sont gérés.
+    employer : Personne
+        L'employé qui effectue l'action.
+    emprunts : list[tuple[str, Document | Livre | Journal | Dvd]]
+        Les couples (numéro de l'usager, document) à valider.
+
+    Retourne:
+    ---------
+    dict
+        Le résultat de chaque réservation ("resultats"), un message et un statut.
+    """
+    if employer.perm != "employer":
+        return {
+            "resultats": [],
+            "message": f"Les permissions ne sont pas assez pour grande pour réaliser la réservation !",
+            "status": 500
+        }
+
+    return bibi.ajout_emprunts(emprunts)
+
+
+def enregistrer_retours_documents(bibi: Bibliotheques, employer: Personne, retours: list[tuple[str, Document | Livre | Journal | Dvd]]) -> dict:
+    """
+    Enregistre un lot de retours (boîte de retour, chariot) en une seule transaction.
+
+    Paramètres:
+    -----------
+    bibi : Bibliotheques
+        L'objet de la bibliothèque où les documents sont gérés.
+    employer : Personne
+        L'employé qui effectue l'action.
+    retours : list[tuple[str, Document | Livre | Journal | Dvd]]
+        Les couples (numéro de l'usager, document) à retourner.
+
+    Retourne:
+    ---------
+    dict
+        Le résultat de chaque retour ("resultats"), un message et un statut.
+    """
+    if employer.perm != "employer":
+        return {
+            "resultats": [],
+            "message": f"Les permissions ne sont pas assez pour grande pour enregistrer un retour de document !",
+            "status": 500
+        }
+
+    return bibi.fin_emprunts(retours)
@@ -0,0 +1,94 @@
+"""
+Types des lignes renvoyées par les dépôts (voir depot.py).
+
+Ce sont des NamedTuple : une ligne pèse autant qu'un tuple (pas de __dict__ par
+ligne) et ses champs portent le nom des colonnes. Le code et les gabarits lisent
+livre.titre plutôt que livre[2], et un changement de colonnes casse à la lecture
+du champ au lieu de décaler silencieusement les valeurs. L'accès par position
+reste possible : une ligne est toujours un tuple.
+
+Les dépôts ne lisent que les colonnes de ces types (pas de SELECT *) : Profil,
+sans l'empreinte du mot de passe, est ce que reçoivent les pages et le cache des
+profils ; seule l'authentification lit LignePersonne.
+"""
+import datetime
+from typing import NamedTuple
+
+
+class LigneLivre(NamedTuple):
+    code: str
+    salle: str
+    titre: str
+    auteur: str
+    sur_place: int
+    online: int
+    date_debut_emprunt: datetime.date | None
+    date_fin_emprunt: datetime.date | None
+
+
+class LigneDvd(NamedTuple):
+    code: str
+    salle: str
+    titre: str
+    auteur: str
+    sur_place: int
+    online: int
+    date_debut_emprunt: datetime.date | None
+    date_fin_emprunt: datetime.date | None
+
+
+class LigneJournal(NamedTuple):
+    code: str
+    salle: str
+    titre: str
+    date_publication: datetime.date
+    sur_place: int
+    online: int
+    date_debut_emprunt: datetime.date | None
+    date_fin_emprunt: datetime.date | None
+
+
+class LignePersonne(NamedTuple):
+    num: str
+    perm: str
+    nom: str
+    prenom: str
+    login: str
+    password: str
+
+
+class Profil(NamedTuple):
+    num: str
+    perm: str
+    nom: str
+    prenom: str
+    login: str
+
+
+class LigneEmprunt(NamedTuple):
+    code: str
+    type_document: str
+    num_usager: str | None
+    statut: str
+    date_debut: datetime.date | None
+    date_fin: datetime.date | None
+    nb_emprunts: int
+
+
+class LigneReservation(NamedTuple):
+    id: int
+    code: str
+    num_usager: str
+    date_demande: datetime.datetime
+    date_expiration: datetime.date
+
+
+# Type des lignes de chaque table
+LIGNES: dict[str, type[tuple]] = {
+    "Livre": LigneLivre,
+    "Dvd": LigneDvd,
+    "Journal": LigneJournal,
+    "Personne": LignePersonne,
+    "Emprunt": LigneEmprunt,
+    "Reservation": LigneReservation,
+}
@@ -1,5 +1,6 @@
 from document import Document
-from databaseconnection import connect_to_mysql
+from cache import cache_documents
+from depot import get_depot
 
 
 class Livre(Document):
@@ -54,6 +55,11 @@ class Livre(Document):
     True
     """
 
+    __slots__ = ("title", "auteur")
+
+    table: str = "Livre"
+    type_document: str = "livre"
+
     def __init__(self, code: str, salle: str, config_db: dict, titre: str, auteur: str, sur_place: bool = False, est_reserver: bool = False, online: bool = False):
         """
         Initialise un nouvel objet Livre.
@@ -81,6 +87,23 @@ class Livre(Document):
         self.title: str = titre
         self.auteur: str = auteur
 
+    @classmethod
+    def depuis_ligne(cls, config_db: dict, row: tuple) -> "Livre":
+        """
+        Construit un objet Livre à partir d'un enregistrement de la table Livre. Si la cote a déjà
+        un objet vivant, celui-ci est mis à jour et renvoyé (voir Document.vivant).
+
+        Paramètres :
+        ------------
+        config_db : dict
+            La configuration de connexion à la base de données.
+        row : LigneLivre
+            L'enregistrement de la table (voir lignes.py).
+        """
+        document = cls(row.code, row.salle, config_db, row.titre, row.auteur,
+                       sur_place=bool(row.sur_place), online=bool(row.online))
+        return Document._unique(document)
+
     @staticmethod
     def get(config_db: dict, code: str) -> list[tuple]:
         """
@@ -90,71 +113,48 @@ class Livre(Document):
         ----------
         list[tuple] : Une liste de tuples contenant les enregistrements de DVD.
         """
-        cnx = connect_to_mysql(config_db, attempts=3)
+        cle = ("livre", code)
+        rows = cache_documents.get(cle)
+        if rows is not None:
+            return rows
 
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                cursor.execute("SELECT * FROM Livre WHERE code = %s", (code,))
-                rows = cursor.fetchall()
-                return rows
+        rows = get_depot(config_db).document("Livre", code)
+        if rows is not None:
+            cache_documents.set(cle, rows)
+        return rows
 
     @staticmethod
     def get_all(config_db: dict) -> list[tuple]:
-        cnx = connect_to_mysql(config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                cursor.execute("SELECT * FROM Livre")
-                rows = cursor.fetchall()
-                return rows
+        return get_depot(config_db).tous("Livre")
 
     def insert(self) -> bool:
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            try:
-                with cnx.cursor() as cursor:
-                    query = """
-                    INSERT INTO Livre (code, salle, titre, auteur) 
-                    VALUES (%s, %s, %s, %s)
-                    """
-                    params = (self.code, self.salle, self.title, self.auteur)
-                    cursor.execute(query, params)
-                    cnx.commit()
-                    return True
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                return False
+        valeurs = {
+            "code": self.code,
+            "salle": self.salle,
+            "titre": self.title,
+            "auteur": self.auteur,
+        }
+        if get_depot(self.config_db).inserer_document(self.table, valeurs):
+            self._notifier("insert")
+            return True
         return False
 
     def update(self) -> bool:
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                sql = """
-                UPDATE Livre
-                SET titre = %s, auteur = %s, sur_place = %s, online = %s 
-                WHERE code = %s
-                """
-                params = (self.title, self.auteur, self.sur_place, self.online, self.code)
-                cursor.execute(sql, params)
-                cnx.commit()
-                return True
-
+        valeurs = {
+            "titre": self.title,
+            "auteur": self.auteur,
+            "sur_place": self.sur_place,
+            "online": self.online,
+        }
+        if get_depot(self.config_db).modifier_document(self.table, self.code, valeurs):
+            self._notifier("update")
+            return True
         return False
 
     def delete(self) -> bool:
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                sql = """DELETE FROM Livre WHERE code = %s"""
-                params = (self.code,)
-                cursor.execute(sql, params)
-                cnx.commit()
-                return True
-
+        if get_depot(self.config_db).supprimer_document(self.table, self.code):
+            self._notifier("delete")
+            return True
         return False
 
 # Section de test
@@ -1,50 +1,104 @@
-from flask import Flask, request, redirect, render_template, make_response, session
+import datetime
+from flask import Flask, request, redirect, render_template, make_response, session, jsonify, abort, stream_template
+from markupsafe import Markup
+from cache import cache_documents, version_catalogue
+from fragments import MARQUE_CATALOGUE, Corps, cache_pages, choisir_encodage, page_en_flux, par_blocs
 from bibiotheques import Bibliotheques
+from document import LIMITE_MAX
 from livre import Livre
 from journal import Journal
 from dvd import Dvd
-from personne import Personne
+from personne import PERM_PERSONNEL, Personne
+from recherche import index_recherche
+from autocompletion import autocompletion
+from retards import MoteurRetards
+from file_attente import ReservationsAttente
+from sessions import InterfaceSessionServeur, StockageSQLite
 
 config = {
     "host": "127.0.0.1",
     "user": "root",
     "password": "wm7ze*2b",
     "database": "bu",
+    # Sans serveur MySQL : {"type": "sqlite", "chemin": "bu.sqlite3"} ou {"type": "memoire"} (voir depot.py)
+    # "stockage": {"type": "sqlite", "chemin": "bu.sqlite3"},
 }
 
 app = Flask(__name__)
 app.secret_key = 'wm7ze*2b'
+# Sessions côté serveur : le cookie ne porte qu'un identifiant, partagé par les workers via SQLite
+app.session_interface = InterfaceSessionServeur(StockageSQLite("sessions.sqlite3"))
 bibio = Bibliotheques(config)
+index_recherche.construire_en_arriere_plan(config)
+autocompletion.construire_en_arriere_plan(config)
+retards = MoteurRetards(bibio)
+retards.demarrer()
+# files d'attente : promotion au retour d'un document, expiration des réservations et des retraits
+reservations = ReservationsAttente(bibio)
+reservations.demarrer()
 
 
 @app.route("/")
 def index():
-    datas = bibio.get_all_document()
+    after = request.args.get("after", None)  # Dernière cote de la page précédente
+    # borné comme par get_page_document, avant de servir de clé : ?limit=1000 et ?limit=1001 sont la même page
+    limit = max(1, min(request.args.get("limit", 50, type=int), LIMITE_MAX))
     user_login = session.get('login', None)  # Récupère le login de la session
     user_nom = session.get('nom', None)  # Récupère le nom de la session (si tu veux le passer)
-
-    return render_template("index.html",
-                           livres=datas["livre"],
-                           journals=datas["journal"],
-                           dvds=datas["dvd"],
-                           login=user_login,
-                           nom=user_nom)
+    encodage = choisir_encodage(request.headers.get("Accept-Encoding"))
+
+    # page déjà rendue pour cette version du catalogue et ce login : servie telle quelle
+    corps = cache_pages.corps(("index", after, limit, user_login))
+    if corps is None:
+        catalogue = cache_pages.fragment(("catalogue", after, limit))
+        if catalogue is None:
+            # rien en cache : le bandeau part tout de suite, les tableaux au fil du rendu
+            version = version_catalogue.valeur
+            datas = bibio.get_page_document(after, limit)
+            tableaux = stream_template(
+                "catalogue.html",
+                livres=datas["livre"],
+                journals=datas["journal"],
+                dvds=datas["dvd"],
+                suivant=datas["suivant"],
+                limit=limit)
+            page = render_template("index.html", catalogue=Markup(MARQUE_CATALOGUE), login=user_login, nom=user_nom)
+            return app.response_class(
+                page_en_flux(page, tableaux, ("index", after, limit, user_login), ("catalogue", after, limit), version),
+                headers=Corps.entetes(None))
+        corps = cache_pages.garder_corps(("index", after, limit, user_login), render_template(
+            "index.html",
+            catalogue=catalogue,
+            login=user_login,
+            nom=user_nom))
+
+    return make_response(corps.encoder(encodage), 200, Corps.entetes(encodage))
+
+
+@app.route("/catalogue")
+def catalogue_complet():
+    # tout le catalogue, lu et rendu au fil de l'envoi : mémoire et délai du premier octet
+    # ne dépendent pas de la taille du catalogue ; trop gros pour le cache des pages
+    return app.response_class(par_blocs(stream_template(
+        "index.html",
+        livres=Livre.iter_all(config),
+        journals=Journal.iter_all(config),
+        dvds=Dvd.iter_all(config),
+        suivant=None,
+        limit=None,
+        login=session.get('login', None),
+        nom=session.get('nom', None))), headers=Corps.entetes(None))
 
 
 @app.route("/livre/<cote>")
 def livre(cote):
     data = Livre.get(config, cote)
+    if not data:
+        abort(404)
     user_login = session.get('login', None)  # Récupère le login de la session
     user_nom = session.get('nom', None)  # Récupère le nom de la session
     return render_template("livre.html",
-                           cote=data[0][0],
-                           salle=data[0][1],
-                           titre=data[0][2],
-                           auteur=data[0][3],
-                           sur_place=data[0][4],
-                           online=data[0][5],
-                           debut_emprunt=data[0][6],
-                           fin_emprunt=data[0][7],
+                           document=data[0],
                            login=user_login,
                            nom=user_nom)
 
@@ -52,17 +106,12 @@ def livre(cote):
 @app.route("/dvd/<cote>")
 def dvd(cote):
     data = Dvd.get(config, cote)
+    if not data:
+        abort(404)
     user_login = session.get('login', None)  # Récupère le login de la session
     user_nom = session.get('nom', None)  # Récupère le nom de la session
     return render_template("dvd.html",
-                           cote=data[0][0],
-                           salle=data[0][1],
-                           titre=data[0][2],
-                           auteur=data[0][3],
-                           sur_place=data[0][4],
-                           online=data[0][5],
-                           debut_emprunt=data[0][6],
-                           fin_emprunt=data[0][7],
+                           document=data[0],
                            login=user_login,
                            nom=user_nom)
 
@@ -70,20 +119,71 @@ def dvd(cote):
 @app.route("/journal/<cote>")
 def journal(cote):
     data = Journal.get(config, cote)
+    if not data:
+        abort(404)
     user_login = session.get('login', None)  # Récupère le login de la session
     user_nom = session.get('nom', None)  # Récupère le nom de la session
     return render_template("journal.html",
-                           cote=data[0][0],
-                           salle=data[0][1],
-                           titre=data[0][2],
-                           date_publication=data[0][3],
-                           sur_place=data[0][4],
-                           online=data[0][5],
-                           debut_emprunt=data[0][6],
-                           fin_emprunt=data[0][7],
+                           document=data[0],
                            login=user_login,
                            nom=user_nom)
 
+@app.route("/recherche")
+def recherche():
+    q = request.args.get("q", "")
+    k = request.args.get("k", 20, type=int)
+    datas = bibio.rechercher(q, k) if q.strip() else {"resultats": [], "message": ""}
+    return render_template("recherche.html",
+                           q=q,
+                           resultats=datas["resultats"],
+                           message=datas["message"],
+                           login=session.get('login', None),
+                           nom=session.get('nom', None))
+
+
+@app.route("/autocomplete")
+def autocomplete():
+    q = request.args.get("q", "")
+    n = request.args.get("n", 10, type=int)
+    return jsonify({"q": q, "completions": autocompletion.completer(q, max(1, min(n, 50)))})
+
+
+def refus_personnel():
+    """
+    Renvoie la réponse d'erreur si la session n'est pas celle d'un membre du personnel, sinon None.
+    """
+    if 'num' not in session:
+        return jsonify({"message": "Connexion requise.", "status": 401}), 401
+    # profil relu (en cache) plutôt que gardé en session : un retrait de droits s'applique aussitôt
+    profil = Personne.get_profil(config, session['num'])
+    if profil is None or profil.perm != PERM_PERSONNEL:
+        return jsonify({"message": "Réservé au personnel de la bibliothèque.", "status": 403}), 403
+    return None
+
+
+@app.route("/retards")
+def rapport_retards():
+    # les retards nomment les usagers : réservés au personnel
+    if (refus := refus_personnel()) is not None:
+        return refus
+    # le rapport du jour, ou un rapport à la date demandée (?jour=AAAA-MM-JJ)
+    jour = request.args.get("jour", None)
+    if jour is None and retards.dernier_rapport is not None:
+        return jsonify(retards.dernier_rapport)
+    try:
+        rapport = retards.rapport(datetime.date.fromisoformat(jour) if jour else None)
+    except ValueError:
+        return jsonify({"message": f"Date invalide : {jour}.", "status": 400}), 400
+    return jsonify(rapport), rapport["status"]
+
+
+@app.route("/stats/cache")
+def stats_cache():
+    if (refus := refus_personnel()) is not None:
+        return refus
+    return jsonify({**cache_documents.stats(), "pages": cache_pages.stats()})
+
+
 @app.route("/auth", methods=["GET"])
 def auth_get():
     if 'num' in session:
@@ -97,10 +197,13 @@ def auth_post():
     login = request.form.get("login")
     password = request.form.get("password")
 
-    if Personne.connection(config, login, password):
-        data = Personne.get(config, login)
-        session['num'] = str(data[0][0])
+    data = Personne.connection(config, login, password)
+    if data:
+        # nouvel identifiant à la connexion : un cookie fixé avant elle ne donne pas accès au compte
+        session.regenerer()
+        session['num'] = str(data.num)
         session['login'] = login
+        session['nom'] = data.nom
         return redirect("/")
     else:
         return redirect("/auth")
@@ -109,14 +212,14 @@ def auth_post():
 @app.route("/user")
 def user():
     if 'num' in session:
-        user_data = Personne.get(config, session['login'])
+        # profil gardé en cache depuis la connexion : pas de requête à chaque page
+        user_data = Personne.get_profil(config, session['num'])
+        if user_data is None:
+            session.clear()
+            return redirect("/auth")
         return render_template("user.html",
-                               num=user_data[0][0],
-                               perm=user_data[0][1],
-                               nom=user_data[0][2],
-                               prenom=user_data[0][3],
-                               login=user_data[0][4],
-                               password=user_data[0][5])
+                               profil=user_data,
+                               login=user_data.login)
     else:
         return redirect("/auth")
 
@@ -126,6 +229,7 @@ def logout():
     # Supprime les données de session pour déconnecter l'utilisateur
     session.pop('num', None)
     session.pop('login', None)
+    session.pop('nom', None)
     return redirect("/auth")
 
 
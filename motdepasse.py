@@ -0,0 +1,195 @@
+"""
+Hachage des mots de passe (scrypt ou PBKDF2-SHA256, via hashlib).
+
+Une empreinte est stockée au format :
+    $scrypt$n=16384,r=8,p=1$<sel base64>$<hash base64>
+    $pbkdf2-sha256$i=600000$<sel base64>$<hash base64>
+
+Une valeur qui ne commence pas par "$" est un ancien mot de passe en clair :
+elle est encore acceptée, et a_rehacher demande alors de la remplacer par une
+empreinte (voir Personne.connection, qui le fait à la connexion suivante). Il en
+va de même d'une empreinte calculée avec d'autres paramètres que les paramètres
+courants, ce qui permet d'augmenter le coût sans invalider les comptes.
+
+Le calcul est long par construction (et scrypt occupe 128 * n * r octets de
+mémoire) : il est exécuté dans un pool de threads borné, hashlib relâchant le GIL
+pendant le calcul. Le pool limite à la fois la mémoire et le nombre de cœurs que
+les connexions peuvent occuper.
+
+Les paramètres se règlent avec la clé "motdepasse" de la configuration :
+    config = {..., "motdepasse": {"algorithme": "scrypt", "n": 16384, "r": 8, "p": 1, "workers": 4}}
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Paramètres par défaut, modifiables par base avec config["motdepasse"]
+PARAMETRES_DEFAUT: dict = {
+    "algorithme": "scrypt",
+    "n": 2 ** 14,
+    "r": 8,
+    "p": 1,
+    "iterations": 600_000,
+    "workers": os.cpu_count() or 1,
+}
+
+TAILLE_SEL: int = 16
+TAILLE_HASH: int = 32
+
+
+def _b64(octets: bytes) -> str:
+    return base64.b64encode(octets).decode().rstrip("=")
+
+
+def _deb64(texte: str) -> bytes:
+    return base64.b64decode(texte + "=" * (-len(texte) % 4))
+
+
+class Hacheur:
+    """
+    Calcule et vérifie les empreintes de mots de passe avec des paramètres de coût donnés.
+
+    Attributs :
+    -----------
+    algorithme : str
+        "scrypt" ou "pbkdf2-sha256".
+    n, r, p : int
+        Les paramètres de scrypt (coût CPU/mémoire, taille de bloc, parallélisme).
+    iterations : int
+        Le nombre d'itérations de PBKDF2.
+    workers : int
+        Le nombre maximal de calculs simultanés.
+
+    Méthodes :
+    ----------
+    hacher(mot_de_passe: str) -> str:
+        Calcule l'empreinte d'un mot de passe avec les paramètres courants.
+
+    verifier(mot_de_passe: str, empreinte: str | None) -> bool:
+        Vérifie un mot de passe, dans le pool borné (bloque le thread appelant).
+
+    verifier_async(mot_de_passe: str, empreinte: str | None) -> bool:
+    hacher_async(mot_de_passe: str) -> str:
+        Versions coroutines de verifier et hacher : la boucle d'événements n'est pas bloquée.
+
+    a_rehacher(empreinte: str) -> bool:
+        Indique si l'empreinte doit être recalculée (mot de passe en clair ou paramètres différents).
+    """
+
+    def __init__(self, algorithme: str = "scrypt", n: int = 2 ** 14, r: int = 8, p: int = 1,
+                 iterations: int = 600_000, workers: int = 1):
+        if algorithme not in ("scrypt", "pbkdf2-sha256"):
+            raise ValueError(f"Algorithme de hachage inconnu : {algorithme}")
+        self.algorithme: str = algorithme
+        self.n: int = n
+        self.r: int = r
+        self.p: int = p
+        self.iterations: int = iterations
+        self.workers: int = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="motdepasse")
+        # vérifiée quand le login est inconnu, pour que la réponse prenne le même temps
+        self._empreinte_factice: str = self._hacher(secrets.token_hex(16))
+
+    def _parametres(self) -> dict[str, int]:
+        if self.algorithme == "scrypt":
+            return {"n": self.n, "r": self.r, "p": self.p}
+        return {"i": self.iterations}
+
+    @staticmethod
+    def _formater(parametres: dict[str, int]) -> str:
+        return ",".join(f"{cle}={valeur}" for cle, valeur in parametres.items())
+
+    @staticmethod
+    def _deriver(algorithme: str, parametres: dict[str, int], mot_de_passe: str, sel: bytes) -> bytes:
+        if algorithme == "scrypt":
+            n, r, p = parametres["n"], parametres["r"], parametres["p"]
+            return hashlib.scrypt(mot_de_passe.encode(), salt=sel, n=n, r=r, p=p,
+                                  maxmem=129 * n * r * p + (1 << 20), dklen=TAILLE_HASH)
+        return hashlib.pbkdf2_hmac("sha256", mot_de_passe.encode(), sel, parametres["i"], dklen=TAILLE_HASH)
+
+    @staticmethod
+    def _decoder(empreinte: str) -> tuple[str, dict[str, int], bytes, bytes] | None:
+        try:
+            _, algorithme, parametres, sel, valeur = empreinte.split("$")
+            parametres = {cle: int(val) for cle, val in (champ.split("=") for champ in parametres.split(","))}
+            return algorithme, parametres, _deb64(sel), _deb64(valeur)
+        except ValueError:
+            return None
+
+    def _hacher(self, mot_de_passe: str) -> str:
+        sel = secrets.token_bytes(TAILLE_SEL)
+        parametres = self._parametres()
+        valeur = self._deriver(self.algorithme, parametres, mot_de_passe, sel)
+        return f"${self.algorithme}${self._formater(parametres)}${_b64(sel)}${_b64(valeur)}"
+
+    def _verifier(self, mot_de_passe: str, empreinte: str | None) -> bool:
+        if empreinte is None:
+            self._verifier(mot_de_passe, self._empreinte_factice)
+            return False
+        empreinte = str(empreinte)
+        if not empreinte.startswith("$"):
+            return hmac.compare_digest(empreinte.encode(), str(mot_de_passe).encode())
+
+        decodee = self._decoder(empreinte)
+        if decodee is None or decodee[0] not in ("scrypt", "pbkdf2-sha256"):
+            return False
+        algorithme, parametres, sel, attendu = decodee
+        try:
+            valeur = self._deriver(algorithme, parametres, str(mot_de_passe), sel)
+        except (KeyError, ValueError):
+            return False
+        return hmac.compare_digest(valeur, attendu)
+
+    def hacher(self, mot_de_passe: str) -> str:
+        return self._executor.submit(self._hacher, mot_de_passe).result()
+
+    def verifier(self, mot_de_passe: str, empreinte: str | None) -> bool:
+        """
+        Vérifie un mot de passe contre une empreinte (ou un ancien mot de passe en clair).
+
+        Si empreinte vaut None (login inconnu), une empreinte factice est vérifiée pour que
+        le temps de réponse ne révèle pas l'existence du compte, et le résultat est False.
+        """
+        return self._executor.submit(self._verifier, mot_de_passe, empreinte).result()
+
+    async def verifier_async(self, mot_de_passe: str, empreinte: str | None) -> bool:
+        return await asyncio.wrap_future(self._executor.submit(self._verifier, mot_de_passe, empreinte))
+
+    async def hacher_async(self, mot_de_passe: str) -> str:
+        return await asyncio.wrap_future(self._executor.submit(self._hacher, mot_de_passe))
+
+    def a_rehacher(self, empreinte: str) -> bool:
+        empreinte = str(empreinte)
+        if not empreinte.startswith("$"):
+            return True
+        decodee = self._decoder(empreinte)
+        return decodee is None or decodee[0] != self.algorithme or decodee[1] != self._parametres()
+
+
+_hacheurs: dict[tuple, Hacheur] = {}
+_hacheurs_verrou = threading.Lock()
+
+
+def get_hacheur(config_db: dict) -> Hacheur:
+    """
+    Renvoie le hacheur du processus pour les paramètres de config_db["motdepasse"],
+    en le créant au premier appel.
+
+    :param config_db: La configuration de la base, dont la clé facultative "motdepasse".
+    :return: Le hacheur partagé pour ces paramètres.
+    :rtype: Hacheur
+    """
+    parametres = {**PARAMETRES_DEFAUT, **config_db.get("motdepasse", {})}
+    cle = tuple(sorted(parametres.items()))
+    hacheur = _hacheurs.get(cle)
+    if hacheur is None:
+        with _hacheurs_verrou:
+            hacheur = _hacheurs.get(cle)
+            if hacheur is None:
+                hacheur = _hacheurs[cle] = Hacheur(**parametres)
+    return hacheur
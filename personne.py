@@ -1,4 +1,10 @@
-from databaseconnection import connect_to_mysql
+from cache import cache_profils
+from depot import get_depot
+from lignes import Profil
+from motdepasse import get_hacheur
+
+# Permission du personnel de la bibliothèque (rapports des retards, statistiques)
+PERM_PERSONNEL: str = "admin"
 
 
 class Personne:
@@ -18,7 +24,7 @@ class Personne:
     login : str
         Le login utilisé pour l'authentification.
     password : str
-        Le mot de passe utilisé pour l'authentification.
+        Le mot de passe utilisé pour l'authentification (en clair : seule son empreinte est enregistrée).
     config_db : dict
         La configuration pour se connecter à la base de données.
 
@@ -27,14 +33,22 @@ class Personne:
     __init__(self, num: str, perm: str, nom: str, prenom: str, login: str, password: str, config_db: dict):
         Initialise une instance de la classe Personne.
 
-    get(self, login: str) -> list[tuple]:
+    get(self, login: str) -> list[Profil]:
         Récupère les informations d'une personne par son login.
 
-    get_all(self) -> list[tuple]:
+    get_all(self) -> list[Profil]:
         Récupère toutes les personnes de la base de données.
 
-    connection(self, login: str, password: str) -> bool:
-        Vérifie si le login et le mot de passe donnés correspondent à ceux de la personne.
+    get_profil(config_db: dict, num: str) -> Profil | None:
+        Récupère le profil d'une personne par son numéro, en passant par le cache des profils.
+
+    connection(self, login: str, password: str) -> Profil | None:
+        Vérifie si le login et le mot de passe donnés correspondent à ceux d'une personne et renvoie son profil.
+
+    get_async(self, login: str) -> list[Profil]:
+    get_profil_async(config_db: dict, num: str) -> Profil | None:
+    connection_async(self, login: str, password: str) -> Profil | None:
+        Versions asynchrones (coroutines) de get, get_profil et connection, utilisées par l'application ASGI.
 
     create(self) -> bool:
         Crée un nouvel enregistrement de personne dans la base de données.
@@ -51,8 +65,8 @@ class Personne:
     >>> personne1 = Personne("001", "admin", "Dupont", "Jean", "jean.dupont", "mdp123", config)
     >>> personne1.create()
     True
-    >>> personne1.connection("jean.dupont", "mdp123")
-    True
+    >>> Personne.connection(config, "jean.dupont", "mdp123")
+    Profil(num='001', perm='admin', nom='Dupont', prenom='Jean', login='jean.dupont')
     """
 
     def __init__(self, num: str, perm: str, nom: str, prenom: str, login: str, password: str, config_db: dict):
@@ -84,11 +98,17 @@ class Personne:
         self.password: str = password
         self.config_db: dict = config_db
 
-    def __eq__(self, other):
-        return  self.__dict__ == other.__dict__
+    def __eq__(self, other: object) -> bool:
+        # une personne est identifiée par son numéro, pas par l'état de ses autres attributs
+        if not isinstance(other, Personne):
+            return NotImplemented
+        return self.num == other.num
+
+    def __hash__(self) -> int:
+        return hash(self.num)
 
     @staticmethod
-    def get(config_db: dict, login: str) -> list[tuple]:
+    def get(config_db: dict, login: str) -> list[Profil]:
         """
         Récupère les informations d'une personne à partir de son login.
 
@@ -99,38 +119,32 @@ class Personne:
 
         Retourne :
         ----------
-        list[tuple] : Les informations de la personne correspondante.
+        list[Profil] : Les informations de la personne correspondante, sans l'empreinte du mot de passe.
         """
-        cnx = connect_to_mysql(config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                cursor.execute(f"SELECT * FROM Personne WHERE login = '{login}'")
-                rows = cursor.fetchall()
-                return rows
+        return get_depot(config_db).personnes_par_login(login)
 
     @staticmethod
-    def get_all(config_db: dict) -> list[tuple]:
+    def get_all(config_db: dict) -> list[Profil]:
         """
         Récupère toutes les personnes de la base de données.
 
         Retourne :
         ----------
-        list[tuple] : Une liste contenant toutes les personnes enregistrées.
+        list[Profil] : Les profils de toutes les personnes enregistrées.
         """
-        cnx = connect_to_mysql(config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                cursor.execute("SELECT * FROM Personne")
-                rows = cursor.fetchall()
-                return rows
+        return get_depot(config_db).personnes()
 
     @staticmethod
-    def connection(config_db: dict, login: str, password: str) -> bool:
+    def connection(config_db: dict, login: str, password: str) -> Profil | None:
         """
         Vérifie si les identifiants fournis (login et mot de passe) correspondent à ceux d'une personne.
 
+        La personne est cherchée par son login (index unique, voir schema.py) : une seule
+        ligne est lue, quel que soit le nombre d'usagers. Le mot de passe est vérifié contre
+        son empreinte dans le pool de motdepasse.py, une fois la lecture terminée ;
+        un mot de passe encore en clair, ou haché avec d'anciens paramètres, est rehaché.
+        L'empreinte ne sort pas de cette méthode : c'est le profil qui est renvoyé et mis en cache.
+
         Paramètres :
         ------------
         login : str
@@ -140,15 +154,116 @@ class Personne:
 
         Retourne :
         ----------
-        bool : True si les identifiants correspondent, False sinon.
+        Profil | None : Le profil de la personne si les identifiants correspondent, None sinon.
         """
-        datas: list[tuple] = Personne.get_all(config_db)
+        depot = get_depot(config_db)
+        data = depot.personne_par_login(login)
 
-        for data in datas:
-            if data[4] == login and data[5] == password:
-                return True
+        hacheur = get_hacheur(config_db)
+        if not hacheur.verifier(password, data.password if data else None):
+            return None
 
-        return False
+        if hacheur.a_rehacher(data.password):
+            depot.remplacer_empreinte(data.num, data.password, hacheur.hacher(password))
+
+        profil = Profil._make(data[:5])
+        cache_profils.set(str(profil.num), profil)
+        return profil
+
+    @staticmethod
+    def get_profil(config_db: dict, num: str) -> Profil | None:
+        """
+        Récupère le profil d'une personne (sans l'empreinte du mot de passe) à partir de son numéro.
+
+        Le profil est gardé dans cache_profils (durée de vie limitée, invalidé par update et
+        delete) et y est déjà placé par connection : une page authentifiée n'interroge pas la base.
+
+        Paramètre :
+        ------------
+        num : str
+            Le numéro de la personne (celui gardé en session).
+
+        Retourne :
+        ----------
+        Profil | None : Le profil de la personne, None si elle n'existe pas.
+        """
+        data = cache_profils.get(str(num))
+        if data is not None:
+            return data
+
+        data = get_depot(config_db).personne(num)
+        if data:
+            cache_profils.set(str(num), data)
+        return data
+
+    @staticmethod
+    async def get_profil_async(config_db: dict, num: str) -> Profil | None:
+        """
+        Version asynchrone de get_profil, pour l'application ASGI.
+
+        Paramètre :
+        ------------
+        num : str
+            Le numéro de la personne (celui gardé en session).
+
+        Retourne :
+        ----------
+        Profil | None : Le profil de la personne, None si elle n'existe pas.
+        """
+        data = cache_profils.get(str(num))
+        if data is not None:
+            return data
+
+        data = await get_depot(config_db).personne_async(num)
+        if data:
+            cache_profils.set(str(num), data)
+        return data
+
+    @staticmethod
+    async def get_async(config_db: dict, login: str) -> list[Profil]:
+        """
+        Version asynchrone de get, pour l'application ASGI.
+
+        Paramètre :
+        ------------
+        login : str
+            Le login de la personne à rechercher.
+
+        Retourne :
+        ----------
+        list[Profil] : Les informations de la personne correspondante, sans l'empreinte du mot de passe.
+        """
+        return await get_depot(config_db).personnes_par_login_async(login)
+
+    @staticmethod
+    async def connection_async(config_db: dict, login: str, password: str) -> tuple | None:
+        """
+        Version asynchrone de connection, pour l'application ASGI.
+
+        Paramètres :
+        ------------
+        login : str
+            Le login fourni pour la tentative de connexion.
+        password : str
+            Le mot de passe fourni pour la tentative de connexion.
+
+        Retourne :
+        ----------
+        Profil | None : Le profil de la personne si les identifiants correspondent, None sinon.
+        """
+        depot = get_depot(config_db)
+        data = await depot.personne_par_login_async(login)
+
+        hacheur = get_hacheur(config_db)
+        if not await hacheur.verifier_async(password, data.password if data else None):
+            return None
+
+        if hacheur.a_rehacher(data.password):
+            await depot.remplacer_empreinte_async(data.num, data.password, await hacheur.hacher_async(password))
+
+        profil = Profil._make(data[:5])
+        cache_profils.set(str(profil.num), profil)
+        return profil
 
     def create(self) -> bool:
         """
@@ -158,23 +273,9 @@ class Personne:
         ----------
         bool : True si la création est réussie, False sinon.
         """
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            try:
-                with cnx.cursor() as cursor:
-                    query = """
-                    INSERT INTO Personne (num, perm, nom, prenom, login, password)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """
-                    params = (self.num, self.perm, self.nom, self.prenom, self.login, self.password)
-                    cursor.execute(query, params)
-                    cnx.commit()
-                    return True
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                return False
-        return False
+        empreinte = get_hacheur(self.config_db).hacher(self.password)
+        ligne = (self.num, self.perm, self.nom, self.prenom, self.login, empreinte)
+        return get_depot(self.config_db).inserer_personne(ligne)
 
     def update(self) -> bool:
         """
@@ -184,20 +285,9 @@ class Personne:
         ----------
         bool : True si la mise à jour est réussie, False sinon.
         """
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                sql = """
-                UPDATE Personne
-                SET perm = %s, nom = %s, prenom = %s
-                WHERE num = %s
-                """
-                params = (self.perm, self.nom, self.prenom, self.num)
-                cursor.execute(sql, params)
-                cnx.commit()
-                return True
-
+        if get_depot(self.config_db).modifier_personne(self.num, self.perm, self.nom, self.prenom):
+            cache_profils.invalider(str(self.num))
+            return True
         return False
 
     def delete(self) -> bool:
@@ -208,14 +298,7 @@ class Personne:
         ----------
         bool : True si la suppression est réussie, False sinon.
         """
-        cnx = connect_to_mysql(self.config_db, attempts=3)
-
-        if cnx and cnx.is_connected():
-            with cnx.cursor() as cursor:
-                sql = """DELETE FROM Personne WHERE num = %s"""
-                params = (self.num,)
-                cursor.execute(sql, params)
-                cnx.commit()
-                return True
-
+        if get_depot(self.config_db).supprimer_personne(self.num):
+            cache_profils.invalider(str(self.num))
+            return True
         return False
@@ -0,0 +1,222 @@
+"""
+Vérification des plans d'exécution : aucune requête du modèle ne doit parcourir
+une table entière.
+
+Chaque méthode du dépôt est appelée une fois sur une connexion factice qui
+enregistre les requêtes au lieu de les exécuter : on obtient exactement le SQL
+du dialecte (MySQL ou SQLite), sans le recopier. Chaque lecture, mise à jour et
+suppression est ensuite passée à EXPLAIN (EXPLAIN QUERY PLAN pour SQLite) sur
+la vraie base, et toute table lue en entier est signalée :
+
+- MySQL : accès de type ALL (table) ou index (index complet) ;
+- SQLite : étape SCAN sur une table.
+
+Les méthodes qui lisent tout par construction (chargement complet, export,
+liste des personnes) sont exclues : voir LECTURES_COMPLETES.
+
+Utilisation :
+    python plans.py                   # base MySQL de main.py
+    python plans.py --sqlite bu.sqlite3
+Le code de sortie est 1 si une requête parcourt une table.
+"""
+import argparse
+import datetime
+import re
+import sys
+from contextlib import contextmanager
+import mysql.connector
+from databaseconnection import pooled_connection, type_stockage
+from depot import COLONNES, FAMILLES, DepotMySQL, DepotSQLite, get_depot
+from statuemprunt import StatuEmprunt
+
+# Méthodes du dépôt qui lisent toute une table, volontairement
+LECTURES_COMPLETES: frozenset[str] = frozenset({"tous", "codes", "catalogue", "personnes", "reservations"})
+
+TABLES: frozenset[str] = frozenset({*FAMILLES, "Personne", "Emprunt", "Reservation"})
+
+
+class _Enregistreur:
+    """
+    Connexion et curseur factices : gardent les requêtes exécutées, ne renvoient aucune ligne.
+    """
+
+    unread_result = False
+    lastrowid = None
+    rowcount = 0
+
+    def __init__(self):
+        self.requetes: list[tuple[str, tuple]] = []
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, requete: str, params=()):
+        self.requetes.append((requete, tuple(params)))
+
+    def executemany(self, requete: str, params):
+        self.requetes.append((requete, tuple(params[0])))
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _appels() -> list[tuple[str, tuple]]:
+    """
+    Renvoie les appels (méthode, arguments) qui couvrent les requêtes du dépôt.
+    """
+    aujourdhui = datetime.date.today()
+    appels: list[tuple[str, tuple]] = []
+    for table in FAMILLES:
+        appels += [
+            ("document", (table, "X")),
+            ("documents", (table, ["X", "Y"])),
+            ("page", (table, None, 50)),
+            ("page", (table, "X", 50)),
+            ("tous", (table,)),
+            ("codes", (table,)),
+            ("modifier_document", (table, "X", {"titre": "T"})),
+            ("supprimer_document", (table, "X")),
+        ]
+    changement = ("X", "livre", "Livre", StatuEmprunt.Libre, StatuEmprunt.Reserver, "1", aujourdhui, aujourdhui)
+    appels += [
+        ("catalogue", ()),
+        ("page_catalogue", ("X", 50)),
+        ("personne", ("1",)),
+        ("personne_par_login", ("l",)),
+        ("personnes_par_login", ("l",)),
+        ("personnes", ()),
+        ("modifier_personne", ("1", "user", "N", "P")),
+        ("supprimer_personne", ("1",)),
+        ("remplacer_empreinte", ("1", "a", "b")),
+        ("emprunt", ("X",)),
+        ("emprunts", ()),
+        ("compteurs", ()),
+        ("emprunts_en_retard", (aujourdhui,)),
+        ("enregistrer_emprunts", ([changement],)),
+        ("reservations", ()),
+        ("supprimer_reservations", ([("X", "1")],)),
+    ]
+    return appels
+
+
+def requetes_du_depot(classe: type) -> list[tuple[str, str, tuple]]:
+    """
+    Appelle chaque méthode d'une classe de dépôt SQL sur une connexion factice.
+
+    :param classe: DepotMySQL ou DepotSQLite.
+    :return: Les requêtes de lecture, de mise à jour et de suppression, en (méthode, requête, paramètres).
+    :rtype: list[tuple[str, str, tuple]]
+    """
+    enregistreur = _Enregistreur()
+
+    class DepotEnregistre(classe):
+        def __init__(self):
+            pass
+
+        @contextmanager
+        def _connexion(self):
+            yield enregistreur
+
+    depot = DepotEnregistre()
+    requetes = []
+    for methode, arguments in _appels():
+        enregistreur.requetes.clear()
+        getattr(depot, methode)(*arguments)
+        requetes += [(methode, " ".join(requete.split()), params) for requete, params in enregistreur.requetes
+                     if requete.split()[0].upper() in ("SELECT", "UPDATE", "DELETE", "(SELECT")]
+    return requetes
+
+
+def _parcours_mysql(config_db: dict, requete: str, params: tuple) -> list[str]:
+    with pooled_connection(config_db) as cnx:
+        if not cnx:
+            raise mysql.connector.Error("Connexion à la base impossible.")
+        with cnx.cursor(dictionary=True) as cursor:
+            cursor.execute(f"EXPLAIN {requete}", params)
+            return [ligne["table"] for ligne in cursor.fetchall()
+                    if ligne["type"] in ("ALL", "index") and not str(ligne["table"]).startswith("<")]
+
+
+def _parcours_sqlite(depot: DepotSQLite, requete: str, params: tuple) -> list[str]:
+    with depot._connexion() as cnx:
+        with cnx.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {requete}", params)
+            etapes = [ligne[3] for ligne in cursor.fetchall()]
+    tables = (re.match(r"SCAN (\w+)", etape) for etape in etapes)
+    return [table.group(1) for table in tables if table and table.group(1) in TABLES]
+
+
+def verifier_plans(config_db: dict) -> dict:
+    """
+    Vérifie qu'aucune requête du modèle ne parcourt une table entière sur la base de config_db.
+
+    Pour MySQL, les plans dépendent des statistiques : la vérification a du sens sur une base
+    migrée (schema.py) et peuplée comme en production, pas sur des tables vides.
+
+    :param config_db: La configuration de la base (MySQL ou stockage SQLite).
+    :return: Dictionnaire contenant un message, un statut (500 si une table est parcourue)
+        et la liste des parcours, en (méthode, table, requête).
+    :rtype: dict
+    """
+    stockage = type_stockage(config_db)
+    if stockage == "mysql":
+        requetes = requetes_du_depot(DepotMySQL)
+        parcours = lambda requete, params: _parcours_mysql(config_db, requete, params)
+    elif stockage == "sqlite":
+        requetes = requetes_du_depot(DepotSQLite)
+        depot = get_depot(config_db)
+        parcours = lambda requete, params: _parcours_sqlite(depot, requete, params)
+    else:
+        return {"message": f"Pas de plan d'exécution pour le stockage {stockage}.", "status": 400, "parcours": []}
+
+    trouves = []
+    try:
+        for methode, requete, params in requetes:
+            if methode in LECTURES_COMPLETES:
+                continue
+            trouves += [(methode, table, requete) for table in parcours(requete, params)]
+    except (mysql.connector.Error, ValueError) as err:
+        return {"message": f"EXPLAIN impossible : {err}", "status": 500, "parcours": trouves}
+
+    if trouves:
+        return {"message": f"{len(trouves)} requête(s) parcourent une table entière.", "status": 500,
+                "parcours": trouves}
+    return {"message": f"{len(requetes)} requêtes vérifiées, aucun parcours de table.", "status": 200,
+            "parcours": []}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite", metavar="CHEMIN", help="vérifier une base SQLite plutôt que MySQL")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        config = {"stockage": {"type": "sqlite", "chemin": args.sqlite}}
+    else:
+        config = {
+            "host": "127.0.0.1",
+            "user": "root",
+            "password": "wm7ze*2b",
+            "database": "bu",
+        }
+
+    resultat = verifier_plans(config)
+    print(resultat["message"])
+    for methode, table, requete in resultat["parcours"]:
+        print(f"  {methode} : {table} parcourue par {requete}")
+    sys.exit(0 if resultat["status"] == 200 else 1)
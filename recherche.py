@@ -0,0 +1,430 @@
+"""
+Recherche plein texte sur les titres et auteurs du catalogue.
+
+Index inversé en mémoire : les textes sont découpés en mots, repliés (minuscules,
+sans accents ni ligatures), débarrassés des mots vides et ramenés à leur racine
+par un raciniseur léger du français. Les résultats sont classés par BM25 ; le
+dernier mot d'une requête peut être incomplet (recherche par préfixe, pour la
+saisie au fil de l'eau).
+
+Pour rester sous quelques millisecondes sur un million de documents, chaque terme
+garde, en plus de sa liste de documents, ses `profondeur` meilleurs documents par
+score BM25 : une requête commence par ces listes d'impact au lieu de listes qui
+peuvent compter des centaines de milliers d'entrées. Le classement reste exact :
+les documents vus sont notés par BM25, et un document absent des listes d'impact
+ne peut dépasser la somme des bornes de leurs queues. Si cette somme n'atteint pas
+le k-ième score, le résultat est sûr ; sinon les listes complètes des groupes dont
+les bornes pourraient encore faire la différence sont parcourues (MaxScore).
+"""
+import bisect
+import functools
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from depot import ErreurDepot
+from document import Document
+from index_cotes import DOCUMENTS
+
+logger = logging.getLogger(__name__)
+
+# Colonnes indexées de chaque type de document (champs des lignes, voir lignes.py)
+COLONNES_TEXTE: dict[str, tuple[str, ...]] = {"livre": ("titre", "auteur"), "dvd": ("titre", "auteur"),
+                                             "journal": ("titre",)}
+
+MOTS_VIDES: frozenset[str] = frozenset("""
+a au aux avec ce ces d dans de des du elle en et il ils je l la le les leur lui ma mais me meme mes moi mon
+n ne nos notre nous on ou par pas pour qu que qui s sa se ses son sur t ta te tes toi ton tu un une vos votre
+vous y the of and
+""".split())
+
+# Suffixes retirés par le raciniseur, du plus long au plus court, avec leur remplacement
+SUFFIXES: tuple[tuple[str, str], ...] = (
+    ("issements", "iss"), ("issement", "iss"), ("atrices", "at"), ("atrice", "at"), ("ateurs", "at"),
+    ("ateur", "at"), ("ations", "at"), ("ation", "at"), ("ements", ""), ("ement", ""), ("ments", ""),
+    ("ment", ""), ("euses", "eu"), ("euse", "eu"), ("eux", "eu"), ("ives", "if"), ("ive", "if"),
+    ("ifs", "if"), ("elles", "el"), ("elle", "el"), ("ennes", "en"), ("enne", "en"), ("ettes", "et"),
+    ("ette", "et"), ("iques", "ic"), ("ique", "ic"), ("ismes", "ism"), ("isme", "ism"), ("istes", "ist"),
+    ("iste", "ist"), ("ables", "abl"), ("able", "abl"), ("aux", "al"),
+)
+
+MOT = re.compile(r"[a-z0-9]+")
+
+
+def plier(texte: str) -> str:
+    """
+    Met un texte en minuscules et retire accents et ligatures ("Œuvres Complètes" -> "oeuvres completes").
+    """
+    texte = texte.lower().replace("œ", "oe").replace("æ", "ae")
+    return "".join(c for c in unicodedata.normalize("NFKD", texte) if not unicodedata.combining(c))
+
+
+@functools.lru_cache(maxsize=100_000)
+def raciner(mot: str) -> str:
+    """
+    Raciniseur léger du français : retire les marques de pluriel, de genre et les suffixes
+    les plus courants ("nationales" et "national" donnent "national").
+    """
+    for suffixe, remplacement in SUFFIXES:
+        if mot.endswith(suffixe) and len(mot) - len(suffixe) >= 3:
+            return mot[:-len(suffixe)] + remplacement
+    if len(mot) > 3 and mot[-1] in "sx":
+        mot = mot[:-1]
+    if len(mot) > 4 and mot.endswith("e"):
+        mot = mot[:-1]
+    return mot
+
+
+def termes(texte: str) -> list[str]:
+    """
+    Découpe un texte en termes indexés : mots repliés, sans mots vides, racinisés.
+    """
+    return [raciner(mot) for mot in MOT.findall(plier(texte)) if mot not in MOTS_VIDES]
+
+
+class _Postings:
+    """
+    Liste des documents d'un terme, et ses meilleurs documents par score (liste d'impact).
+    """
+    __slots__ = ("docs", "tfs", "impacts", "morts", "verifie", "complet", "moyenne")
+
+    def __init__(self):
+        self.docs: array = array("I")
+        self.tfs: array = array("H")
+        # (-impact, doc) triés : les meilleurs en tête ; None tant qu'elle n'est pas calculée
+        self.impacts: list[tuple[float, int]] | None = None
+        self.morts: int = 0
+        # nombre de suppressions dans l'index lors de la dernière vérification de la liste d'impact
+        self.verifie: int = 0
+        # True si la liste d'impact contient tous les documents du terme
+        self.complet: bool = True
+        # plus petite longueur moyenne avec laquelle un impact de la liste a été calculé
+        self.moyenne: float = math.inf
+
+
+class IndexRecherche:
+    """
+    Index inversé des titres et auteurs, classement BM25.
+
+    Les documents sont identifiés en interne par un entier ; modifier un document en crée
+    un nouveau et enterre l'ancien, que les requêtes ignorent jusqu'au prochain compactage.
+
+    Attributs :
+    -----------
+    construit : bool
+        True une fois l'index construit à partir des tables.
+
+    Méthodes :
+    ----------
+    construire(config_db: dict) -> bool:
+        (Re)construit l'index à partir des tables Livre, Dvd et Journal.
+
+    ajouter(code: str, type_document: str, texte: str) -> None:
+        Indexe (ou réindexe) un document.
+
+    retirer(code: str) -> None:
+        Retire un document de l'index.
+
+    rechercher(requete: str, k: int = 10, prefixe: bool = True) -> list[tuple[str, str, float]]:
+        Renvoie les k meilleurs documents : (cote, type, score).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, profondeur: int = 256, expansions: int = 16):
+        self.k1: float = k1
+        self.b: float = b
+        self.profondeur: int = profondeur
+        self.expansions: int = expansions
+        self.construit: bool = False
+        self._config_db: dict | None = None
+        self._vider()
+        self._verrou = threading.RLock()
+
+    def _vider(self) -> None:
+        self._postings: dict[str, _Postings] = {}
+        self._vocabulaire: list[str] = []
+        self._codes: list[str | None] = []
+        self._types: list[str] = []
+        self._longueurs: array = array("H")
+        self._ids: dict[str, int] = {}
+        self._total_longueurs: int = 0
+        self._suppressions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _moyenne(self) -> float:
+        return self._total_longueurs / len(self._ids) if self._ids else 1.0
+
+    def _impact(self, tf: int, longueur: int, moyenne: float) -> float:
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * longueur / moyenne))
+
+    def _texte(self, type_document: str, row: tuple) -> str:
+        valeurs = (getattr(row, colonne) for colonne in COLONNES_TEXTE[type_document])
+        return " ".join(str(valeur) for valeur in valeurs if valeur is not None)
+
+    def construire(self, config_db: dict) -> bool:
+        self._config_db = config_db
+        # construit à part puis échangé : les recherches continuent pendant la construction
+        nouveau = IndexRecherche(self.k1, self.b, self.profondeur, self.expansions)
+        try:
+            for type_document, classe in DOCUMENTS.items():
+                for row in classe.iter_all(config_db):
+                    nouveau._ajouter(row.code, type_document, self._texte(type_document, row), tri=False)
+        except ErreurDepot as err:
+            logger.info("Index de recherche non construit : %s", err)
+            return False
+        nouveau._vocabulaire = sorted(nouveau._postings)
+
+        with self._verrou:
+            (self._postings, self._vocabulaire, self._codes, self._types, self._longueurs, self._ids,
+             self._total_longueurs, self._suppressions) = (
+                nouveau._postings, nouveau._vocabulaire, nouveau._codes, nouveau._types,
+                nouveau._longueurs, nouveau._ids, nouveau._total_longueurs, nouveau._suppressions)
+            self.construit = True
+        logger.info("Index de recherche construit : %d documents, %d termes.", len(self), len(self._postings))
+        return True
+
+    def construire_en_arriere_plan(self, config_db: dict) -> threading.Thread:
+        """
+        Construit l'index dans un thread, pour ne pas retarder le démarrage de l'application.
+        """
+        thread = threading.Thread(target=self.construire, args=(config_db,), name="index-recherche", daemon=True)
+        thread.start()
+        return thread
+
+    def ajouter(self, code: str, type_document: str, texte: str) -> None:
+        with self._verrou:
+            self._ajouter(code, type_document, texte, tri=True)
+
+    def _ajouter(self, code: str, type_document: str, texte: str, tri: bool) -> None:
+        if code in self._ids:
+            self._retirer(code)
+
+        frequences: dict[str, int] = {}
+        for terme in termes(texte):
+            frequences[terme] = frequences.get(terme, 0) + 1
+        longueur = min(sum(frequences.values()), 0xFFFF)
+
+        doc = len(self._codes)
+        self._codes.append(code)
+        self._types.append(type_document)
+        self._longueurs.append(longueur)
+        self._ids[code] = doc
+        self._total_longueurs += longueur
+        moyenne = self._moyenne()
+
+        for terme, tf in frequences.items():
+            postings = self._postings.get(terme)
+            if postings is None:
+                postings = self._postings[terme] = _Postings()
+                if tri:
+                    bisect.insort(self._vocabulaire, terme)
+            postings.docs.append(doc)
+            postings.tfs.append(min(tf, 0xFFFF))
+            if postings.impacts is not None:
+                # on ne garde dans la liste d'impact que ce qui peut y entrer
+                entree = (-self._impact(tf, longueur, moyenne), doc)
+                postings.moyenne = min(postings.moyenne, moyenne)
+                if len(postings.impacts) < self.profondeur:
+                    bisect.insort(postings.impacts, entree)
+                else:
+                    postings.complet = False
+                    if entree < postings.impacts[-1]:
+                        bisect.insort(postings.impacts, entree)
+                        postings.impacts.pop()
+
+    def retirer(self, code: str) -> None:
+        with self._verrou:
+            self._retirer(code)
+
+    def _retirer(self, code: str) -> None:
+        doc = self._ids.pop(code, None)
+        if doc is None:
+            return
+        self._codes[doc] = None
+        self._total_longueurs -= self._longueurs[doc]
+        self._suppressions += 1
+
+    def retirer_type(self, type_document: str) -> None:
+        with self._verrou:
+            for doc, code in enumerate(self._codes):
+                if code is not None and self._types[doc] == type_document:
+                    self._retirer(code)
+
+    def _liste_impact(self, postings: _Postings) -> list[tuple[float, int]]:
+        impacts = postings.impacts
+        if impacts is not None:
+            if postings.verifie == self._suppressions:
+                return impacts
+            postings.verifie = self._suppressions
+            vivants = sum(1 for _, doc in impacts if self._codes[doc] is not None)
+            # trop de documents enterrés : la liste ne suffit plus pour un top-k fiable
+            if vivants >= min(len(postings.docs) - postings.morts, self.profondeur) // 2:
+                return impacts
+
+        gardes = [(doc, tf) for doc, tf in zip(postings.docs, postings.tfs) if self._codes[doc] is not None]
+        if len(gardes) < len(postings.docs) // 2:
+            # compactage : plus de la moitié des entrées sont enterrées
+            postings.docs = array("I", (doc for doc, _ in gardes))
+            postings.tfs = array("H", (tf for _, tf in gardes))
+            postings.morts = 0
+        else:
+            postings.morts = len(postings.docs) - len(gardes)
+
+        moyenne = self._moyenne()
+        postings.verifie = self._suppressions
+        postings.complet = len(gardes) <= self.profondeur
+        postings.moyenne = moyenne
+        postings.impacts = heapq.nsmallest(
+            self.profondeur, ((-self._impact(tf, self._longueurs[doc], moyenne), doc) for doc, tf in gardes)
+        )
+        return postings.impacts
+
+    def _score(self, doc: int, groupes: list[list[tuple[_Postings, float]]], moyenne: float) -> float:
+        """
+        Score BM25 exact d'un document : pour chaque groupe, son meilleur terme.
+        """
+        longueur = self._longueurs[doc]
+        total = 0.0
+        for groupe in groupes:
+            meilleur = 0.0
+            for postings, idf in groupe:
+                docs = postings.docs
+                indice = bisect.bisect_left(docs, doc)
+                if indice < len(docs) and docs[indice] == doc:
+                    meilleur = max(meilleur, idf * self._impact(postings.tfs[indice], longueur, moyenne))
+            total += meilleur
+        return total
+
+    def _completer(self, groupes: list[list[tuple[_Postings, float]]], bornes: list[float], vus: set[int],
+                   meilleurs: list[tuple[float, int]], k: int, moyenne: float) -> list[tuple[float, int]]:
+        """
+        Cherche dans les listes complètes les documents non vus qui entrent dans le top-k (MaxScore).
+
+        Un document non vu marque au plus bornes[g] dans le groupe g. Les groupes de plus petites
+        bornes dont la somme n'atteint pas le seuil ne suffisent pas : seules les listes des autres
+        (les groupes essentiels) sont parcourues, et chaque document y est noté exactement.
+        """
+        heapq.heapify(meilleurs)
+        seuil = meilleurs[0][0] if len(meilleurs) == k else 0.0
+        cumul, essentiels = 0.0, []
+        for indice in sorted(range(len(groupes)), key=bornes.__getitem__):
+            cumul += bornes[indice]
+            if cumul > seuil:
+                essentiels.append(indice)
+
+        for indice in essentiels:
+            for postings, _ in groupes[indice]:
+                for doc in postings.docs:
+                    if doc in vus or self._codes[doc] is None:
+                        continue
+                    vus.add(doc)
+                    score = self._score(doc, groupes, moyenne)
+                    if len(meilleurs) < k:
+                        heapq.heappush(meilleurs, (score, doc))
+                    elif score > meilleurs[0][0]:
+                        heapq.heapreplace(meilleurs, (score, doc))
+        return meilleurs
+
+    def _termes_prefixe(self, prefixe: str) -> list[str]:
+        candidats: set[str] = set()
+        for debut in {prefixe, raciner(prefixe)}:
+            position = bisect.bisect_left(self._vocabulaire, debut)
+            for terme in self._vocabulaire[position:position + 4 * self.expansions]:
+                if not terme.startswith(debut):
+                    break
+                candidats.add(terme)
+        # les termes les plus fréquents d'abord
+        return heapq.nlargest(self.expansions, candidats, key=lambda t: len(self._postings[t].docs))
+
+    def rechercher(self, requete: str, k: int = 10, prefixe: bool = True) -> list[tuple[str, str, float]]:
+        mots = MOT.findall(plier(requete))
+        if not mots:
+            return []
+        # le dernier mot est en cours de saisie, sauf si la requête se termine par un espace
+        incomplet = mots.pop() if prefixe and not requete[-1:].isspace() else None
+
+        with self._verrou:
+            n = len(self._ids)
+            if n == 0:
+                return []
+            mots_groupes: list[list[str]] = [[raciner(mot)] for mot in mots if mot not in MOTS_VIDES]
+            if incomplet is not None:
+                mots_groupes.append(self._termes_prefixe(incomplet))
+
+            moyenne = self._moyenne()
+            groupes: list[list[tuple[_Postings, float]]] = []
+            for groupe in mots_groupes:
+                termes_groupe = []
+                for terme in groupe:
+                    postings = self._postings.get(terme)
+                    if postings is not None:
+                        # la liste d'impact d'abord : sa vérification met à jour les documents enterrés
+                        self._liste_impact(postings)
+                        df = min(len(postings.docs) - postings.morts, n)
+                        termes_groupe.append((postings, math.log(1 + (n - df + 0.5) / (df + 0.5))))
+                if termes_groupe:
+                    groupes.append(termes_groupe)
+
+            # première passe : les listes d'impact, fusionnées par groupe (un mot incomplet compte
+            # chaque document une fois) ; bornes[g] majore le score dans g d'un document non vu
+            vus: set[int] = set()
+            bornes: list[float] = []
+            for groupe in groupes:
+                listes, borne, facteur_groupe = [], 0.0, 1.0
+                for postings, idf in groupe:
+                    impacts = postings.impacts
+                    # impacts calculés avec une longueur moyenne plus petite : un impact grandit au
+                    # plus comme la moyenne (voir _impact)
+                    facteur = max(1.0, moyenne / postings.moyenne)
+                    facteur_groupe = max(facteur_groupe, facteur)
+                    if not postings.complet and impacts:
+                        borne = max(borne, -impacts[-1][0] * idf * facteur)
+                    listes.append(((impact * idf, doc) for impact, doc in impacts))
+
+                vus_groupe: set[int] = set()
+                for score, doc in heapq.merge(*listes):
+                    if doc in vus_groupe or self._codes[doc] is None:
+                        continue
+                    vus_groupe.add(doc)
+                    if len(vus_groupe) >= self.profondeur:
+                        borne = max(borne, -score * facteur_groupe)
+                        break
+                vus |= vus_groupe
+                bornes.append(borne)
+
+            meilleurs = heapq.nlargest(k, ((self._score(doc, groupes, moyenne), doc) for doc in vus))
+            seuil = meilleurs[-1][0] if len(meilleurs) == k else 0.0
+            if sum(bornes) > seuil:
+                # un document absent des listes d'impact pourrait encore entrer dans le top-k
+                meilleurs = sorted(self._completer(groupes, bornes, vus, meilleurs, k, moyenne), reverse=True)
+            return [(self._codes[doc], self._types[doc], score) for score, doc in meilleurs]
+
+    def stats(self) -> dict:
+        return {"documents": len(self), "termes": len(self._postings), "construit": self.construit}
+
+
+def _suivre_ecritures(action: str, type_document: str, code: str | None) -> None:
+    if not index_recherche.construit or type_document not in COLONNES_TEXTE:
+        return
+    if code is None:
+        # import en masse : la famille est réindexée sans bloquer l'import
+        def reindexer():
+            index_recherche.retirer_type(type_document)
+            for row in DOCUMENTS[type_document].iter_all(index_recherche._config_db):
+                index_recherche.ajouter(row.code, type_document, index_recherche._texte(type_document, row))
+        threading.Thread(target=reindexer, name="index-recherche", daemon=True).start()
+    elif action == "delete":
+        index_recherche.retirer(code)
+    elif action in ("insert", "update"):
+        rows = DOCUMENTS[type_document].get(index_recherche._config_db, code)
+        if rows:
+            index_recherche.ajouter(code, type_document, index_recherche._texte(type_document, rows[0]))
+
+
+# Index partagé par tout le processus
+index_recherche = IndexRecherche()
+Document.abonner(_suivre_ecritures)
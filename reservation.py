@@ -0,0 +1,78 @@
+import datetime
+from depot import get_depot
+
+
+class Reservation:
+    """
+    Dépôt des files d'attente de réservation (table Reservation).
+
+    Une ligne par usager en attente d'un document ; l'identifiant auto-incrémenté donne
+    l'ordre d'arrivée. Une ligne est supprimée quand l'usager est servi, annule sa
+    réservation ou quand celle-ci expire. Les files en mémoire (voir file_attente.py)
+    n'en sont qu'un cache.
+
+    Colonnes :
+    ----------
+    id, code, num_usager, date_demande, date_expiration
+
+    Méthodes :
+    ----------
+    get_all(config_db: dict) -> list[tuple] | None:
+        Récupère toutes les réservations, dans l'ordre d'arrivée de chaque document.
+
+    ajouter(config_db: dict, code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+        Enregistre une réservation et renvoie son identifiant.
+
+    supprimer_lot(config_db: dict, reservations: list[tuple[str, str]]) -> bool:
+        Supprime plusieurs réservations (cote, usager) en une seule transaction.
+    """
+
+    @staticmethod
+    def get_all(config_db: dict) -> list[tuple] | None:
+        """
+        Récupère toutes les réservations en cours.
+
+        Retourne :
+        ----------
+        list[tuple] | None : (id, code, num_usager, date_demande, date_expiration), triés par cote
+        puis par ordre d'arrivée, None si la base est inaccessible.
+        """
+        return get_depot(config_db).reservations()
+
+    @staticmethod
+    def ajouter(config_db: dict, code: str, num_usager: str, date_expiration: datetime.date) -> int | None:
+        """
+        Enregistre la réservation d'un document par un usager, en fin de file.
+
+        Paramètres :
+        ------------
+        code : str
+            La cote du document.
+        num_usager : str
+            Le numéro de l'usager.
+        date_expiration : datetime.date
+            La date à partir de laquelle la réservation n'est plus valable.
+
+        Retourne :
+        ----------
+        int | None : L'identifiant de la réservation, None si elle existe déjà ou si l'écriture a échoué.
+        """
+        return get_depot(config_db).ajouter_reservation(code, num_usager, date_expiration)
+
+    @staticmethod
+    def supprimer_lot(config_db: dict, reservations: list[tuple[str, str]]) -> bool:
+        """
+        Supprime plusieurs réservations en une seule transaction.
+
+        Paramètres :
+        ------------
+        reservations : list[tuple[str, str]]
+            Les couples (cote, numéro de l'usager) à supprimer.
+
+        Retourne :
+        ----------
+        bool : True si la suppression a été enregistrée.
+        """
+        if not reservations:
+            return True
+        return get_depot(config_db).supprimer_reservations(reservations)
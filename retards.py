@@ -0,0 +1,268 @@
+"""
+Détection des emprunts en retard.
+
+Les emprunts en cours sont rangés dans un tas min trié par date de fin : les
+emprunts en retard à une date donnée forment le sommet du tas, et les trouver
+coûte O(k log k) pour k retards parmi n emprunts, sans parcourir le catalogue. Le tas
+est alimenté par les notifications "emprunt" de Document ; une entrée devenue
+obsolète (document rendu, emprunt prolongé) est ignorée quand elle remonte en
+tête, et le tas est compacté quand ces entrées deviennent majoritaires.
+
+Une tâche périodique passe les emprunts en retard au statut Non_Rendue avec
+Bibliotheques.ajout_non_rendue, et produit une fois par jour un rapport lu dans
+la table Emprunt (index (statut, date_fin), voir schema.py), qui couvre aussi
+les emprunts enregistrés par d'autres processus.
+"""
+import datetime
+import heapq
+import logging
+import threading
+from bibiotheques import Bibliotheques
+from document import Document
+from emprunt import Emprunt
+from statuemprunt import StatuEmprunt
+
+logger = logging.getLogger(__name__)
+
+
+class MoteurRetards:
+    """
+    File des emprunts en cours, triée par date de fin, d'une bibliothèque.
+
+    Attributs :
+    -----------
+    bibio : Bibliotheques
+        La bibliothèque dont les emprunts sont surveillés (son état doit être chargé).
+    dernier_rapport : dict | None
+        Le dernier rapport quotidien produit par la tâche périodique.
+
+    Méthodes :
+    ----------
+    charger() -> int:
+        Reconstruit le tas à partir des emprunts en cours de la bibliothèque.
+
+    en_retard(jour: datetime.date | None = None) -> list[Document]:
+        Renvoie les documents dont l'emprunt devait finir avant `jour` (aujourd'hui par défaut).
+
+    verifier(jour: datetime.date | None = None) -> dict:
+        Passe les emprunts en retard au statut Non_Rendue.
+
+    rapport(jour: datetime.date | None = None) -> dict:
+        Liste les emprunts en retard enregistrés en base, avec leur nombre de jours de retard.
+
+    demarrer(intervalle: float = 3600) -> threading.Thread:
+        Lance la tâche périodique (verifier, puis rapport une fois par jour).
+
+    arreter() -> None:
+        Arrête la tâche périodique et le suivi des emprunts (désabonnement de Document).
+    """
+
+    def __init__(self, bibio: Bibliotheques):
+        self.bibio: Bibliotheques = bibio
+        self.dernier_rapport: dict | None = None
+        self._verrou = threading.Lock()
+        # (date de fin en ordinal, cote) ; une entrée n'est valable que si elle correspond à _echeances
+        self._tas: list[tuple[int, str]] = []
+        self._echeances: dict[str, int] = {}
+        self._arret = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._jour_rapport: datetime.date | None = None
+
+        self.charger()
+        Document.abonner(self._suivre_emprunts)
+
+    def __len__(self) -> int:
+        return len(self._echeances)
+
+    def charger(self) -> int:
+        """
+        Reconstruit le tas à partir des emprunts en cours (statut Reserver) de la bibliothèque.
+        À rappeler après Bibliotheques.charger().
+
+        Retourne :
+        ----------
+        int : Le nombre d'emprunts en cours.
+        """
+        echeances = {document.code: document._date_fin_emprunt.toordinal()
+                     for document, statut in self.bibio.livres.items() if statut == StatuEmprunt.Reserver}
+        tas = [(fin, code) for code, fin in echeances.items()]
+        heapq.heapify(tas)
+        with self._verrou:
+            self._tas, self._echeances = tas, echeances
+        return len(echeances)
+
+    def _suivre_emprunts(self, action: str, type_document: str, code: str | None) -> None:
+        if action != "emprunt" or code is None:
+            return
+        document = self.bibio.document(code)
+        if document is None:
+            return
+
+        with self._verrou:
+            if self.bibio.livres.get(document) != StatuEmprunt.Reserver:
+                # rendu ou déjà non rendu : l'entrée du tas devient obsolète
+                self._echeances.pop(code, None)
+                self._compacter()
+                return
+
+            fin = document._date_fin_emprunt.toordinal()
+            if self._echeances.get(code) != fin:
+                self._echeances[code] = fin
+                heapq.heappush(self._tas, (fin, code))
+
+    def _compacter(self) -> None:
+        # les entrées obsolètes ne sont retirées qu'en tête : on reconstruit quand elles sont majoritaires
+        if len(self._tas) > 2 * len(self._echeances) + 1024:
+            self._tas = [(fin, code) for code, fin in self._echeances.items()]
+            heapq.heapify(self._tas)
+
+    def en_retard(self, jour: datetime.date | None = None) -> list[Document]:
+        """
+        Renvoie les documents dont l'emprunt devait finir avant `jour`, du plus ancien au plus récent.
+
+        Le tas n'est pas modifié : un nœud dont la date de fin est passée a ses enfants à
+        explorer, les autres arrêtent la descente. Le parcours visite O(k) nœuds pour k
+        retards, puis les trie : O(k log k), quelle que soit la taille du tas.
+
+        Paramètres :
+        ------------
+        jour : datetime.date | None
+            La date de référence, aujourd'hui par défaut.
+
+        Retourne :
+        ----------
+        list[Document] : Les documents en retard.
+        """
+        limite = (jour or datetime.date.today()).toordinal()
+        with self._verrou:
+            tas, echeances = self._tas, self._echeances
+            valides: list[tuple[int, str]] = []
+            taille = len(tas)
+            a_visiter = [0] if tas else []
+            while a_visiter:
+                indice = a_visiter.pop()
+                fin, code = tas[indice]
+                if fin >= limite:
+                    continue
+                if echeances.get(code) == fin:
+                    valides.append((fin, code))
+                enfant = 2 * indice + 1
+                if enfant < taille:
+                    a_visiter.append(enfant)
+                    if enfant + 1 < taille:
+                        a_visiter.append(enfant + 1)
+        valides.sort()
+
+        documents = (self.bibio.document(code) for _, code in valides)
+        return [document for document in documents if document is not None]
+
+    def verifier(self, jour: datetime.date | None = None) -> dict:
+        """
+        Passe au statut Non_Rendue les emprunts en retard à la date `jour`.
+
+        Paramètres :
+        ------------
+        jour : datetime.date | None
+            La date de référence, aujourd'hui par défaut.
+
+        Retourne :
+        ----------
+        dict : Les cotes passées en Non_Rendue, les cotes en échec, un message et un statut.
+        """
+        marques: list[str] = []
+        echecs: list[str] = []
+        for document in self.en_retard(jour):
+            resultat = self.bibio.ajout_non_rendue(document)
+            (marques if resultat["status"] == 200 else echecs).append(document.code)
+
+        return {
+            "marques": marques,
+            "echecs": echecs,
+            "message": f"{len(marques)} emprunt(s) passé(s) en non rendu, {len(echecs)} échec(s).",
+            "status": 200 if not echecs else 500
+        }
+
+    def rapport(self, jour: datetime.date | None = None) -> dict:
+        """
+        Liste les emprunts en retard à la date `jour`, lus dans la table Emprunt.
+
+        Paramètres :
+        ------------
+        jour : datetime.date | None
+            La date du rapport, aujourd'hui par défaut.
+
+        Retourne :
+        ----------
+        dict : "jour", "retards" (cote, type, usager, date de fin, jours de retard, statut, du plus
+        ancien au plus récent), "par_usager" (nombre de retards par usager), un message et un statut.
+        Les dates sont au format ISO (AAAA-MM-JJ) : le rapport est servi tel quel en JSON.
+        """
+        jour = jour or datetime.date.today()
+        rows = Emprunt.en_retard(self.bibio._config_db, jour)
+        if rows is None:
+            return {"jour": jour.isoformat(), "retards": [], "par_usager": {},
+                    "message": "Le rapport des retards n'a pas pu être produit.", "status": 500}
+
+        retards = [{
+            "code": code,
+            "type": type_document,
+            "num_usager": num_usager,
+            "date_fin": date_fin.isoformat(),
+            "jours": (jour - date_fin).days,
+            "statut": statut,
+        } for code, type_document, num_usager, statut, date_fin in rows]
+
+        par_usager: dict[str, int] = {}
+        for retard in retards:
+            par_usager[retard["num_usager"]] = par_usager.get(retard["num_usager"], 0) + 1
+
+        return {
+            "jour": jour.isoformat(),
+            "retards": retards,
+            "par_usager": par_usager,
+            "message": f"{len(retards)} emprunt(s) en retard au {jour:%d/%m/%Y}, {len(par_usager)} usager(s) concerné(s).",
+            "status": 200
+        }
+
+    def executer(self, jour: datetime.date | None = None) -> dict:
+        """
+        Un passage de la tâche périodique : verifier, puis le rapport si c'est le premier passage du jour.
+        """
+        jour = jour or datetime.date.today()
+        resultat = self.verifier(jour)
+        logger.info("Retards : %s", resultat["message"])
+
+        if self._jour_rapport != jour:
+            rapport = self.rapport(jour)
+            if rapport["status"] == 200:
+                self._jour_rapport, self.dernier_rapport = jour, rapport
+            logger.info("Rapport des retards : %s", rapport["message"])
+        return resultat
+
+    def demarrer(self, intervalle: float = 3600.0) -> threading.Thread:
+        """
+        Lance la tâche périodique dans un thread, un passage toutes les `intervalle` secondes.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._arret.clear()
+
+        def boucle():
+            while not self._arret.is_set():
+                try:
+                    self.executer()
+                except Exception:
+                    logger.exception("La détection des retards a échoué.")
+                self._arret.wait(intervalle)
+
+        self._thread = threading.Thread(target=boucle, name="retards", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def arreter(self) -> None:
+        """
+        Arrête la tâche périodique et se désabonne des écritures du catalogue : l'instance
+        ne suit plus les emprunts.
+        """
+        self._arret.set()
+        Document.desabonner(self._suivre_emprunts)
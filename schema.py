@@ -0,0 +1,238 @@
+import datetime
+import logging
+import mysql.connector
+from databaseconnection import pooled_connection, type_stockage
+
+logger = logging.getLogger(__name__)
+
+# Tables de base, créées si absentes avant la première migration (version 0). Les clés
+# primaires sont les index groupés d'InnoDB : les pages triées par cote (code > %s ORDER BY
+# code LIMIT n) lisent les lignes dans l'ordre de la clé, sans index secondaire.
+TABLES: list[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS Livre (
+        code VARCHAR(50) NOT NULL PRIMARY KEY,
+        salle VARCHAR(50) NOT NULL,
+        titre VARCHAR(255) NOT NULL,
+        auteur VARCHAR(255) NOT NULL,
+        sur_place TINYINT(1) NOT NULL DEFAULT 0,
+        online TINYINT(1) NOT NULL DEFAULT 0,
+        date_debut_emprunt DATE NULL,
+        date_fin_emprunt DATE NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Dvd (
+        code VARCHAR(50) NOT NULL PRIMARY KEY,
+        salle VARCHAR(50) NOT NULL,
+        titre VARCHAR(255) NOT NULL,
+        auteur VARCHAR(255) NOT NULL,
+        sur_place TINYINT(1) NOT NULL DEFAULT 0,
+        online TINYINT(1) NOT NULL DEFAULT 0,
+        date_debut_emprunt DATE NULL,
+        date_fin_emprunt DATE NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Journal (
+        code VARCHAR(50) NOT NULL PRIMARY KEY,
+        salle VARCHAR(50) NOT NULL,
+        titre VARCHAR(255) NOT NULL,
+        date_publication DATE NOT NULL,
+        sur_place TINYINT(1) NOT NULL DEFAULT 0,
+        online TINYINT(1) NOT NULL DEFAULT 0,
+        date_debut_emprunt DATE NULL,
+        date_fin_emprunt DATE NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Personne (
+        num VARCHAR(50) NOT NULL PRIMARY KEY,
+        perm VARCHAR(20) NOT NULL,
+        nom VARCHAR(100) NOT NULL,
+        prenom VARCHAR(100) NOT NULL,
+        login VARCHAR(100) NOT NULL,
+        password VARCHAR(100) NOT NULL
+    ) ENGINE=InnoDB
+    """,
+]
+
+# Migrations versionnées, appliquées dans l'ordre et une seule fois chacune.
+# Ne jamais modifier une migration déjà publiée : en ajouter une nouvelle.
+# Elles ne concernent que MySQL : le dépôt SQLite crée directement le schéma final
+# (SCHEMA_SQLITE) et le dépôt mémoire n'en a pas. plans.py vérifie qu'aucune requête du
+# modèle ne parcourt une table entière.
+MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (1, "Index unique sur Personne.login", [
+        "CREATE UNIQUE INDEX ux_personne_login ON Personne (login)",
+    ]),
+    (2, "Table Emprunt : état des emprunts partagé entre processus", [
+        """
+        CREATE TABLE IF NOT EXISTS Emprunt (
+            code VARCHAR(50) NOT NULL PRIMARY KEY,
+            type_document VARCHAR(10) NOT NULL,
+            num_usager VARCHAR(50) NULL,
+            statut VARCHAR(20) NOT NULL DEFAULT 'Libre',
+            date_debut DATE NULL,
+            date_fin DATE NULL,
+            nb_emprunts INT NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (3, "Index Emprunt (statut, date_fin) pour la détection des retards", [
+        "CREATE INDEX ix_emprunt_statut_fin ON Emprunt (statut, date_fin)",
+    ]),
+    (4, "Table Reservation : files d'attente des documents", [
+        """
+        CREATE TABLE IF NOT EXISTS Reservation (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            code VARCHAR(50) NOT NULL,
+            num_usager VARCHAR(50) NOT NULL,
+            date_demande DATETIME NOT NULL,
+            date_expiration DATE NOT NULL,
+            UNIQUE KEY ux_reservation_code_usager (code, num_usager)
+        )
+        """,
+    ]),
+    (5, "Personne.password assez large pour une empreinte (voir motdepasse.py)", [
+        "ALTER TABLE Personne MODIFY password VARCHAR(255) NOT NULL",
+    ]),
+    (6, "Index couvrants de la table Emprunt (chargement, retards, compteurs)", [
+        # les emprunts non libres (chargement de Bibliotheques) et les retards (statut, date_fin)
+        # se lisent dans l'index seul : la cote, clé primaire, y est incluse par InnoDB
+        "CREATE INDEX ix_emprunt_statut_couvrant ON Emprunt "
+        "(statut, date_fin, type_document, num_usager, date_debut, nb_emprunts)",
+        "DROP INDEX ix_emprunt_statut_fin ON Emprunt",
+        # nombre d'emprunts par cote (autocomplétion) : WHERE nb_emprunts > 0, index seul
+        "CREATE INDEX ix_emprunt_nb_emprunts ON Emprunt (nb_emprunts)",
+    ]),
+]
+
+# Schéma SQLite (voir depot.DepotSQLite), équivalent à TABLES suivies de toutes les migrations.
+# Les tables à clé textuelle sont WITHOUT ROWID : comme avec InnoDB, la clé primaire groupe les
+# lignes et les index secondaires la contiennent, ce qui les rend couvrants.
+SCHEMA_SQLITE: str = """
+CREATE TABLE IF NOT EXISTS Livre (
+    code TEXT PRIMARY KEY, salle TEXT NOT NULL, titre TEXT NOT NULL, auteur TEXT NOT NULL,
+    sur_place INTEGER NOT NULL DEFAULT 0, online INTEGER NOT NULL DEFAULT 0,
+    date_debut_emprunt DATE, date_fin_emprunt DATE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS Dvd (
+    code TEXT PRIMARY KEY, salle TEXT NOT NULL, titre TEXT NOT NULL, auteur TEXT NOT NULL,
+    sur_place INTEGER NOT NULL DEFAULT 0, online INTEGER NOT NULL DEFAULT 0,
+    date_debut_emprunt DATE, date_fin_emprunt DATE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS Journal (
+    code TEXT PRIMARY KEY, salle TEXT NOT NULL, titre TEXT NOT NULL, date_publication DATE NOT NULL,
+    sur_place INTEGER NOT NULL DEFAULT 0, online INTEGER NOT NULL DEFAULT 0,
+    date_debut_emprunt DATE, date_fin_emprunt DATE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS Personne (
+    num TEXT PRIMARY KEY, perm TEXT NOT NULL, nom TEXT NOT NULL, prenom TEXT NOT NULL,
+    login TEXT NOT NULL, password TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_personne_login ON Personne (login);
+CREATE TABLE IF NOT EXISTS Emprunt (
+    code TEXT PRIMARY KEY, type_document TEXT NOT NULL, num_usager TEXT,
+    statut TEXT NOT NULL DEFAULT 'Libre', date_debut DATE, date_fin DATE,
+    nb_emprunts INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+DROP INDEX IF EXISTS ix_emprunt_statut_fin;
+CREATE INDEX IF NOT EXISTS ix_emprunt_statut_couvrant
+    ON Emprunt (statut, date_fin, type_document, num_usager, date_debut, nb_emprunts);
+CREATE INDEX IF NOT EXISTS ix_emprunt_nb_emprunts ON Emprunt (nb_emprunts);
+CREATE TABLE IF NOT EXISTS Reservation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT NOT NULL, num_usager TEXT NOT NULL,
+    date_demande DATETIME NOT NULL, date_expiration DATE NOT NULL,
+    UNIQUE (code, num_usager)
+);
+"""
+
+
+def version_courante(config_db: dict) -> int:
+    """
+    Renvoie la version du schéma de la base (0 si aucune migration n'a été appliquée).
+
+    :param config_db: La configuration de connexion à la base de données.
+    :return: Le numéro de la dernière migration appliquée.
+    :rtype: int
+    """
+    with pooled_connection(config_db) as cnx:
+        if cnx:
+            with cnx.cursor() as cursor:
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS SchemaVersion (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    date_application DATETIME NOT NULL
+                )
+                """)
+                cursor.execute("SELECT MAX(version) FROM SchemaVersion")
+                version = cursor.fetchone()[0]
+                return version or 0
+    return 0
+
+
+def migrer(config_db: dict) -> dict:
+    """
+    Applique les migrations qui ne l'ont pas encore été. Sur une base neuve (version 0),
+    les tables de base (TABLES) sont d'abord créées si elles n'existent pas.
+
+    :param config_db: La configuration de connexion à la base de données.
+    :return: Dictionnaire contenant un message, un statut et la version atteinte.
+    :rtype: dict
+    """
+    if type_stockage(config_db) != "mysql":
+        version = MIGRATIONS[-1][0]
+        return {"message": f"Le schéma est créé par le dépôt (version {version}).", "status": 200, "version": version}
+
+    version = version_courante(config_db)
+
+    if version == 0:
+        with pooled_connection(config_db) as cnx:
+            if not cnx:
+                return {"message": "Connexion à la base impossible.", "status": 500, "version": version}
+            try:
+                with cnx.cursor() as cursor:
+                    for requete in TABLES:
+                        cursor.execute(requete)
+            except mysql.connector.Error as err:
+                logger.info("Création des tables de base en échec : %s", err)
+                return {"message": f"La création des tables a échoué : {err}", "status": 500, "version": version}
+
+    for numero, description, requetes in MIGRATIONS:
+        if numero <= version:
+            continue
+
+        with pooled_connection(config_db) as cnx:
+            if not cnx:
+                return {"message": "Connexion à la base impossible.", "status": 500, "version": version}
+
+            try:
+                with cnx.cursor() as cursor:
+                    for requete in requetes:
+                        cursor.execute(requete)
+                    cursor.execute(
+                        "INSERT INTO SchemaVersion (version, description, date_application) VALUES (%s, %s, %s)",
+                        (numero, description, datetime.datetime.now()),
+                    )
+                    cnx.commit()
+            except mysql.connector.Error as err:
+                logger.info("Migration %d (%s) en échec : %s", numero, description, err)
+                return {"message": f"La migration {numero} a échoué : {err}", "status": 500, "version": version}
+
+        logger.info("Migration %d appliquée : %s", numero, description)
+        version = numero
+
+    return {"message": f"Le schéma est à jour (version {version}).", "status": 200, "version": version}
+
+
+if __name__ == "__main__":
+    config = {
+        "host": "127.0.0.1",
+        "user": "root",
+        "password": "wm7ze*2b",
+        "database": "bu",
+    }
+
+    print(migrer(config))
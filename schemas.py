@@ -0,0 +1,75 @@
+import datetime
+from typing import ClassVar, Literal
+from pydantic import BaseModel, ConfigDict
+
+
+class DocumentSchema(BaseModel):
+    """
+    Représentation JSON d'un document du catalogue, construite à partir d'une ligne
+    de sa table (voir depuis_ligne).
+
+    Attributs :
+    -----------
+    type : str
+        "livre", "dvd" ou "journal".
+    code : str
+        La cote du document.
+    salle : str
+        La salle où se trouve le document.
+    titre : str
+        Le titre du document.
+    sur_place : bool
+        True si le document ne peut être consulté que sur place.
+    online : bool
+        True si le document peut être réservé en ligne.
+    debut_emprunt, fin_emprunt : datetime.date | None
+        Les dates de l'emprunt en cours.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    # Colonnes de la table, dans l'ordre de SELECT *
+    colonnes: ClassVar[tuple[str, ...]] = ()
+
+    type: str
+    code: str
+    salle: str
+    titre: str
+    sur_place: bool
+    online: bool
+    debut_emprunt: datetime.date | None = None
+    fin_emprunt: datetime.date | None = None
+
+    @classmethod
+    def depuis_ligne(cls, row: tuple) -> "DocumentSchema":
+        """
+        Construit le schéma à partir d'une ligne de la table du document.
+        """
+        return cls(**dict(zip(cls.colonnes, row)))
+
+
+class LivreSchema(DocumentSchema):
+    colonnes = ("code", "salle", "titre", "auteur", "sur_place", "online", "debut_emprunt", "fin_emprunt")
+
+    type: Literal["livre"] = "livre"
+    auteur: str
+
+
+class DvdSchema(DocumentSchema):
+    colonnes = ("code", "salle", "titre", "auteur", "sur_place", "online", "debut_emprunt", "fin_emprunt")
+
+    type: Literal["dvd"] = "dvd"
+    auteur: str
+
+
+class JournalSchema(DocumentSchema):
+    colonnes = ("code", "salle", "titre", "date_publication", "sur_place", "online", "debut_emprunt", "fin_emprunt")
+
+    type: Literal["journal"] = "journal"
+    date_publication: datetime.date
+
+
+# Schéma associé à chaque type de document
+SCHEMAS: dict[str, type[DocumentSchema]] = {"livre": LivreSchema, "journal": JournalSchema, "dvd": DvdSchema}
+
+# Champs que l'on peut demander avec ?fields=
+CHAMPS: set[str] = {champ for schema in SCHEMAS.values() for champ in schema.model_fields}
@@ -0,0 +1,224 @@
+"""
+Sessions côté serveur pour l'application Flask.
+
+Le cookie ne contient qu'un identifiant aléatoire ; les données de la session
+sont gardées par un stockage, en mémoire (un seul processus) ou dans un fichier
+SQLite local (plusieurs processus sur la même machine). Aucune des deux variantes
+n'interroge MySQL.
+
+Une session n'est réécrite que si elle a changé ou si plus de la moitié de sa durée
+est écoulée ; les sessions expirées sont purgées au passage, au plus une fois par
+`intervalle_purge`. Après une connexion, session.regenerer() change l'identifiant
+(contre la fixation de session).
+
+Utilisation :
+    app.session_interface = InterfaceSessionServeur(StockageSQLite("sessions.sqlite3"))
+"""
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class StockageMemoire:
+    """
+    Stockage des sessions dans un dictionnaire du processus.
+
+    Méthodes :
+    ----------
+    charger(identifiant: str) -> tuple[dict, float] | None:
+        Renvoie les données d'une session et son expiration (horodatage), None si elle est
+        absente ou expirée.
+
+    enregistrer(identifiant: str, donnees: dict, duree: float) -> None:
+        Enregistre les données d'une session pour `duree` secondes.
+
+    supprimer(identifiant: str) -> None:
+        Supprime une session.
+
+    purger() -> int:
+        Supprime les sessions expirées et renvoie leur nombre.
+    """
+
+    def __init__(self):
+        self._sessions: dict[str, tuple[float, dict]] = {}
+        self._verrou = threading.Lock()
+
+    def charger(self, identifiant: str) -> tuple[dict, float] | None:
+        with self._verrou:
+            entree = self._sessions.get(identifiant)
+            if entree is None:
+                return None
+            expiration, donnees = entree
+            if expiration < time.time():
+                del self._sessions[identifiant]
+                return None
+            return dict(donnees), expiration
+
+    def enregistrer(self, identifiant: str, donnees: dict, duree: float) -> None:
+        with self._verrou:
+            self._sessions[identifiant] = (time.time() + duree, dict(donnees))
+
+    def supprimer(self, identifiant: str) -> None:
+        with self._verrou:
+            self._sessions.pop(identifiant, None)
+
+    def purger(self) -> int:
+        maintenant = time.time()
+        with self._verrou:
+            expirees = [identifiant for identifiant, (expiration, _) in self._sessions.items()
+                        if expiration < maintenant]
+            for identifiant in expirees:
+                del self._sessions[identifiant]
+        return len(expirees)
+
+
+class StockageSQLite:
+    """
+    Stockage des sessions dans un fichier SQLite, partagé par les processus d'une machine.
+
+    Chaque thread a sa propre connexion ; les données sont sérialisées en JSON.
+    Mêmes méthodes que StockageMemoire.
+    """
+
+    def __init__(self, chemin: str = "sessions.sqlite3"):
+        self.chemin: str = chemin
+        self._local = threading.local()
+        with self._connexion() as cnx:
+            cnx.execute("PRAGMA journal_mode=WAL")
+            cnx.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                identifiant TEXT PRIMARY KEY,
+                donnees TEXT NOT NULL,
+                expiration REAL NOT NULL
+            )
+            """)
+            cnx.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expiration ON sessions (expiration)")
+
+    def _connexion(self) -> sqlite3.Connection:
+        cnx = getattr(self._local, "cnx", None)
+        if cnx is None:
+            cnx = sqlite3.connect(self.chemin, timeout=5.0)
+            self._local.cnx = cnx
+        return cnx
+
+    def charger(self, identifiant: str) -> tuple[dict, float] | None:
+        ligne = self._connexion().execute(
+            "SELECT donnees, expiration FROM sessions WHERE identifiant = ? AND expiration >= ?",
+            (identifiant, time.time())
+        ).fetchone()
+        return (json.loads(ligne[0]), ligne[1]) if ligne else None
+
+    def enregistrer(self, identifiant: str, donnees: dict, duree: float) -> None:
+        with self._connexion() as cnx:
+            cnx.execute(
+                "INSERT OR REPLACE INTO sessions (identifiant, donnees, expiration) VALUES (?, ?, ?)",
+                (identifiant, json.dumps(donnees), time.time() + duree),
+            )
+
+    def supprimer(self, identifiant: str) -> None:
+        with self._connexion() as cnx:
+            cnx.execute("DELETE FROM sessions WHERE identifiant = ?", (identifiant,))
+
+    def purger(self) -> int:
+        with self._connexion() as cnx:
+            return cnx.execute("DELETE FROM sessions WHERE expiration < ?", (time.time(),)).rowcount
+
+
+class SessionServeur(CallbackDict, SessionMixin):
+    """
+    Session Flask dont les données restent sur le serveur.
+    """
+
+    def __init__(self, donnees: dict | None = None, identifiant: str | None = None, nouvelle: bool = False,
+                 expiration: float = 0.0):
+        def modifiee(_):
+            self.modified = True
+
+        super().__init__(donnees, modifiee)
+        self.identifiant: str | None = identifiant
+        self.expiration: float = expiration
+        self.new: bool = nouvelle
+        self.modified: bool = False
+        # identifiant abandonné par regenerer, supprimé du stockage à l'enregistrement
+        self.ancien_identifiant: str | None = None
+
+    def regenerer(self) -> None:
+        """
+        Donne un nouvel identifiant à la session, en gardant ses données. À appeler après
+        une connexion : un identifiant connu avant elle (fixé par un tiers) ne vaut plus rien.
+        """
+        if self.identifiant is not None:
+            self.ancien_identifiant = self.identifiant
+        self.identifiant = None
+        self.modified = True
+
+
+class InterfaceSessionServeur(SessionInterface):
+    """
+    Interface de session Flask qui garde les données dans un stockage (StockageMemoire ou StockageSQLite).
+
+    Une session vide n'est pas enregistrée ; une session vidée (déconnexion) est supprimée
+    du stockage et son cookie effacé. Une session inchangée n'est réécrite (et son cookie
+    prolongé) qu'une fois passée la moitié de sa durée.
+    """
+
+    def __init__(self, stockage: StockageMemoire | StockageSQLite, duree: float = 7 * 24 * 3600,
+                 intervalle_purge: float = 3600.0):
+        self.stockage: StockageMemoire | StockageSQLite = stockage
+        self.duree: float = duree
+        self.intervalle_purge: float = intervalle_purge
+        self._prochaine_purge: float = time.monotonic() + intervalle_purge
+        self._verrou_purge = threading.Lock()
+
+    def _purger_si_besoin(self) -> None:
+        # au fil des requêtes, sans tâche dédiée ; un seul thread purge à la fois
+        if time.monotonic() < self._prochaine_purge or not self._verrou_purge.acquire(blocking=False):
+            return
+        try:
+            self._prochaine_purge = time.monotonic() + self.intervalle_purge
+            self.stockage.purger()
+        finally:
+            self._verrou_purge.release()
+
+    def open_session(self, app, request) -> SessionServeur:
+        self._purger_si_besoin()
+        identifiant = request.cookies.get(self.get_cookie_name(app))
+        if identifiant:
+            trouvee = self.stockage.charger(identifiant)
+            if trouvee is not None:
+                donnees, expiration = trouvee
+                return SessionServeur(donnees, identifiant, expiration=expiration)
+        return SessionServeur(nouvelle=True)
+
+    def save_session(self, app, session: SessionServeur, response) -> None:
+        nom = self.get_cookie_name(app)
+        domaine = self.get_cookie_domain(app)
+        chemin = self.get_cookie_path(app)
+
+        if session.ancien_identifiant is not None:
+            self.stockage.supprimer(session.ancien_identifiant)
+        if not session:
+            if session.identifiant is not None:
+                self.stockage.supprimer(session.identifiant)
+                response.delete_cookie(nom, domain=domaine, path=chemin)
+            return
+        # inchangée et loin de l'expiration : ni écriture ni nouveau cookie
+        if not session.modified and session.expiration - time.time() > self.duree / 2:
+            return
+
+        if session.identifiant is None:
+            session.identifiant = secrets.token_urlsafe(32)
+        self.stockage.enregistrer(session.identifiant, dict(session), self.duree)
+        response.set_cookie(
+            nom, session.identifiant,
+            max_age=int(self.duree),
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            domain=domaine,
+            path=chemin,
+        )
@@ -0,0 +1,36 @@
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+# les modules du dépôt sont à la racine, sans paquet
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from document import Document  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _silence():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(autouse=True)
+def _identites():
+    # carte d'identité du processus : un document d'un test précédent, pas encore ramassé,
+    # serait rendu par depuis_ligne avec l'état de ses emprunts dans une autre base
+    Document._vivants.clear()
+    yield
+
+
+@pytest.fixture(params=["memoire", "sqlite"])
+def config(request, tmp_path) -> dict:
+    """
+    Configuration d'un dépôt neuf (voir depot.get_depot) : en mémoire, ou SQLite dans un fichier.
+    """
+    if request.param == "memoire":
+        # get_depot garde un dépôt par configuration : la clé "base" en fait un nouveau par test
+        return {"stockage": {"type": "memoire", "base": str(tmp_path)}}
+    return {"stockage": {"type": "sqlite", "chemin": str(tmp_path / "bu.sqlite3")}}
@@ -0,0 +1,115 @@
+"""
+API JSON (api.py) : pages, lots et détail, sélection des champs, ETag (304 tant que le
+catalogue n'a pas changé, 200 après une écriture).
+"""
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import pytest
+from fastapi import FastAPI
+
+from api import routeur_api
+from bibiotheques import Bibliotheques
+from cache import cache_documents
+from depot import get_depot
+from index_cotes import index_cotes
+from livre import Livre
+
+
+def appeler(app: FastAPI, url: str, entetes: dict[str, str] | None = None) -> tuple[int, dict[str, str], bytes]:
+    """
+    Envoie une requête GET à l'application ASGI et renvoie (statut, en-têtes, corps).
+    """
+    url = urlsplit(url)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": url.path, "raw_path": url.path.encode(), "query_string": url.query.encode(), "root_path": "",
+        "headers": [(cle.lower().encode(), valeur.encode()) for cle, valeur in (entetes or {}).items()],
+        "server": ("test", 80), "client": ("test", 1234),
+    }
+    messages: list[dict] = []
+
+    async def recevoir():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def envoyer(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, recevoir, envoyer))
+    debut = messages[0]
+    entetes_reponse = {cle.decode(): valeur.decode() for cle, valeur in debut["headers"]}
+    return debut["status"], entetes_reponse, b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.fixture
+def app(config) -> FastAPI:
+    for numero in range(1, 4):
+        Livre(f"LIV{numero}", "Salle A", config, f"Titre {numero}", "Auteur").insert()
+    index_cotes.invalider()
+    cache_documents.vider()
+    app = FastAPI()
+    app.include_router(routeur_api(config, Bibliotheques(config)))
+    return app
+
+
+@pytest.fixture
+def lectures(config, monkeypatch) -> list[str]:
+    appels: list[str] = []
+    depot = get_depot(config)
+    for nom in ("document_async", "documents_async", "page_catalogue_async", "page_async"):
+        methode = getattr(depot, nom)
+        monkeypatch.setattr(depot, nom, lambda *args, _nom=nom, _methode=methode: appels.append(_nom) or _methode(*args))
+    return appels
+
+
+def test_detail(app):
+    statut, entetes, corps = appeler(app, "/api/documents/LIV2?fields=titre")
+
+    assert statut == 200 and entetes["etag"].startswith('W/"')
+    assert json.loads(corps) == {"type": "livre", "code": "LIV2", "titre": "Titre 2"}
+    assert appeler(app, "/api/documents/NOPE")[0] == 404
+    assert appeler(app, "/api/documents/LIV2?fields=inconnu")[0] == 400
+
+
+def test_page_et_lot(app):
+    statut, _, corps = appeler(app, "/api/documents?limit=2&fields=code")
+    assert statut == 200
+    assert json.loads(corps) == {"documents": [{"type": "livre", "code": "LIV1"}, {"type": "livre", "code": "LIV2"}],
+                                 "suivant": "LIV2"}
+
+    statut, _, corps = appeler(app, "/api/documents/lot?cote=LIV3&cote=NOPE&cote=LIV1&fields=code")
+    assert statut == 200
+    assert json.loads(corps) == {"documents": [{"type": "livre", "code": "LIV3"}, {"type": "livre", "code": "LIV1"}],
+                                 "manquants": ["NOPE"]}
+
+
+@pytest.mark.parametrize("url", ["/api/documents/LIV1", "/api/documents?limit=10", "/api/documents/lot?cote=LIV1"])
+def test_etag_304_sans_lecture(app, lectures, url):
+    _, entetes, _ = appeler(app, url)
+    assert lectures
+    cache_documents.vider()
+    lectures.clear()
+
+    statut, entetes_304, corps = appeler(app, url, {"If-None-Match": entetes["etag"]})
+
+    assert statut == 304 and corps == b""
+    assert entetes_304["etag"] == entetes["etag"]
+    assert lectures == []
+
+
+def test_etag_change_apres_ecriture(config, app):
+    _, entetes, _ = appeler(app, "/api/documents/LIV1")
+    Livre("LIV1", "Salle A", config, "Nouveau titre", "Auteur").update()
+
+    statut, nouvelles, corps = appeler(app, "/api/documents/LIV1", {"If-None-Match": entetes["etag"]})
+
+    assert statut == 200 and nouvelles["etag"] != entetes["etag"]
+    assert json.loads(corps)["titre"] == "Nouveau titre"
+
+
+def test_etag_par_requete(app):
+    # deux pages différentes n'ont pas le même ETag, même à version égale
+    _, premiere, _ = appeler(app, "/api/documents?limit=1")
+    statut, _, _ = appeler(app, "/api/documents?limit=2", {"If-None-Match": premiere["etag"]})
+    assert statut == 200
@@ -0,0 +1,53 @@
+"""
+Autocomplétion (autocompletion.py) : les écritures du catalogue sont visibles tout de
+suite, sans attendre la reconstruction du tableau trié.
+"""
+import pytest
+
+from autocompletion import autocompletion
+from livre import Livre
+
+
+@pytest.fixture
+def catalogue(config):
+    Livre("LIV001", "Salle A", config, "Les Misérables", "Victor Hugo").insert()
+    Livre("LIV002", "Salle A", config, "Notre-Dame de Paris", "Victor Hugo").insert()
+    autocompletion.construire(config)
+    yield config
+    autocompletion._config_db = None
+    autocompletion.charger([])
+
+
+def valeurs(prefixe: str) -> list[str]:
+    return [completion["valeur"] for completion in autocompletion.completer(prefixe, 10)]
+
+
+def test_insertion_visible_sans_reconstruction(catalogue):
+    Livre("LIV003", "Salle B", catalogue, "Les Contemplations", "Victor Hugo").insert()
+
+    assert valeurs("les c") == ["Les Contemplations"]
+    assert "LIV003" in valeurs("liv")
+    # un auteur déjà proposé n'est pas dupliqué
+    assert valeurs("victor") == ["Victor Hugo"]
+
+
+def test_suppression_retire_la_cote(catalogue):
+    Livre("LIV002", "Salle A", catalogue, "Notre-Dame de Paris", "Victor Hugo").delete()
+
+    assert valeurs("liv") == ["LIV001"]
+
+
+def test_modification_puis_reconstruction(catalogue):
+    livre = Livre("LIV001", "Salle A", catalogue, "Les Misérables", "Victor Hugo")
+    livre.title = "Les Travailleurs de la mer"
+    livre.update()
+
+    assert "Les Travailleurs de la mer" in valeurs("les")
+    autocompletion.construire(catalogue)
+    assert valeurs("les") == ["Les Travailleurs de la mer"]
+
+
+def test_ordre_par_poids_puis_alphabet(catalogue):
+    Livre("LIV000", "Salle B", catalogue, "Les Châtiments", "Victor Hugo").insert()
+
+    assert valeurs("les") == ["Les Châtiments", "Les Misérables"]
@@ -0,0 +1,84 @@
+"""
+Opérations de circulation par lot (Bibliotheques.ajout_emprunts et fin_emprunts) : une
+transaction par lot, résultat par document, changements refusés quand un autre
+processus a modifié le document entre-temps.
+"""
+import pytest
+
+from bibiotheques import Bibliotheques
+from depot import get_depot
+from emprunt import Emprunt
+from livre import Livre
+from statuemprunt import StatuEmprunt
+
+COTES = ["LIV1", "LIV2", "LIV3"]
+
+
+@pytest.fixture
+def bibio(config) -> Bibliotheques:
+    for cote in COTES:
+        Livre(cote, "Salle A", config, f"Titre {cote}", "Auteur").insert()
+    return Bibliotheques(config)
+
+
+@pytest.fixture
+def transactions(config, monkeypatch) -> list[list[str]]:
+    lots: list[list[str]] = []
+    depot = get_depot(config)
+    enregistrer = depot.enregistrer_emprunts
+    monkeypatch.setattr(depot, "enregistrer_emprunts",
+                        lambda changements: lots.append([c[0] for c in changements]) or enregistrer(changements))
+    return lots
+
+
+def statut(bibio: Bibliotheques, cote: str) -> StatuEmprunt:
+    return bibio.livres[bibio.document(cote)]
+
+
+def test_lot_d_emprunts_une_transaction(config, bibio, transactions):
+    resultat = bibio.ajout_emprunts([("U1", cote) for cote in COTES])
+
+    assert resultat["status"] == 200
+    assert [r["status"] for r in resultat["resultats"]] == [200, 200, 200]
+    assert transactions == [COTES]
+    for cote in COTES:
+        assert statut(bibio, cote) == StatuEmprunt.Reserver
+        assert Emprunt.get(config, cote).num_usager == "U1"
+
+
+def test_lot_partiel(config, bibio, transactions):
+    resultat = bibio.ajout_emprunts([("U1", "LIV1"), ("U1", "NOPE"), ("U2", "LIV1")])
+
+    assert resultat["status"] == 500
+    assert [(r["code"], r["status"]) for r in resultat["resultats"]] == [("LIV1", 200), ("NOPE", 500), ("LIV1", 500)]
+    # seuls les changements réussis sont écrits
+    assert transactions == [["LIV1"]]
+    assert Emprunt.get(config, "LIV1").num_usager == "U1"
+
+
+def test_lot_de_retours(config, bibio, transactions):
+    bibio.ajout_emprunts([("U1", cote) for cote in COTES])
+    transactions.clear()
+
+    resultat = bibio.fin_emprunts([("U1", "LIV1"), ("U1", "LIV2")])
+
+    assert resultat["status"] == 200
+    assert transactions == [["LIV1", "LIV2"]]
+    assert [statut(bibio, cote) for cote in COTES] == [StatuEmprunt.Libre, StatuEmprunt.Libre, StatuEmprunt.Reserver]
+    assert Emprunt.get(config, "LIV1").statut == StatuEmprunt.Libre.name
+
+
+def test_lot_modifie_par_ailleurs(config, bibio):
+    # un autre processus emprunte LIV2 : son objet n'est pas celui de cette bibliothèque
+    autre = Livre("LIV2", "Salle A", config, "Titre LIV2", "Auteur")
+    autre.reserver_emprunt("U9")
+    assert Emprunt.enregistrer_lot(config, [(autre, StatuEmprunt.Libre, StatuEmprunt.Reserver)]) == set()
+
+    resultat = bibio.ajout_emprunts([("U1", "LIV1"), ("U1", "LIV2")])
+
+    assert [r["status"] for r in resultat["resultats"]] == [200, 500]
+    assert "modifié par ailleurs" in resultat["resultats"][1]["message"]
+    # l'état en mémoire est repris de la base
+    assert statut(bibio, "LIV2") == StatuEmprunt.Reserver
+    assert bibio.document("LIV2")._num == "U9"
+    assert Emprunt.get(config, "LIV1").num_usager == "U1"
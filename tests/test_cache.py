@@ -0,0 +1,96 @@
+"""
+Cache des pages de détail (cache.py) : éviction LRU et expiration, lecture à travers le
+cache par Livre.get et get_many, invalidation à chaque écriture.
+"""
+import pytest
+
+from cache import CacheLRU, cache_documents, version_catalogue
+from depot import get_depot
+from livre import Livre
+
+
+@pytest.fixture
+def lectures(config, monkeypatch) -> list[str]:
+    Livre("LIV1", "Salle A", config, "Titre", "Auteur").insert()
+    cache_documents.vider()
+
+    appels: list[str] = []
+    depot = get_depot(config)
+    for nom in ("document", "documents"):
+        methode = getattr(depot, nom)
+        monkeypatch.setattr(depot, nom, lambda *args, _nom=nom, _methode=methode: appels.append(_nom) or _methode(*args))
+    return appels
+
+
+def test_lru():
+    cache = CacheLRU(taille_max=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    # "b" est la moins récemment utilisée
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expiration(monkeypatch):
+    cache = CacheLRU(ttl=10.0)
+    maintenant = [1000.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: maintenant[0])
+    cache.set("a", 1)
+
+    maintenant[0] += 9.0
+    assert cache.get("a") == 1
+    maintenant[0] += 2.0
+    assert cache.get("a") is None
+
+
+def test_invalider_si():
+    cache = CacheLRU()
+    for cle in [("livre", "L1"), ("livre", "L2"), ("dvd", "D1")]:
+        cache.set(cle, [])
+    cache.invalider_si(lambda cle: cle[0] == "livre")
+    assert cache.stats()["taille"] == 1 and cache.get(("dvd", "D1")) == []
+
+
+def test_lecture_a_travers_le_cache(config, lectures):
+    assert Livre.get(config, "LIV1")[0].titre == "Titre"
+    assert Livre.get(config, "LIV1")[0].titre == "Titre"
+    # une cote absente est gardée aussi
+    assert Livre.get(config, "NOPE") == []
+    assert Livre.get(config, "NOPE") == []
+
+    assert lectures == ["document", "document"]
+
+
+def test_get_many_complete_le_cache(config, lectures):
+    Livre.get(config, "LIV1")
+    lectures.clear()
+
+    assert [row.code for row in Livre.get_many(config, ["LIV1", "NOPE"])] == ["LIV1"]
+    assert lectures == ["documents"]
+    # les deux cotes sont maintenant en cache, y compris l'absente
+    assert [row.code for row in Livre.get_many(config, ["NOPE", "LIV1"])] == ["LIV1"]
+    assert lectures == ["documents"]
+
+
+@pytest.mark.parametrize("ecriture", ["update", "delete"])
+def test_ecriture_invalide(config, lectures, ecriture):
+    Livre.get(config, "LIV1")
+    version = version_catalogue.valeur
+
+    livre = Livre("LIV1", "Salle A", config, "Nouveau titre", "Auteur")
+    assert getattr(livre, ecriture)()
+
+    assert version_catalogue.valeur != version
+    rows = Livre.get(config, "LIV1")
+    assert lectures == ["document", "document"]
+    assert (rows[0].titre if rows else None) == ("Nouveau titre" if ecriture == "update" else None)
+
+
+def test_insertion_invalide_une_absence(config, lectures):
+    assert Livre.get(config, "LIV2") == []
+    Livre("LIV2", "Salle A", config, "Titre 2", "Auteur").insert()
+
+    assert Livre.get(config, "LIV2")[0].titre == "Titre 2"
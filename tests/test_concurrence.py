@@ -0,0 +1,111 @@
+"""
+Emprunts simultanés d'un même document (voir benchmarks/concurrence.py, qui mesure
+la même chose sur MySQL) : un seul doit réussir, quel que soit le dépôt.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bibiotheques import Bibliotheques
+from document import Document
+from depot import get_depot
+from livre import Livre
+
+COTE = "LIV123"
+
+
+def charger_document(config_db: dict, code: str) -> tuple[Bibliotheques, Livre]:
+    """
+    Une Bibliotheques qui ne connaît que le document `code`, tenu par un objet qui lui est
+    propre : construit directement, il n'est pas partagé par la carte d'identité
+    (Document._vivants) avec les autres instances.
+    """
+    bibio = Bibliotheques(config_db, charger=False)
+    row = Livre.get(config_db, code)[0]
+    document = Livre(row.code, row.salle, config_db, row.titre, row.auteur, row.sur_place, False, row.online)
+    bibio.ajout_livre(document)
+    return bibio, document
+
+
+def emprunter(config_db: dict, code: str, nb_threads: int, nb_tentatives: int, depart=None) -> tuple[int, int]:
+    """
+    Lance nb_tentatives emprunts répartis sur nb_threads threads ; renvoie (réussis, refusés).
+    """
+    bibio, document = charger_document(config_db, code)
+    reussis = [0]
+    verrou = threading.Lock()
+    barriere = threading.Barrier(nb_threads)
+
+    def travail(indice: int):
+        locaux = 0
+        barriere.wait()
+        for tentative in range(indice, nb_tentatives, nb_threads):
+            if bibio.ajout_emprunt(f"U{tentative}", document)["status"] == 200:
+                locaux += 1
+        with verrou:
+            reussis[0] += locaux
+
+    if depart is not None:
+        depart.wait()
+    threads = [threading.Thread(target=travail, args=(indice,)) for indice in range(nb_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return reussis[0], nb_tentatives - reussis[0]
+
+
+def _processus(config_db: dict, code: str, nb_threads: int, nb_tentatives: int, depart, resultats) -> None:
+    resultats.put(emprunter(config_db, code, nb_threads, nb_tentatives, depart))
+
+
+@pytest.fixture
+def document(config) -> str:
+    Livre(COTE, "Salle A", config, "Titre", "Auteur").insert()
+    return COTE
+
+
+def test_threads_un_seul_gagnant(config, document):
+    reussis, refuses = emprunter(config, document, nb_threads=32, nb_tentatives=2000)
+
+    assert (reussis, refuses) == (1, 1999)
+    assert get_depot(config).emprunt(document).statut == "Reserver"
+
+
+def test_instances_un_seul_gagnant(config, document):
+    # plusieurs Bibliotheques, chacune avec son propre objet Document, libre en mémoire jusqu'à
+    # son propre emprunt : seul le contrôle du dépôt (enregistrer_emprunts) les départage
+    instances = [charger_document(config, document) for _ in range(8)]
+    assert len({id(objet) for _, objet in instances}) == 8
+    assert all(Document.vivant(document) is not objet for _, objet in instances)
+
+    def emprunts(indice: int) -> int:
+        bibio, objet = instances[indice]
+        return sum(bibio.ajout_emprunt(f"U{indice}-{tentative}", objet)["status"] == 200 for tentative in range(100))
+
+    with ThreadPoolExecutor(max_workers=8) as executeur:
+        reussis = list(executeur.map(emprunts, range(8)))
+
+    assert sum(reussis) == 1
+    # les instances perdantes ont été refusées par le dépôt, pas par leur état en mémoire :
+    # chacune a relu l'état en base après le refus
+    assert all(objet._num == instances[reussis.index(1)][1]._num for _, objet in instances)
+
+
+def test_processus_un_seul_gagnant(tmp_path):
+    config = {"stockage": {"type": "sqlite", "chemin": str(tmp_path / "bu.sqlite3")}}
+    Livre(COTE, "Salle A", config, "Titre", "Auteur").insert()
+    contexte = multiprocessing.get_context("spawn")
+    depart = contexte.Barrier(4)
+    resultats = contexte.Queue()
+    processus = [contexte.Process(target=_processus, args=(config, COTE, 4, 100, depart, resultats))
+                 for _ in range(4)]
+    for p in processus:
+        p.start()
+    totaux = [resultats.get(timeout=60) for _ in processus]
+    for p in processus:
+        p.join()
+
+    assert sum(reussis for reussis, _ in totaux) == 1
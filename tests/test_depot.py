@@ -0,0 +1,39 @@
+"""
+Écritures des dépôts (depot.py) : une modification ou une suppression qui ne
+trouve aucune ligne renvoie False, sur chaque dépôt.
+"""
+from depot import get_depot
+
+
+def test_documents(config):
+    depot = get_depot(config)
+    assert depot.inserer_document("Livre", {"code": "L1", "salle": "A", "titre": "T", "auteur": "X"})
+
+    assert depot.modifier_document("Livre", "NOPE", {"titre": "U"}) is False
+    assert depot.supprimer_document("Livre", "NOPE") is False
+    # valeurs inchangées : la ligne existe, la modification est un succès
+    assert depot.modifier_document("Livre", "L1", {"titre": "T"}) is True
+    assert depot.supprimer_document("Livre", "L1") is True
+    assert depot.supprimer_document("Livre", "L1") is False
+
+
+def test_personnes(config):
+    depot = get_depot(config)
+    assert depot.inserer_personne(("1", "user", "Dupont", "Jean", "jean", "empreinte1"))
+
+    assert depot.modifier_personne("9", "user", "N", "P") is False
+    assert depot.modifier_personne("1", "admin", "Dupont", "Jean") is True
+    assert depot.supprimer_personne("9") is False
+    assert depot.supprimer_personne("1") is True
+
+
+def test_remplacer_empreinte_compare_et_echange(config):
+    depot = get_depot(config)
+    depot.inserer_personne(("1", "user", "Dupont", "Jean", "jean", "empreinte1"))
+
+    assert depot.remplacer_empreinte("999", "empreinte1", "empreinte2") is False
+    assert depot.remplacer_empreinte("1", "autre", "empreinte2") is False
+    assert depot.remplacer_empreinte("1", "empreinte1", "empreinte2") is True
+    # déjà remplacée par un autre : la seconde écriture est refusée
+    assert depot.remplacer_empreinte("1", "empreinte1", "empreinte3") is False
+    assert depot.personne_par_login("jean").password == "empreinte2"
@@ -0,0 +1,68 @@
+"""
+Identité des documents (document.py) : égalité et hash par cote, stables quand l'état
+de l'emprunt change ; un seul objet vivant par cote construit par depuis_ligne.
+"""
+import gc
+
+from bibiotheques import Bibliotheques
+from document import Document
+from lignes import LigneLivre
+from livre import Livre
+from personne import Personne
+
+
+def ligne(code: str, salle: str = "Salle A") -> LigneLivre:
+    return LigneLivre(code, salle, "Titre", "Auteur", 0, 1, None, None)
+
+
+def test_egalite_par_cote(config):
+    livre, copie = Livre("LIV1", "Salle A", config, "Titre", "Auteur"), Livre("LIV1", "Salle B", config, "Autre", "X")
+
+    assert livre == copie and hash(livre) == hash(copie)
+    assert livre != Livre("LIV2", "Salle A", config, "Titre", "Auteur")
+    assert len({livre, copie}) == 1
+    assert livre != "LIV1"
+
+
+def test_hash_stable_pendant_un_emprunt(config):
+    livre = Livre("LIV1", "Salle A", config, "Titre", "Auteur")
+    statuts = {livre: "libre"}
+
+    livre.reserver_emprunt("U1")
+
+    assert statuts[livre] == "libre"
+    assert statuts[Livre("LIV1", "Salle A", config, "Titre", "Auteur")] == "libre"
+
+
+def test_un_objet_vivant_par_cote(config):
+    livre = Livre.depuis_ligne(config, ligne("LIV1"))
+    livre.reserver_emprunt("U1")
+
+    relu = Livre.depuis_ligne(config, ligne("LIV1", "Salle B"))
+
+    assert relu is livre and Document.vivant("LIV1") is livre
+    # les informations du catalogue sont mises à jour, l'état de l'emprunt est gardé
+    assert relu.salle == "Salle B" and relu._num == "U1"
+
+    del livre, relu
+    gc.collect()
+    assert Document.vivant("LIV1") is None
+
+
+def test_bibliotheque_retrouve_une_copie(config):
+    Livre("LIV1", "Salle A", config, "Titre", "Auteur").insert()
+    bibio = Bibliotheques(config)
+
+    copie = Livre("LIV1", "Salle A", config, "Titre", "Auteur")
+
+    assert bibio.check_exist(copie)
+    assert bibio.ajout_emprunt("U1", copie)["status"] == 200
+    # l'opération s'applique à l'objet tenu par la bibliothèque, pas à la copie
+    assert bibio.document("LIV1")._num == "U1" and copie._num == "NA"
+
+
+def test_personne_par_numero(config):
+    personne = Personne("1", "user", "Dupont", "Jean", "jean", "mdp", config)
+    assert personne == Personne("1", "admin", "Durand", "Marie", "marie", "autre", config)
+    assert hash(personne) == hash(Personne("1", "admin", "Durand", "Marie", "marie", "autre", config))
+    assert personne != Personne("2", "user", "Dupont", "Jean", "jean", "mdp", config)
@@ -0,0 +1,73 @@
+"""
+État des emprunts (emprunt.py) : enregistré dans la table Emprunt à chaque opération,
+rechargé par une nouvelle Bibliotheques, visible sur la page de détail.
+"""
+import datetime
+
+import pytest
+
+from bibiotheques import Bibliotheques
+from emprunt import Emprunt
+from livre import Livre
+from statuemprunt import StatuEmprunt
+
+COTE = "LIV1"
+AUJOURDHUI = datetime.date.today()
+FIN = AUJOURDHUI + datetime.timedelta(weeks=2)
+
+
+@pytest.fixture
+def bibio(config) -> Bibliotheques:
+    Livre(COTE, "Salle A", config, "Titre", "Auteur").insert()
+    Livre("LIV2", "Salle A", config, "Titre 2", "Auteur").insert()
+    return Bibliotheques(config)
+
+
+def test_emprunt_enregistre(config, bibio):
+    assert Emprunt.get(config, COTE) is None
+    bibio.ajout_emprunt("U1", COTE)
+
+    assert tuple(Emprunt.get(config, COTE)) == (COTE, "livre", "U1", "Reserver", AUJOURDHUI, FIN, 1)
+    # les dates affichées par la page de détail sont écrites dans la même transaction
+    row = Livre.get(config, COTE)[0]
+    assert (row.date_debut_emprunt, row.date_fin_emprunt) == (AUJOURDHUI, FIN)
+
+
+def test_retour_et_compteur(config, bibio):
+    bibio.ajout_emprunt("U1", COTE)
+    bibio.fin_emprunt("U1", COTE)
+    emprunt = Emprunt.get(config, COTE)
+    assert (emprunt.statut, emprunt.num_usager, emprunt.nb_emprunts) == ("Libre", None, 1)
+
+    bibio.ajout_emprunt("U2", COTE)
+    assert Emprunt.compteurs(config) == {COTE: 2}
+    assert [row.code for row in Emprunt.get_all(config)] == [COTE]
+
+
+def test_non_rendu_et_retards(config, bibio):
+    bibio.ajout_emprunt("U1", COTE)
+    bibio.ajout_emprunt("U2", "LIV2")
+    bibio.ajout_non_rendue(COTE)
+
+    assert Emprunt.get(config, COTE).statut == "Non_Rendue"
+    assert Emprunt.en_retard(config, FIN) == []
+    retards = Emprunt.en_retard(config, FIN + datetime.timedelta(days=1))
+    assert [tuple(row) for row in retards] == [(COTE, "livre", "U1", "Non_Rendue", FIN),
+                                               ("LIV2", "livre", "U2", "Reserver", FIN)]
+
+
+def test_etat_recharge(config, bibio):
+    bibio.ajout_emprunt("U1", COTE)
+    # un autre processus emprunte LIV2 : son objet n'est pas celui de cette bibliothèque
+    autre = Livre("LIV2", "Salle A", config, "Titre 2", "Auteur")
+    autre.reserver_emprunt("U9")
+    Emprunt.enregistrer_lot(config, [(autre, StatuEmprunt.Libre, StatuEmprunt.Reserver)])
+
+    recharge = Bibliotheques(config)
+
+    assert recharge.charger()["status"] == 200
+    for cote, usager in [(COTE, "U1"), ("LIV2", "U9")]:
+        document = recharge.document(cote)
+        assert recharge.livres[document] == StatuEmprunt.Reserver
+        assert (document._num, document._date_fin_emprunt) == (usager, FIN)
+    assert recharge.ajout_emprunt("U3", "LIV2")["status"] == 500
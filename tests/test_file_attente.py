@@ -0,0 +1,113 @@
+"""
+Files d'attente de réservation (file_attente.py) : promotion au retour d'un document,
+délai de retrait d'un document mis de côté et expiration des réservations.
+"""
+import datetime
+
+import pytest
+
+from bibiotheques import Bibliotheques
+from document import Document
+from file_attente import ReservationsAttente
+from livre import Livre
+from statuemprunt import StatuEmprunt
+
+COTE = "LIV123"
+AUJOURDHUI = datetime.date.today()
+
+
+@pytest.fixture
+def reservations(config) -> ReservationsAttente:
+    Livre(COTE, "Salle A", config, "Titre", "Auteur").insert()
+    bibio = Bibliotheques(config)
+    assert bibio.ajout_emprunt("U0", COTE)["status"] == 200
+    reservations = ReservationsAttente(bibio, delai_retrait=datetime.timedelta(days=3))
+    yield reservations
+    reservations.arreter()
+
+
+def statut(reservations: ReservationsAttente) -> StatuEmprunt:
+    return reservations.bibio.livres[reservations.bibio.document(COTE)]
+
+
+def test_retour_met_de_cote_pour_le_premier(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.reserver("U2", COTE)
+
+    assert reservations.bibio.fin_emprunt("U0", COTE)["status"] == 200
+
+    document = reservations.bibio.document(COTE)
+    assert statut(reservations) == StatuEmprunt.En_Attente
+    assert document._num == "U1"
+    assert document._date_fin_emprunt == AUJOURDHUI + datetime.timedelta(days=3)
+    assert reservations.position("U2", COTE)["position"] == 1
+    assert reservations.bibio.ajout_emprunt("U2", COTE)["status"] == 500
+
+
+def test_retrait_expire_promeut_le_suivant(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.reserver("U2", COTE)
+    reservations.bibio.fin_emprunt("U0", COTE)
+
+    # encore dans le délai : rien ne change
+    assert reservations.purger(AUJOURDHUI + datetime.timedelta(days=2))["liberes"] == 0
+    assert reservations.bibio.document(COTE)._num == "U1"
+
+    resultat = reservations.purger(AUJOURDHUI + datetime.timedelta(days=3))
+
+    assert resultat["liberes"] == 1 and resultat["status"] == 200
+    assert statut(reservations) == StatuEmprunt.En_Attente
+    assert reservations.bibio.document(COTE)._num == "U2"
+    assert COTE not in reservations._files
+
+
+def test_retrait_expire_sans_suivant_libere(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.bibio.fin_emprunt("U0", COTE)
+
+    reservations.purger(AUJOURDHUI + datetime.timedelta(days=3))
+
+    assert statut(reservations) == StatuEmprunt.Libre
+    assert reservations._retraits == {}
+
+
+def test_retrait_emprunte_a_temps(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.bibio.fin_emprunt("U0", COTE)
+
+    assert reservations.bibio.ajout_emprunt("U1", COTE)["status"] == 200
+
+    assert reservations.purger(AUJOURDHUI + datetime.timedelta(days=3))["liberes"] == 0
+    assert statut(reservations) == StatuEmprunt.Reserver
+
+
+def test_date_limite_de_retrait_rechargee(config, reservations):
+    reservations.reserver("U1", COTE)
+    reservations.bibio.fin_emprunt("U0", COTE)
+
+    # un autre processus : l'état des emprunts et la date limite viennent de la base
+    recharge = ReservationsAttente(Bibliotheques(config), delai_retrait=datetime.timedelta(days=3))
+    recharge.arreter()
+
+    assert recharge._retraits == {COTE: (AUJOURDHUI + datetime.timedelta(days=3)).toordinal()}
+
+
+def test_file_entierement_expiree_supprimee(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.reserver("U2", COTE)
+
+    resultat = reservations.purger(AUJOURDHUI + reservations.delai)
+
+    assert resultat["expirees"] == 2
+    assert reservations._files == {}
+    assert reservations.charger()["status"] == 200 and reservations._files == {}
+
+
+def test_arreter_desabonne(reservations):
+    reservations.reserver("U1", COTE)
+    reservations.arreter()
+
+    assert reservations._suivre_emprunts not in Document._observateurs
+    # le retour n'est plus suivi : personne n'est promu
+    reservations.bibio.fin_emprunt("U0", COTE)
+    assert statut(reservations) == StatuEmprunt.Libre
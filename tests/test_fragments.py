@@ -0,0 +1,87 @@
+"""
+Pages rendues (fragments.py) : choix de la compression, corps compressés une fois,
+fragments et pages indexés par la version du catalogue, envoi en flux puis mise en cache.
+"""
+import gzip
+
+import pytest
+
+from cache import version_catalogue
+from fragments import MARQUE_CATALOGUE, Corps, brotli, cache_pages, choisir_encodage, page_en_flux, par_blocs
+
+PAGE = f"<header><b>bandeau</b></header>{MARQUE_CATALOGUE}<footer>fin</footer>"
+
+
+@pytest.fixture(autouse=True)
+def _vider():
+    cache_pages.vider()
+    yield
+    cache_pages.vider()
+
+
+@pytest.mark.parametrize("entete, attendu", [
+    (None, None), ("", None), ("gzip, deflate", "gzip"), ("gzip;q=0, deflate", None), ("GZIP; q=0.5", "gzip"),
+    ("br, gzip", "br" if brotli else "gzip"),
+])
+def test_choisir_encodage(entete, attendu):
+    assert choisir_encodage(entete) == attendu
+
+
+def test_corps_compresse_une_fois():
+    corps = Corps("<p>é</p>" * 100)
+
+    compresse = corps.encoder("gzip")
+
+    assert gzip.decompress(compresse) == corps.html == ("<p>é</p>" * 100).encode()
+    assert corps.encoder("gzip") is compresse
+    assert corps.encoder(None) is corps.html
+    assert Corps.entetes("gzip")["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in Corps.entetes(None)
+    with pytest.raises(ValueError):
+        corps.encoder("deflate")
+
+
+def test_entrees_par_version():
+    cache_pages.garder_fragment(("catalogue", None, 50), "<table></table>")
+    cache_pages.garder_corps(("index", None, 50, None), "<html></html>")
+    assert cache_pages.fragment(("catalogue", None, 50)) == "<table></table>"
+    assert cache_pages.corps(("index", None, 50, None)).html == b"<html></html>"
+
+    # une écriture dans le catalogue : les pages déjà rendues ne sont plus servies
+    version_catalogue.incrementer()
+    assert cache_pages.fragment(("catalogue", None, 50)) is None
+    assert cache_pages.corps(("index", None, 50, None)) is None
+
+
+def test_page_en_flux_puis_en_cache():
+    version = version_catalogue.valeur
+    morceaux = list(page_en_flux(PAGE, iter(["<table>", "</table>"]), "page", "fragment", version))
+
+    assert morceaux[0] == "<header><b>bandeau</b></header>" and morceaux[-1] == "<footer>fin</footer>"
+    assert "".join(morceaux) == PAGE.replace(MARQUE_CATALOGUE, "<table></table>")
+    assert cache_pages.fragment("fragment") == "<table></table>"
+    # le bandeau n'est pas échappé en passant par le fragment (Markup)
+    assert cache_pages.corps("page").html.decode() == "".join(morceaux)
+
+
+def test_page_interrompue_pas_gardee():
+    flux = page_en_flux(PAGE, iter(["<table>", "</table>"]), "page", "fragment", version_catalogue.valeur)
+    next(flux)
+    flux.close()
+
+    assert cache_pages.fragment("fragment") is None and cache_pages.corps("page") is None
+
+
+def test_page_lue_avant_une_ecriture():
+    # les données ont été lues avant l'écriture : la page est gardée sous l'ancienne version
+    version = version_catalogue.valeur
+    version_catalogue.incrementer()
+    list(page_en_flux(PAGE, iter(["<table></table>"]), "page", "fragment", version))
+
+    assert cache_pages.fragment("fragment") is None and cache_pages.corps("page") is None
+
+
+def test_par_blocs():
+    blocs = list(par_blocs(["a" * 3] * 10, taille=8))
+    assert blocs == ["a" * 9, "a" * 9, "a" * 9, "a" * 3]
+    assert list(par_blocs([])) == []
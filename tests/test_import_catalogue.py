@@ -0,0 +1,27 @@
+"""
+Import du catalogue (import_catalogue.py) : une ligne illisible est rejetée avec son
+numéro, sans interrompre l'import.
+"""
+import json
+
+from depot import get_depot
+from import_catalogue import importer, lire_jsonl
+
+
+def test_ligne_corrompue_au_milieu(config, tmp_path):
+    chemin = tmp_path / "catalogue.jsonl"
+    lignes = [json.dumps({"type": "livre", "code": f"LIV{numero}", "salle": "A", "titre": f"Titre {numero}",
+                          "auteur": "Auteur", "sur_place": 0, "online": 1}) for numero in range(4)]
+    lignes.insert(2, '{"type": "livre", "code": "LIVX", "titre": ')
+    lignes.insert(4, "[1, 2]")
+    chemin.write_text("\n".join(lignes) + "\n", encoding="utf-8")
+
+    resultat = importer(config, lire_jsonl(str(chemin)), taille_lot=2)
+
+    assert resultat["lus"] == 6
+    assert resultat["ecrits"] == 4
+    assert [numero for numero, _ in resultat["rejets"]] == [3, 5]
+    assert resultat["rejets"][0][1].startswith("ligne 3 : JSON invalide")
+    assert resultat["status"] == 500
+    depot = get_depot(config)
+    assert all(depot.document("Livre", f"LIV{numero}") for numero in range(4))
@@ -0,0 +1,87 @@
+"""
+Index des cotes (index_cotes.py) : nombre de requêtes de Bibliotheques.get_document pour
+une cote connue, une cote absente et une entrée périmée par un autre processus.
+"""
+import pytest
+
+from bibiotheques import Bibliotheques
+from cache import cache_documents
+from depot import get_depot
+from index_cotes import index_cotes
+from livre import Livre
+
+
+@pytest.fixture
+def requetes(config, monkeypatch) -> list[str]:
+    Livre("LIV1", "Salle A", config, "Titre", "Auteur").insert()
+    index_cotes.invalider()
+    index_cotes.assurer(config)
+    cache_documents.vider()
+
+    # chaque lecture d'un document passe par l'une de ces méthodes du dépôt
+    appels: list[str] = []
+    depot = get_depot(config)
+    for nom in ("document", "documents", "localiser"):
+        methode = getattr(depot, nom)
+        monkeypatch.setattr(depot, nom, lambda *args, _nom=nom, _methode=methode: appels.append(_nom) or _methode(*args))
+    monkeypatch.setattr(index_cotes, "duree_absence", 60.0)
+    return appels
+
+
+def test_cote_connue_une_requete(config, requetes):
+    assert Bibliotheques(config, charger=False).get_document("LIV1")["status"] == 200
+    assert requetes == ["document"]
+
+
+def test_cote_absente_sans_requete(config, requetes):
+    assert Bibliotheques(config, charger=False).get_document("NOPE")["status"] == 500
+    assert requetes == []
+
+
+def test_absence_bornee_dans_le_temps(config, requetes, monkeypatch):
+    bibio = Bibliotheques(config, charger=False)
+    # écrit par un autre processus : l'index ne l'a pas vu passer
+    get_depot(config).inserer_document("Livre", {"code": "LIV2", "salle": "A", "titre": "T", "auteur": "X"})
+    assert bibio.get_document("LIV2")["status"] == 500
+
+    # passé duree_absence, une cote inconnue coûte une requête de localisation...
+    monkeypatch.setattr(index_cotes, "duree_absence", 0.0)
+    requetes.clear()
+    assert bibio.get_document("NOPE")["status"] == 500
+    assert requetes == ["localiser"]
+
+    # ...et une cote présente une lecture de plus, puis l'index la connaît
+    requetes.clear()
+    assert bibio.get_document("LIV2")["status"] == 200
+    assert requetes == ["localiser", "document"]
+    requetes.clear()
+    cache_documents.vider()
+    assert bibio.get_document("LIV2")["status"] == 200
+    assert requetes == ["document"]
+
+
+def test_entree_perimee(config, requetes):
+    bibio = Bibliotheques(config, charger=False)
+    # supprimé par un autre processus : l'index croit encore LIV1 dans Livre
+    get_depot(config).supprimer_document("Livre", "LIV1")
+    requetes.clear()
+
+    assert bibio.get_document("LIV1")["status"] == 500
+    assert requetes == ["document", "localiser"]
+
+    # l'absence est retenue : plus aucune requête
+    requetes.clear()
+    assert bibio.get_document("LIV1")["status"] == 500
+    assert requetes == []
+
+
+def test_lot(config, requetes, monkeypatch):
+    bibio = Bibliotheques(config, charger=False)
+    get_depot(config).inserer_document("Livre", {"code": "LIV2", "salle": "A", "titre": "T", "auteur": "X"})
+    monkeypatch.setattr(index_cotes, "duree_absence", 0.0)
+    requetes.clear()
+
+    resultat = bibio.get_documents(["LIV1", "LIV2", "NOPE"])
+
+    assert set(resultat["documents"]) == {"LIV1", "LIV2"} and resultat["manquants"] == ["NOPE"]
+    assert requetes == ["documents", "localiser", "documents"]
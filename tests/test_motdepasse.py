@@ -0,0 +1,98 @@
+"""
+Mots de passe (motdepasse.py) : format des empreintes, vérification, rehachage à la
+connexion d'un mot de passe en clair ou haché avec d'anciens paramètres.
+"""
+import asyncio
+
+import pytest
+
+from cache import cache_profils
+from depot import get_depot
+from motdepasse import Hacheur, get_hacheur
+from personne import Personne
+
+# empreintes bon marché pour les tests ; seuls les paramètres comptent
+PARAMETRES = {"n": 2 ** 10}
+
+
+@pytest.fixture
+def hacheur() -> Hacheur:
+    return Hacheur(**PARAMETRES)
+
+
+@pytest.fixture
+def config_mdp(config) -> dict:
+    config["motdepasse"] = PARAMETRES
+    cache_profils.vider()
+    return config
+
+
+def test_empreinte(hacheur):
+    empreinte = hacheur.hacher("secret")
+
+    assert empreinte.startswith("$scrypt$n=1024,r=8,p=1$")
+    assert empreinte != hacheur.hacher("secret")  # sel aléatoire
+    assert hacheur.verifier("secret", empreinte)
+    assert not hacheur.verifier("Secret", empreinte)
+    assert not hacheur.verifier("secret", "$scrypt$illisible")
+
+
+def test_pbkdf2():
+    hacheur = Hacheur("pbkdf2-sha256", iterations=1000)
+    empreinte = hacheur.hacher("secret")
+
+    assert empreinte.startswith("$pbkdf2-sha256$i=1000$")
+    assert hacheur.verifier("secret", empreinte) and not hacheur.verifier("autre", empreinte)
+    # une empreinte scrypt reste vérifiable après un changement d'algorithme
+    assert hacheur.verifier("secret", Hacheur(**PARAMETRES).hacher("secret"))
+
+
+def test_login_inconnu(hacheur):
+    assert hacheur.verifier("secret", None) is False
+
+
+def test_a_rehacher(hacheur):
+    assert hacheur.a_rehacher("secret")  # ancien mot de passe en clair
+    assert not hacheur.a_rehacher(hacheur.hacher("secret"))
+    assert hacheur.a_rehacher(Hacheur(n=2 ** 11).hacher("secret"))
+    assert hacheur.a_rehacher(Hacheur("pbkdf2-sha256", iterations=1000).hacher("secret"))
+    assert hacheur.a_rehacher("$scrypt$illisible")
+
+
+def test_verifier_async(hacheur):
+    empreinte = asyncio.run(hacheur.hacher_async("secret"))
+    assert asyncio.run(hacheur.verifier_async("secret", empreinte))
+    assert not asyncio.run(hacheur.verifier_async("autre", empreinte))
+
+
+def test_create_enregistre_une_empreinte(config_mdp):
+    Personne("1", "user", "Dupont", "Jean", "jean", "secret", config_mdp).create()
+
+    empreinte = get_depot(config_mdp).personne_par_login("jean").password
+    assert empreinte != "secret" and get_hacheur(config_mdp).verifier("secret", empreinte)
+
+
+@pytest.mark.parametrize("ancienne", [lambda: "secret", lambda: Hacheur(n=2 ** 11).hacher("secret")],
+                         ids=["en_clair", "anciens_parametres"])
+def test_rehachage_a_la_connexion(config_mdp, ancienne):
+    depot = get_depot(config_mdp)
+    depot.inserer_personne(("1", "user", "Dupont", "Jean", "jean", ancienne()))
+    hacheur = get_hacheur(config_mdp)
+
+    assert Personne.connection(config_mdp, "jean", "autre") is None
+    assert hacheur.a_rehacher(depot.personne_par_login("jean").password)
+
+    assert Personne.connection(config_mdp, "jean", "secret").num == "1"
+
+    empreinte = depot.personne_par_login("jean").password
+    assert empreinte.startswith("$scrypt$n=1024,") and not hacheur.a_rehacher(empreinte)
+    assert Personne.connection(config_mdp, "jean", "secret").num == "1"
+    assert depot.personne_par_login("jean").password == empreinte
+
+
+def test_rehachage_a_la_connexion_async(config_mdp):
+    depot = get_depot(config_mdp)
+    depot.inserer_personne(("1", "user", "Dupont", "Jean", "jean", "secret"))
+
+    assert asyncio.run(Personne.connection_async(config_mdp, "jean", "secret")).num == "1"
+    assert not get_hacheur(config_mdp).a_rehacher(depot.personne_par_login("jean").password)
@@ -0,0 +1,52 @@
+"""
+Connexion (Personne.connection) : une seule lecture par login, sans parcourir la table
+des personnes ; le profil renvoyé et mis en cache ne contient pas l'empreinte.
+"""
+import pytest
+
+from cache import cache_profils
+from depot import get_depot
+from lignes import Profil
+from personne import Personne
+
+
+@pytest.fixture
+def lectures(config, monkeypatch) -> list[str]:
+    # empreintes bon marché : seul le nombre de lectures compte ici
+    config["motdepasse"] = {"n": 2 ** 10}
+    for numero in range(20):
+        Personne(str(numero), "user", f"Nom{numero}", "Prenom", f"login{numero}", f"mdp{numero}", config).create()
+    cache_profils.vider()
+
+    appels: list[str] = []
+    depot = get_depot(config)
+    for nom in ("personne_par_login", "personnes_par_login", "personnes"):
+        methode = getattr(depot, nom)
+        monkeypatch.setattr(depot, nom, lambda *args, _nom=nom, _methode=methode: appels.append(_nom) or _methode(*args))
+    return appels
+
+
+def test_connexion_une_lecture(config, lectures):
+    profil = Personne.connection(config, "login7", "mdp7")
+
+    assert profil == Profil("7", "user", "Nom7", "Prenom", "login7")
+    assert lectures == ["personne_par_login"]
+    assert cache_profils.get("7") == profil
+
+
+@pytest.mark.parametrize("login, password", [("login7", "mauvais"), ("inconnu", "mdp7"), ("login7", "mdp8")])
+def test_connexion_refusee(config, lectures, login, password):
+    assert Personne.connection(config, login, password) is None
+    assert lectures == ["personne_par_login"]
+
+
+def test_login_unique(config, lectures):
+    assert Personne("99", "user", "Autre", "Prenom", "login7", "x", config).create() is False
+    assert Personne.get(config, "login7") == [Profil("7", "user", "Nom7", "Prenom", "login7")]
+
+
+def test_login_libere_par_la_suppression(config, lectures):
+    assert Personne("7", "user", "Nom7", "Prenom", "login7", "mdp7", config).delete()
+
+    assert Personne.connection(config, "login7", "mdp7") is None
+    assert Personne("99", "user", "Autre", "Prenom", "login7", "x", config).create() is True
@@ -0,0 +1,69 @@
+"""
+Pools de connexions (databaseconnection.py), sans serveur MySQL : la connexion au
+serveur est remplacée par un objet qui en a l'interface.
+"""
+import asyncio
+import logging
+
+import databaseconnection
+from databaseconnection import AsyncConnectionPool, connect_to_mysql, get_pool
+
+
+class Connexion:
+    in_transaction = False
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class ConnexionAsync(Connexion):
+    async def is_connected(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+def test_connect_to_mysql_rend_la_connexion_au_pool(monkeypatch):
+    monkeypatch.setattr(databaseconnection, "_connect", lambda *args, **kwargs: Connexion())
+    config = {"host": "test-connect-to-mysql"}
+
+    cnx = connect_to_mysql(config)
+    assert cnx.is_connected()
+    assert get_pool(config).stats()["in_use"] == 1
+
+    cnx.close()
+    cnx.close()
+    stats = get_pool(config).stats()
+    assert (stats["open"], stats["idle"], stats["in_use"]) == (1, 1, 0)
+
+
+def test_pool_async_signale_les_fuites(monkeypatch, caplog):
+    async def connecter(**params):
+        return ConnexionAsync()
+
+    monkeypatch.setattr(databaseconnection.mysql.connector.aio, "connect", connecter)
+    logging.disable(logging.NOTSET)
+
+    async def scenario():
+        pool = AsyncConnectionPool({"host": "test"}, leak_timeout=0.0)
+        cnx = await pool.acquire()
+        await asyncio.sleep(0.01)
+        assert pool.stats()["leaks"] == 1 and pool.stats()["in_use"] == 1
+
+        # la fuite est signalée une seule fois, avec la pile de l'emprunt
+        with caplog.at_level(logging.WARNING, logger="databaseconnection"):
+            autre = await pool.acquire()
+            await pool.release(autre)
+            autre = await pool.acquire()
+        assert sum("probable leak" in message for message in caplog.messages) == 1
+        assert "scenario" in caplog.text
+
+        await pool.release(cnx)
+        await pool.release(autre)
+        assert pool.stats()["leaks"] == 0 and pool.stats()["in_use"] == 0
+
+    asyncio.run(scenario())
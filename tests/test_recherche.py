@@ -0,0 +1,135 @@
+"""
+Recherche plein texte (recherche.py) : normalisation des mots, recherche par préfixe,
+classement BM25 exact malgré les listes d'impact, mises à jour incrémentales.
+"""
+import math
+import random
+
+import pytest
+
+from recherche import IndexRecherche, plier, raciner, termes
+
+
+def bm25(textes: dict[str, str], requete: list[str], k1: float = 1.2, b: float = 0.75) -> dict[str, float]:
+    """
+    Scores BM25 calculés directement à partir des textes, sans index.
+    """
+    docs = {code: termes(texte) for code, texte in textes.items()}
+    n, moyenne = len(docs), sum(map(len, docs.values())) / len(docs)
+    scores: dict[str, float] = {}
+    for code, mots in docs.items():
+        score = 0.0
+        for terme in requete:
+            tf = mots.count(terme)
+            if tf:
+                df = sum(terme in autres for autres in docs.values())
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(mots) / moyenne))
+        if score:
+            scores[code] = score
+    return scores
+
+
+def exhaustif(index: IndexRecherche, requete: str, k: int) -> list[float]:
+    """
+    Les k meilleurs scores, chaque document vivant étant noté par l'index lui-même.
+    """
+    resultats = index.rechercher(requete, k=len(index), prefixe=False)
+    return sorted((score for _, _, score in resultats), reverse=True)[:k]
+
+
+def test_plier():
+    assert plier("Œuvres Complètes") == "oeuvres completes"
+    assert plier("ÉLÈVE Æther") == "eleve aether"
+
+
+def test_raciner():
+    assert raciner("nationales") == raciner("national") == "national"
+    assert raciner("livres") == raciner("livre")
+    assert termes("Les Misérables de la Nation") == [raciner("miserables"), raciner("nation")]
+
+
+def test_classement_bm25():
+    textes = {"A": "chat chat chien", "B": "chat", "C": "chien oiseau poisson lapin", "D": "poisson"}
+    index = IndexRecherche()
+    for code, texte in textes.items():
+        index.ajouter(code, "livre", texte)
+
+    attendus = bm25(textes, [raciner("chat"), raciner("chien")])
+    resultats = index.rechercher("chat chien", k=10, prefixe=False)
+
+    assert [code for code, _, _ in resultats] == sorted(attendus, key=attendus.get, reverse=True)
+    for code, _, score in resultats:
+        assert score == pytest.approx(attendus[code])
+
+
+def test_prefixe():
+    index = IndexRecherche()
+    index.ajouter("A", "livre", "Histoire de France")
+    index.ajouter("B", "livre", "Historiens grecs")
+    index.ajouter("C", "dvd", "Hiver")
+
+    assert {code for code, _, _ in index.rechercher("hist")} == {"A", "B"}
+    # une requête terminée par un espace ne complète pas le dernier mot
+    assert index.rechercher("hist ") == []
+    # les mots de la requête ne sont pas tous obligatoires, mais "france" place A en tête
+    assert [code for code, _, _ in index.rechercher("france hi")][0] == "A"
+
+
+def test_document_hors_des_listes_d_impact():
+    # "alpha beta" n'est dans aucune des 4 meilleures entrées de alpha ni de beta,
+    # mais c'est le seul document qui contient les deux mots
+    index = IndexRecherche(profondeur=4)
+    for numero in range(20):
+        index.ajouter(f"A{numero}", "livre", "alpha")
+        index.ajouter(f"B{numero}", "livre", "beta")
+    index.ajouter("AB", "livre", "alpha beta")
+
+    assert index.rechercher("alpha beta", k=1, prefixe=False)[0][0] == "AB"
+
+
+def test_top_k_exact_aleatoire():
+    hasard = random.Random(3)
+    vocabulaire = [f"mot{numero}" for numero in range(30)]
+    index = IndexRecherche(profondeur=8)
+    for numero in range(2000):
+        # loi de Zipf : quelques mots très fréquents
+        mots = hasard.choices(vocabulaire, weights=[1 / (rang + 1) for rang in range(30)], k=hasard.randint(1, 8))
+        index.ajouter(f"D{numero}", "livre", " ".join(mots))
+
+    for _ in range(50):
+        requete = " ".join(hasard.sample(vocabulaire[:10], hasard.randint(1, 3))) + " "
+        scores = [score for _, _, score in index.rechercher(requete, k=10)]
+        assert scores == pytest.approx(exhaustif(index, requete, 10))
+
+    # après des suppressions et des réindexations, les listes d'impact sont recalculées
+    for numero in hasard.sample(range(2000), 1200):
+        if numero % 2:
+            index.retirer(f"D{numero}")
+        else:
+            index.ajouter(f"D{numero}", "livre", " ".join(hasard.choices(vocabulaire, k=3)))
+    for _ in range(50):
+        requete = " ".join(hasard.sample(vocabulaire[:10], hasard.randint(1, 3))) + " "
+        scores = [score for _, _, score in index.rechercher(requete, k=10)]
+        assert scores == pytest.approx(exhaustif(index, requete, 10))
+
+
+def test_ajouter_retirer_et_compactage():
+    index = IndexRecherche(profondeur=4)
+    for numero in range(40):
+        index.ajouter(f"D{numero}", "livre", "roman " * (1 + numero % 3))
+
+    # réindexer un document enterre l'ancienne version
+    index.ajouter("D0", "livre", "poesie")
+    assert "D0" not in {code for code, _, _ in index.rechercher("roman", k=50, prefixe=False)}
+    assert [code for code, _, _ in index.rechercher("poesie", prefixe=False)] == ["D0"]
+
+    for numero in range(1, 35):
+        index.retirer(f"D{numero}")
+    resultats = index.rechercher("roman", k=50, prefixe=False)
+
+    assert {code for code, _, _ in resultats} == {f"D{numero}" for numero in range(35, 40)}
+    # plus de la moitié des entrées étaient enterrées : la liste a été compactée
+    postings = index._postings[raciner("roman")]
+    assert len(postings.docs) == 5 and postings.morts == 0
+    assert len(index) == 6
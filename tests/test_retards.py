@@ -0,0 +1,44 @@
+"""
+Détection des retards (retards.py) : le tas suit les emprunts par les notifications de
+Document, jusqu'à arreter.
+"""
+import datetime
+
+import pytest
+
+from bibiotheques import Bibliotheques
+from document import Document
+from livre import Livre
+from retards import MoteurRetards
+
+AUJOURDHUI = datetime.date.today()
+
+
+@pytest.fixture
+def moteur(config) -> MoteurRetards:
+    for numero in range(3):
+        Livre(f"LIV{numero}", "Salle A", config, "Titre", "Auteur").insert()
+    moteur = MoteurRetards(Bibliotheques(config))
+    yield moteur
+    moteur.arreter()
+
+
+def test_emprunt_suivi_puis_rendu(moteur):
+    moteur.bibio.ajout_emprunt("U1", "LIV0")
+    moteur.bibio.ajout_emprunt("U2", "LIV1")
+
+    # les emprunts durent deux semaines
+    dans_trois_semaines = AUJOURDHUI + datetime.timedelta(weeks=3)
+    assert [document.code for document in moteur.en_retard(dans_trois_semaines)] == ["LIV0", "LIV1"]
+    assert moteur.en_retard(AUJOURDHUI) == []
+
+    moteur.bibio.fin_emprunt("U1", "LIV0")
+    assert [document.code for document in moteur.en_retard(dans_trois_semaines)] == ["LIV1"]
+
+
+def test_arreter_desabonne(moteur):
+    moteur.arreter()
+
+    assert moteur._suivre_emprunts not in Document._observateurs
+    moteur.bibio.ajout_emprunt("U1", "LIV2")
+    assert len(moteur) == 0
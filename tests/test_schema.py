@@ -0,0 +1,70 @@
+"""
+Schéma (schema.py) : SCHEMA_SQLITE s'applique à une base vide, autant de fois que
+nécessaire, et contient les tables, colonnes et index de TABLES et des migrations MySQL.
+"""
+import re
+import sqlite3
+
+import pytest
+
+from plans import verifier_plans
+from schema import MIGRATIONS, SCHEMA_SQLITE, TABLES, migrer
+
+
+def colonnes_mysql() -> dict[str, set[str]]:
+    """
+    Colonnes de chaque table créée par TABLES et les migrations (CREATE TABLE seulement).
+    """
+    tables: dict[str, set[str]] = {}
+    requetes = TABLES + [requete for _, _, lot in MIGRATIONS for requete in lot]
+    for requete in requetes:
+        creation = re.search(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*)\)", requete, re.S)
+        if creation:
+            lignes = (ligne.strip() for ligne in creation.group(2).splitlines())
+            tables[creation.group(1)] = {ligne.split()[0] for ligne in lignes
+                                         if ligne and not ligne.startswith(("UNIQUE", "PRIMARY", "KEY"))}
+    return tables
+
+
+def index_mysql() -> set[str]:
+    crees, supprimes = set(), set()
+    for _, _, lot in MIGRATIONS:
+        for requete in lot:
+            crees |= set(re.findall(r"CREATE (?:UNIQUE )?INDEX (\w+)", requete))
+            supprimes |= set(re.findall(r"DROP INDEX (\w+)", requete))
+    return crees - supprimes
+
+
+@pytest.fixture
+def base(tmp_path) -> sqlite3.Connection:
+    cnx = sqlite3.connect(tmp_path / "vide.sqlite3")
+    yield cnx
+    cnx.close()
+
+
+def test_base_vide(base):
+    base.executescript(SCHEMA_SQLITE)
+    # une seconde fois : tout est en IF NOT EXISTS
+    base.executescript(SCHEMA_SQLITE)
+
+    for table, colonnes in colonnes_mysql().items():
+        assert {ligne[1] for ligne in base.execute(f"PRAGMA table_info({table})")} == colonnes, table
+
+    index = {nom for (nom,) in base.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert index_mysql() <= index
+
+
+def test_migrations_numerotees():
+    numeros = [numero for numero, _, _ in MIGRATIONS]
+    assert numeros == list(range(1, len(MIGRATIONS) + 1))
+
+
+def test_migrer_sans_mysql(config):
+    resultat = migrer(config)
+    assert resultat["status"] == 200 and resultat["version"] == MIGRATIONS[-1][0]
+
+
+def test_aucun_parcours_de_table(tmp_path):
+    # la connexion cherche la personne par l'index unique du login, comme les autres requêtes
+    resultat = verifier_plans({"stockage": {"type": "sqlite", "chemin": str(tmp_path / "plans.sqlite3")}})
+    assert resultat["status"] == 200, resultat["parcours"]
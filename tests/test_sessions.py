@@ -0,0 +1,116 @@
+"""
+Sessions côté serveur (sessions.py) : écritures évitées, purge au fil des requêtes,
+nouvel identifiant à la connexion.
+"""
+import time
+
+import pytest
+from flask import Flask, session
+
+from sessions import InterfaceSessionServeur, StockageMemoire, StockageSQLite
+
+
+class Compteur:
+    """
+    Stockage qui compte les écritures du stockage enveloppé.
+    """
+
+    def __init__(self, stockage):
+        self.stockage = stockage
+        self.ecritures = 0
+        self.purges = 0
+
+    def charger(self, identifiant):
+        return self.stockage.charger(identifiant)
+
+    def enregistrer(self, identifiant, donnees, duree):
+        self.ecritures += 1
+        self.stockage.enregistrer(identifiant, donnees, duree)
+
+    def supprimer(self, identifiant):
+        self.stockage.supprimer(identifiant)
+
+    def purger(self):
+        self.purges += 1
+        return self.stockage.purger()
+
+
+@pytest.fixture(params=["memoire", "sqlite"])
+def stockage(request, tmp_path):
+    if request.param == "memoire":
+        return Compteur(StockageMemoire())
+    return Compteur(StockageSQLite(str(tmp_path / "sessions.sqlite3")))
+
+
+def application(stockage, **options) -> Flask:
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.session_interface = InterfaceSessionServeur(stockage, **options)
+
+    @app.route("/connexion")
+    def connexion():
+        session.regenerer()
+        session["num"] = "1"
+        return "ok"
+
+    @app.route("/panier")
+    def panier():
+        session["panier"] = "L1"
+        return "ok"
+
+    @app.route("/lire")
+    def lire():
+        return session.get("num", "-")
+
+    return app
+
+
+def cookie(client) -> str | None:
+    entree = client.get_cookie("session")
+    return entree.value if entree else None
+
+
+def test_session_inchangee_pas_reecrite(stockage):
+    client = application(stockage).test_client()
+    client.get("/connexion")
+    ecritures = stockage.ecritures
+
+    for _ in range(20):
+        assert client.get("/lire").text == "1"
+    assert stockage.ecritures == ecritures
+
+
+def test_session_reecrite_passe_la_moitie_de_sa_duree(stockage):
+    client = application(stockage, duree=2.0).test_client()
+    client.get("/connexion")
+    ecritures = stockage.ecritures
+
+    time.sleep(1.1)
+    assert client.get("/lire").text == "1"
+    assert stockage.ecritures == ecritures + 1
+
+
+def test_nouvel_identifiant_a_la_connexion(stockage):
+    client = application(stockage).test_client()
+    client.get("/panier")
+    avant = cookie(client)
+
+    client.get("/connexion")
+    apres = cookie(client)
+
+    assert apres and apres != avant
+    # l'identifiant connu avant la connexion ne donne plus accès à la session
+    assert stockage.charger(avant) is None
+    donnees, _ = stockage.charger(apres)
+    assert donnees == {"panier": "L1", "num": "1"}
+
+
+def test_purge_au_fil_des_requetes(stockage):
+    stockage.enregistrer("expiree", {"num": "2"}, -1.0)
+    client = application(stockage, intervalle_purge=0.0).test_client()
+
+    client.get("/lire")
+    client.get("/lire")
+
+    assert stockage.purges == 2
+    assert stockage.stockage.purger() == 0
@@ -0,0 +1,58 @@
+"""
+Envoi en flux des listes (route /catalogue) : 1 000 000 de livres rendus avec
+templates/index.html, comme par la route, en mémoire bornée.
+"""
+import tracemalloc
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from fragments import TAILLE_BLOC, par_blocs
+from lignes import LigneLivre
+
+LIVRES = 1_000_000
+# pic de mémoire Python admis pendant le rendu ; une page rendue d'un bloc pèse près de 1 Gio
+PLAFOND = 16 * 2 ** 20
+
+
+def lignes(nombre: int, lues: list[int]):
+    for numero in range(nombre):
+        lues[0] = numero + 1
+        yield LigneLivre(f"LIV{numero:07d}", "Salle A", f"Titre {numero}", "Auteur", 0, 1, None, None)
+
+
+def flux(livres):
+    env = Environment(loader=FileSystemLoader(Path(__file__).resolve().parent.parent / "templates"),
+                      autoescape=select_autoescape())
+    return par_blocs(env.get_template("index.html").generate(
+        livres=livres, journals=(), dvds=(), suivant=None, limit=None, login=None, nom=None))
+
+
+def test_premier_bloc_avant_la_fin_de_la_lecture():
+    lues = [0]
+    blocs = flux(lignes(LIVRES, lues))
+
+    assert next(blocs).startswith("<!DOCTYPE html>")
+    # le premier bloc part après quelques dizaines de lignes, pas après toute la table
+    assert lues[0] < 100
+    blocs.close()
+
+
+def test_un_million_de_lignes_en_memoire_bornee():
+    lues = [0]
+    octets = 0
+    lignes_rendues = 0
+    tracemalloc.start()
+    try:
+        depart = tracemalloc.get_traced_memory()[0]
+        for bloc in flux(lignes(LIVRES, lues)):
+            octets += len(bloc)
+            lignes_rendues += bloc.count("<tr class=\"bg-white")
+            assert len(bloc) < 2 * TAILLE_BLOC
+        pic = tracemalloc.get_traced_memory()[1] - depart
+    finally:
+        tracemalloc.stop()
+
+    assert lues[0] == lignes_rendues == LIVRES
+    assert octets > 800 * 2 ** 20
+    assert pic < PLAFOND, f"pic de {pic / 2 ** 20:.1f} Mio"
@@ -0,0 +1,45 @@
+import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+
+
+class VerrousRayes:
+    """
+    Verrous répartis par bandes : chaque cote est protégée par un verrou choisi parmi un
+    nombre fixe, ce qui sérialise les opérations sur un même document sans garder un
+    verrou par document en mémoire.
+
+    Les verrous sont réentrants : Bibliotheques peut tenir le verrou d'un document
+    pendant que les méthodes du document le reprennent.
+
+    Méthodes :
+    ----------
+    pour(code: str) -> threading.RLock:
+        Renvoie le verrou de la bande du document.
+
+    plusieurs(codes: Iterable[str]):
+        Gestionnaire de contexte qui prend les verrous de plusieurs documents, toujours dans
+        le même ordre pour éviter les interblocages.
+    """
+
+    def __init__(self, nb_bandes: int = 256):
+        self._verrous: list[threading.RLock] = [threading.RLock() for _ in range(nb_bandes)]
+
+    def _bande(self, code: str) -> int:
+        # crc32 plutôt que hash() : stable d'un processus à l'autre
+        return zlib.crc32(str(code).encode()) % len(self._verrous)
+
+    def pour(self, code: str) -> threading.RLock:
+        return self._verrous[self._bande(code)]
+
+    @contextmanager
+    def plusieurs(self, codes: Iterable[str]) -> Iterator[None]:
+        with ExitStack() as pile:
+            for bande in sorted({self._bande(code) for code in codes}):
+                pile.enter_context(self._verrous[bande])
+            yield
+
+
+# Verrous partagés par tout le processus, indexés par cote
+verrous_documents = VerrousRayes()